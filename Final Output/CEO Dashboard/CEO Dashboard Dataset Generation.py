@@ -1,48 +1,99 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
-from faker import Faker
-import uuid
+import os
+import sys
 
-fake = Faker()
-np.random.seed(42)
-random.seed(42)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen.calendar import build_calendar, business_day_offset, is_business_day
+from datagen.config import scaled
+from datagen.lazy import LazyFaker, lazy_import
+from datagen.output import DatasetOutput
+from datagen.pools import FakerPools
+from datagen.progress import RunLog
+from datagen.sharding import month_shard_bounds, run_shards
+from datagen.state import append_window, continued_seed, load_state, save_state
+
+np = lazy_import('numpy')  # Imported on first use, so importing this module stays cheap
+pd = lazy_import('pandas')
+fake = LazyFaker()  # Built on first use
+
+# Settings can be overridden through CEO_* environment variables (see datagen.config)
+SEED = int(os.environ.get("CEO_SEED", "42"))  # Root seed; master data uses the stdlib stream, facts use streams spawned from it
+SCALE = float(os.environ.get("CEO_SCALE", "1"))  # Multiplies master-data counts and daily volumes together
+NUM_WORKERS = int(os.environ.get("CEO_WORKERS", "1"))  # Processes for sharded fact generation; output is identical for any value
+APPEND_DAYS = int(os.environ.get("CEO_APPEND_DAYS", "0"))  # >0: extend the dataset in OUTPUT_DIR by this many days from its saved state
+
+pools = FakerPools('en_US', SEED, faker=fake)  # Pre-generated company names, cities and job titles, drawn with Faker's stream
 
 # Date range setup
-start_date = datetime(2023, 1, 1)
-end_date = datetime(2024, 12, 31)
-date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+start_date = datetime.fromisoformat(os.environ.get("CEO_START_DATE", "2023-01-01"))
+end_date = datetime.fromisoformat(os.environ.get("CEO_END_DATE", "2024-12-31"))
+FISCAL_YEAR_START_MONTH = 4  # April start fiscal year (dim_date fiscal columns)
+HOLIDAYS = None  # e.g. 'us_federal' (see datagen.calendar) to keep orders and billings off public holidays
+
+# Multiplies daily sales order volume (e.g. 50-100 for Power BI load testing)
+ORDER_VOLUME_SCALE = 1
 
-# Filter out weekends for business days
-business_days = [d for d in date_range if d.weekday() < 5]
+SALES_ORGS = ['SO01', 'SO02', 'SO03']
+PLANTS = ['P001', 'P002', 'P003']
+
+OUTPUT_FORMAT = os.environ.get("CEO_FORMAT", 'csv')  # csv, parquet or feather (parquet/feather need pyarrow)
+OUTPUT_DIR = os.environ.get("CEO_OUTPUT_DIR", '.')
+PROFILE = os.environ.get("CEO_PROFILE")  # cprofile or pyinstrument: profile every stage into OUTPUT_DIR/_profiles
+PARTITION_BY = None  # e.g. ('fiscal_year', 'fiscal_period') to write fact tables as Hive partitions with a _manifest.json
+
+# Column types for the Parquet/Feather backends (see datagen.output); unlisted columns are inferred
+AMOUNT = 'decimal(18,2)'
+TABLE_SCHEMAS = {
+    'vbap_sales_orders': {
+        'item_number': 'code', 'customer_id': 'code', 'material_id': 'code', 'order_date': 'date',
+        'requested_delivery_date': 'date', 'order_quantity': 'int32', 'net_value': AMOUNT,
+        'currency': 'code', 'sales_org': 'code', 'plant': 'code'
+    },
+    'vbrp_billing': {
+        'item_number': 'code', 'customer_id': 'code', 'material_id': 'code', 'billing_date': 'date',
+        'billing_quantity': 'int32', 'net_value': AMOUNT, 'tax_amount': AMOUNT, 'gross_value': AMOUNT,
+        'currency': 'code', 'cost_of_goods': AMOUNT
+    },
+    'faglflexa_gl_items': {
+        'company_code': 'code', 'gl_account': 'code', 'posting_date': 'date', 'amount_local': AMOUNT,
+        'amount_group': AMOUNT, 'currency_local': 'code', 'currency_group': 'code', 'cost_center': 'code',
+        'profit_center': 'code', 'posting_period': 'int32', 'fiscal_year': 'int32'
+    },
+    'bkpf_doc_header': {
+        'company_code': 'code', 'document_date': 'date', 'posting_date': 'date', 'document_type': 'code',
+        'currency': 'code'
+    },
+    'coep_copa_items': {
+        'company_code': 'code', 'operating_concern': 'code', 'record_type': 'code', 'version': 'code',
+        'posting_period': 'int32', 'fiscal_year': 'int32', 'customer_id': 'code', 'material_id': 'code',
+        'sales_org': 'code', 'product_line': 'code', 'revenue_amount': AMOUNT, 'cogs_amount': AMOUNT,
+        'marketing_cost': AMOUNT, 'sales_cost': AMOUNT, 'currency': 'code', 'posting_date': 'date'
+    }
+}
+# Fact tables partitioned when PARTITION_BY is set, with the date column their fiscal keys and manifest ranges come from.
+# Fiscal periods follow the calendar months already used for posting_period/fiscal_year in the GL and CO-PA items.
+PARTITIONED_TABLES = {
+    'vbap_sales_orders': 'order_date',
+    'vbrp_billing': 'billing_date',
+    'faglflexa_gl_items': 'posting_date',
+    'bkpf_doc_header': 'posting_date',
+    'coep_copa_items': 'posting_date'
+}
 
-print(f"Generating data for {len(business_days)} business days from {start_date.date()} to {end_date.date()}")
+run_log = RunLog('ceo', OUTPUT_DIR, PROFILE)
+
+def format_document_ids(prefix, start, count, width=8):
+    """Sequential document numbers (e.g. SO00000001) for a block of counters."""
+    return [f'{prefix}{str(i).zfill(width)}' for i in range(start, start + count)]
 
 # ===== DATE DIMENSION =====
-def create_date_dimension():
-    dates = []
-    for date in date_range:
-        fiscal_year = date.year if date.month >= 4 else date.year - 1  # April start fiscal year
-        fiscal_month = ((date.month - 4) % 12) + 1
-        fiscal_quarter = ((fiscal_month - 1) // 3) + 1
-        
-        dates.append({
-            'date_key': date.date(),
-            'year': date.year,
-            'quarter': ((date.month - 1) // 3) + 1,
-            'month': date.month,
-            'month_name': date.strftime('%B'),
-            'week': date.isocalendar()[1],
-            'day_of_week': date.weekday() + 1,
-            'day_name': date.strftime('%A'),
-            'fiscal_year': fiscal_year,
-            'fiscal_quarter': fiscal_quarter,
-            'fiscal_month': fiscal_month,
-            'is_weekend': date.weekday() >= 5,
-            'is_holiday': False  # Simplified - could add holiday logic
-        })
-    return pd.DataFrame(dates)
+def ceo_calendar(first_date=start_date, last_date=end_date):
+    # Shared, memoized calendar for a period (see datagen.calendar)
+    return build_calendar(first_date, last_date, FISCAL_YEAR_START_MONTH, HOLIDAYS)
+
+def create_date_dimension(calendar):
+    return calendar.date_dimension().drop(columns=['month_start_date', 'quarter_start_date', 'year_start_date'])
 
 # ===== MASTER DATA =====
 def create_customers(n=50):
@@ -50,11 +101,11 @@ def create_customers(n=50):
     for i in range(n):
         customers.append({
             'customer_id': f'C{str(i+1000).zfill(6)}',
-            'customer_name': fake.company(),
+            'customer_name': pools.choice('company'),
             'customer_group': random.choice(['RETAIL', 'WHOLESALE', 'ENTERPRISE']),
             'country': random.choice(['US', 'CA', 'DE', 'GB', 'FR']),
             'region': random.choice(['NORTH', 'SOUTH', 'EAST', 'WEST', 'CENTRAL']),
-            'city': fake.city(),
+            'city': pools.choice('city'),
             'created_date': fake.date_between(start_date='-5y', end_date=start_date),
             'customer_type': random.choice(['NEW', 'EXISTING'])
         })
@@ -122,7 +173,7 @@ def create_employees(n=500):
             'employee_subgroup': random.choice(['MGR', 'SR', 'JR', 'LEAD']),
             'personnel_area': random.choice(['PA01', 'PA02', 'PA03']),
             'organizational_unit': f'ORG{random.randint(1000, 9999)}',
-            'position': fake.job(),
+            'position': pools.choice('job'),
             'job': random.choice(['MANAGER', 'ANALYST', 'SPECIALIST', 'COORDINATOR']),
             'cost_center': f'CC{random.randint(1000, 9999)}',
             'company_code': '1000'
@@ -130,206 +181,179 @@ def create_employees(n=500):
     return pd.DataFrame(employees)
 
 # ===== TRANSACTIONAL DATA =====
-def create_sales_orders(customers_df, materials_df, business_days):
-    orders = []
-    order_counter = 1
+def draw_daily_order_counts(days, rng, volume_scale=1):
+    """Draw the number of sales orders for each business day in one pass."""
+    days = pd.DatetimeIndex(days)
+    q4_boost = np.isin(days.month, [11, 12])
+    summer_dip = np.isin(days.month, [6, 7, 8])
     
-    for date in business_days:
-        # Seasonal multiplier
-        month = date.month
-        if month in [11, 12]:  # Q4 boost
-            daily_orders = random.randint(80, 120)
-        elif month in [6, 7, 8]:  # Summer dip
-            daily_orders = random.randint(30, 60)
-        else:
-            daily_orders = random.randint(50, 90)
-        
-        # Month-end boost
-        if date.day >= 28:
-            daily_orders = int(daily_orders * 1.3)
-        
-        for _ in range(daily_orders):
-            customer = customers_df.sample(1).iloc[0]
-            material = materials_df.sample(1).iloc[0]
-            quantity = random.randint(1, 100)
-            unit_price = material['standard_cost'] * random.uniform(1.2, 2.5)  # Markup
-            
-            orders.append({
-                'sales_order_id': f'SO{str(order_counter).zfill(8)}',
-                'item_number': '000010',
-                'customer_id': customer['customer_id'],
-                'material_id': material['material_id'],
-                'order_date': date.date(),
-                'requested_delivery_date': (date + timedelta(days=random.randint(7, 30))).date(),
-                'order_quantity': quantity,
-                'net_value': round(quantity * unit_price, 2),
-                'currency': 'USD',
-                'sales_org': random.choice(['SO01', 'SO02', 'SO03']),
-                'plant': random.choice(['P001', 'P002', 'P003'])
-            })
-            order_counter += 1
+    # Seasonal multiplier: Q4 boost 80-120, summer dip 30-60, otherwise 50-90
+    low = np.where(q4_boost, 80, np.where(summer_dip, 30, 50))
+    high = np.where(q4_boost, 120, np.where(summer_dip, 60, 90))
+    daily_orders = rng.integers(low, high + 1)
+    
+    # Month-end boost
+    daily_orders = np.where(days.day >= 28, (daily_orders * 1.3).astype(int), daily_orders)
+    
+    if volume_scale != 1:
+        daily_orders = (daily_orders * volume_scale).astype(int)
+    return daily_orders
+
+def create_sales_orders(customers_df, materials_df, business_days, daily_orders, rng, first_id=1):
+    days = pd.DatetimeIndex(business_days)
+    n = int(daily_orders.sum())
     
-    return pd.DataFrame(orders)
+    # Draw every order line of the run as whole arrays
+    order_dates = np.repeat(days.values, daily_orders)
+    customer_idx = rng.integers(0, len(customers_df), n)
+    material_idx = rng.integers(0, len(materials_df), n)
+    quantity = rng.integers(1, 101, n)
+    unit_price = materials_df['standard_cost'].to_numpy()[material_idx] * rng.uniform(1.2, 2.5, n)  # Markup
+    delivery_lag = rng.integers(7, 31, n).astype('timedelta64[D]')
+    
+    return pd.DataFrame({
+        'sales_order_id': format_document_ids('SO', first_id, n),
+        'item_number': '000010',
+        'customer_id': customers_df['customer_id'].to_numpy()[customer_idx],
+        'material_id': materials_df['material_id'].to_numpy()[material_idx],
+        'order_date': order_dates,
+        'requested_delivery_date': order_dates + delivery_lag,
+        'order_quantity': quantity,
+        'net_value': np.round(quantity * unit_price, 2),
+        'currency': 'USD',
+        'sales_org': rng.choice(SALES_ORGS, n),
+        'plant': rng.choice(PLANTS, n)
+    })
 
-def create_billing_documents(sales_orders_df, business_days):
-    billings = []
-    billing_counter = 1
+def create_billing_documents(sales_orders_df, rng, last_billing_date=end_date):
+    # Not all orders get billed immediately
+    billed = rng.random(len(sales_orders_df)) < 0.85  # 85% of orders get billed
+    orders = sales_orders_df[billed]
     
     # Create billing documents with 5-15 day lag from sales orders
-    for _, order in sales_orders_df.iterrows():
-        # Not all orders get billed immediately
-        if random.random() < 0.85:  # 85% of orders get billed
-            billing_delay = random.randint(5, 15)
-            billing_date = pd.to_datetime(order['order_date']) + timedelta(days=billing_delay)
-            
-            # Only bill on business days
-            while billing_date.weekday() >= 5:
-                billing_date += timedelta(days=1)
-            
-            # Only if billing date is within our range
-            if billing_date.date() <= end_date.date():
-                tax_rate = 0.08  # 8% tax
-                gross_value = order['net_value']
-                tax_amount = round(gross_value * tax_rate, 2)
-                
-                billings.append({
-                    'billing_document': f'BD{str(billing_counter).zfill(8)}',
-                    'item_number': '000010',
-                    'sales_order_id': order['sales_order_id'],
-                    'customer_id': order['customer_id'],
-                    'material_id': order['material_id'],
-                    'billing_date': billing_date.date(),
-                    'billing_quantity': order['order_quantity'],
-                    'net_value': gross_value,
-                    'tax_amount': tax_amount,
-                    'gross_value': round(gross_value + tax_amount, 2),
-                    'currency': order['currency'],
-                    'cost_of_goods': round(gross_value * random.uniform(0.4, 0.7), 2)  # 40-70% COGS
-                })
-                billing_counter += 1
+    billing_delay = rng.integers(5, 16, len(orders)).astype('timedelta64[D]')
+    billing_date = pd.to_datetime(orders['order_date']).to_numpy().astype('datetime64[D]') + billing_delay
+    
+    # Only bill on business days
+    billing_date = business_day_offset(billing_date, holidays=HOLIDAYS)
     
-    return pd.DataFrame(billings)
+    # Only if billing date is within our range; later billings are returned as
+    # pending orders so an appended run can bill them when their date arrives
+    in_range = billing_date <= np.datetime64(last_billing_date.date())
+    pending_df = orders[~in_range].assign(billing_date=billing_date[~in_range])
+    return create_billing_items(orders[in_range], billing_date[in_range], rng), pending_df
 
-def create_gl_line_items(billing_df, gl_accounts_df, business_days):
-    gl_items = []
-    gl_counter = 1
-    doc_counter = 1
+def bill_pending_orders(pending_df, rng, last_billing_date):
+    """Bills carried-over orders whose billing date falls on or before last_billing_date."""
+    due = pending_df['billing_date'].to_numpy() <= np.datetime64(last_billing_date.date())
+    orders = pending_df[due]
+    return create_billing_items(orders, orders['billing_date'].to_numpy(), rng), pending_df[~due]
+
+def create_billing_items(orders, billing_date, rng):
+    n = len(orders)
     
-    # Revenue postings from billing
-    for _, billing in billing_df.iterrows():
-        doc_num = f'DOC{str(doc_counter).zfill(8)}'
-        
-        # Revenue posting
-        gl_items.append({
-            'id': gl_counter,
-            'company_code': '1000',
-            'gl_account': '4000000',  # Product Sales Revenue
-            'posting_date': billing['billing_date'],
-            'document_number': doc_num,
-            'amount_local': billing['net_value'],
-            'amount_group': billing['net_value'],
-            'currency_local': 'USD',
-            'currency_group': 'USD',
-            'cost_center': f'CC{random.randint(1000, 9999)}',
-            'profit_center': f'PC{random.randint(100, 999)}',
-            'reference_doc': billing['billing_document'],
-            'posting_period': billing['billing_date'].month if hasattr(billing['billing_date'], 'month') else pd.to_datetime(billing['billing_date']).month,
-            'fiscal_year': billing['billing_date'].year if hasattr(billing['billing_date'], 'year') else pd.to_datetime(billing['billing_date']).year
-        })
-        gl_counter += 1
-        
-        # COGS posting
-        gl_items.append({
-            'id': gl_counter,
-            'company_code': '1000',
-            'gl_account': '5000000',  # COGS
-            'posting_date': billing['billing_date'],
-            'document_number': doc_num,
-            'amount_local': -billing['cost_of_goods'],  # Negative for expense
-            'amount_group': -billing['cost_of_goods'],
-            'currency_local': 'USD',
-            'currency_group': 'USD',
-            'cost_center': f'CC{random.randint(1000, 9999)}',
-            'profit_center': f'PC{random.randint(100, 999)}',
-            'reference_doc': billing['billing_document'],
-            'posting_period': billing['billing_date'].month if hasattr(billing['billing_date'], 'month') else pd.to_datetime(billing['billing_date']).month,
-            'fiscal_year': billing['billing_date'].year if hasattr(billing['billing_date'], 'year') else pd.to_datetime(billing['billing_date']).year
-        })
-        gl_counter += 1
-        doc_counter += 1
+    tax_rate = 0.08  # 8% tax
+    gross_value = orders['net_value'].to_numpy()
+    tax_amount = np.round(gross_value * tax_rate, 2)
     
-    # Additional operating expenses (monthly)
-    monthly_dates = pd.date_range(start=start_date, end=end_date, freq='MS')  # Month start
-    opex_accounts = ['6000000', '6010000', '6020000', '6030000']
+    return pd.DataFrame({
+        'billing_document': format_document_ids('BD', 1, n),
+        'item_number': '000010',
+        'sales_order_id': orders['sales_order_id'].to_numpy(),
+        'customer_id': orders['customer_id'].to_numpy(),
+        'material_id': orders['material_id'].to_numpy(),
+        'billing_date': billing_date,
+        'billing_quantity': orders['order_quantity'].to_numpy(),
+        'net_value': gross_value,
+        'tax_amount': tax_amount,
+        'gross_value': np.round(gross_value + tax_amount, 2),
+        'currency': orders['currency'].to_numpy(),
+        'cost_of_goods': np.round(gross_value * rng.uniform(0.4, 0.7, n), 2)  # 40-70% COGS
+    })
+
+def create_gl_line_items(billing_df, rng, first_id=1, first_document=1, period_start=start_date,
+                         period_end=end_date):
+    # Revenue and COGS posting per billing document, one document per billing
+    n = len(billing_df)
+    billing_date = pd.to_datetime(billing_df['billing_date'])
+    billing_amounts = np.column_stack([billing_df['net_value'].to_numpy(), -billing_df['cost_of_goods'].to_numpy()]).ravel()  # Negative for expense
+    billing_lines = pd.DataFrame({
+        'company_code': '1000',
+        'gl_account': np.tile(['4000000', '5000000'], n),  # Product Sales Revenue, COGS
+        'posting_date': np.repeat(billing_date.to_numpy(), 2),
+        'document_number': np.repeat(format_document_ids('DOC', first_document, n), 2),
+        'amount_local': billing_amounts,
+        'amount_group': billing_amounts,
+        'reference_doc': np.repeat(billing_df['billing_document'].to_numpy(), 2),
+        'posting_period': np.repeat(billing_date.dt.month.to_numpy(), 2),
+        'fiscal_year': np.repeat(billing_date.dt.year.to_numpy(), 2)
+    })
     
-    for month_date in monthly_dates:
-        if month_date.weekday() < 5:  # Business day
-            for account in opex_accounts:
-                doc_num = f'DOC{str(doc_counter).zfill(8)}'
-                amount = random.uniform(50000, 200000)  # Monthly expenses
-                
-                gl_items.append({
-                    'id': gl_counter,
-                    'company_code': '1000',
-                    'gl_account': account,
-                    'posting_date': month_date.date(),
-                    'document_number': doc_num,
-                    'amount_local': -amount,  # Negative for expense
-                    'amount_group': -amount,
-                    'currency_local': 'USD',
-                    'currency_group': 'USD',
-                    'cost_center': f'CC{random.randint(1000, 9999)}',
-                    'profit_center': f'PC{random.randint(100, 999)}',
-                    'reference_doc': f'ACCRUAL_{month_date.strftime("%Y%m")}',
-                    'posting_period': month_date.month,
-                    'fiscal_year': month_date.year
-                })
-                gl_counter += 1
-                doc_counter += 1
+    # Additional operating expenses (monthly), posted on month starts that are business days
+    monthly_dates = pd.date_range(start=period_start, end=period_end, freq='MS')  # Month start
+    monthly_dates = monthly_dates[is_business_day(monthly_dates, HOLIDAYS)]
+    opex_accounts = ['6000000', '6010000', '6020000', '6030000']
+    m = len(monthly_dates) * len(opex_accounts)
+    opex_amounts = -rng.uniform(50000, 200000, m)  # Monthly expenses, negative for expense
+    opex_lines = pd.DataFrame({
+        'company_code': '1000',
+        'gl_account': np.tile(opex_accounts, len(monthly_dates)),
+        'posting_date': np.repeat(monthly_dates.to_numpy(), len(opex_accounts)),
+        'document_number': format_document_ids('DOC', first_document + n, m),
+        'amount_local': opex_amounts,
+        'amount_group': opex_amounts,
+        'reference_doc': np.repeat(['ACCRUAL_' + d.strftime('%Y%m') for d in monthly_dates], len(opex_accounts)),
+        'posting_period': np.repeat(monthly_dates.month.to_numpy(), len(opex_accounts)),
+        'fiscal_year': np.repeat(monthly_dates.year.to_numpy(), len(opex_accounts))
+    })
     
-    return pd.DataFrame(gl_items)
+    gl_items_df = pd.concat([billing_lines, opex_lines], ignore_index=True)
+    total = len(gl_items_df)
+    gl_items_df.insert(0, 'id', np.arange(first_id, first_id + total))
+    gl_items_df.insert(7, 'currency_local', 'USD')
+    gl_items_df.insert(8, 'currency_group', 'USD')
+    gl_items_df.insert(9, 'cost_center', np.char.add('CC', rng.integers(1000, 10000, total).astype(str)))
+    gl_items_df.insert(10, 'profit_center', np.char.add('PC', rng.integers(100, 1000, total).astype(str)))
+    return gl_items_df
 
-def create_copa_items(billing_df, customers_df, materials_df):
-    copa_items = []
-    copa_counter = 1
+def create_copa_items(billing_df, materials_df, rng):
+    n = len(billing_df)
+    billing_date = pd.to_datetime(billing_df['billing_date'])
+    net_value = billing_df['net_value'].to_numpy()
     
-    for _, billing in billing_df.iterrows():
-        customer = customers_df[customers_df['customer_id'] == billing['customer_id']].iloc[0]
-        material = materials_df[materials_df['material_id'] == billing['material_id']].iloc[0]
-        
-        # Marketing cost allocation (roughly 5-10% of revenue)
-        marketing_cost = billing['net_value'] * random.uniform(0.05, 0.10)
-        sales_cost = billing['net_value'] * random.uniform(0.03, 0.08)
-        
-        copa_items.append({
-            'id': copa_counter,
-            'company_code': '1000',
-            'operating_concern': 'OP01',
-            'record_type': 'F',  # Actual
-            'version': '0',
-            'posting_period': billing['billing_date'].month if hasattr(billing['billing_date'], 'month') else pd.to_datetime(billing['billing_date']).month,
-            'fiscal_year': billing['billing_date'].year if hasattr(billing['billing_date'], 'year') else pd.to_datetime(billing['billing_date']).year,
-            'customer_id': billing['customer_id'],
-            'material_id': billing['material_id'],
-            'sales_org': random.choice(['SO01', 'SO02', 'SO03']),
-            'product_line': material['product_line'],
-            'revenue_amount': billing['net_value'],
-            'cogs_amount': -billing['cost_of_goods'],
-            'marketing_cost': -marketing_cost,
-            'sales_cost': -sales_cost,
-            'currency': 'USD',
-            'posting_date': billing['billing_date']
-        })
-        copa_counter += 1
+    # Keyed join for the only dimension attribute CO-PA emits
+    product_line = billing_df['material_id'].map(materials_df.set_index('material_id')['product_line'])
     
-    return pd.DataFrame(copa_items)
+    # Marketing cost allocation (roughly 5-10% of revenue)
+    marketing_cost = net_value * rng.uniform(0.05, 0.10, n)
+    sales_cost = net_value * rng.uniform(0.03, 0.08, n)
+    
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'company_code': '1000',
+        'operating_concern': 'OP01',
+        'record_type': 'F',  # Actual
+        'version': '0',
+        'posting_period': billing_date.dt.month.to_numpy(),
+        'fiscal_year': billing_date.dt.year.to_numpy(),
+        'customer_id': billing_df['customer_id'].to_numpy(),
+        'material_id': billing_df['material_id'].to_numpy(),
+        'sales_org': rng.choice(SALES_ORGS, n),
+        'product_line': product_line.to_numpy(),
+        'revenue_amount': net_value,
+        'cogs_amount': -billing_df['cost_of_goods'].to_numpy(),
+        'marketing_cost': -marketing_cost,
+        'sales_cost': -sales_cost,
+        'currency': 'USD',
+        'posting_date': billing_date.to_numpy()
+    })
 
-def create_employee_actions(employees_df):
+def create_employee_actions(employees_df, period_start=start_date, period_end=end_date, first_id=1):
     actions = []
-    action_counter = 1
+    action_counter = first_id
     
     # Generate some turnover events
-    for date in pd.date_range(start=start_date, end=end_date, freq='MS'):  # Monthly
+    for date in pd.date_range(start=period_start, end=period_end, freq='MS'):  # Monthly
         if date.weekday() < 5:  # Business day
             # Terminations (higher in Dec/Jan)
             if date.month in [12, 1]:
@@ -345,7 +369,7 @@ def create_employee_actions(employees_df):
             
             # Terminations
             for _ in range(num_terminations):
-                employee = employees_df.sample(1).iloc[0]
+                employee = employees_df.iloc[random.randrange(len(employees_df))]
                 actions.append({
                     'id': action_counter,
                     'employee_id': employee['employee_id'],
@@ -370,101 +394,237 @@ def create_employee_actions(employees_df):
                     'organizational_unit_old': None,
                     'organizational_unit_new': f'ORG{random.randint(1000, 9999)}',
                     'position_old': None,
-                    'position_new': fake.job()
+                    'position_new': pools.choice('job')
                 })
                 action_counter += 1
     
     return pd.DataFrame(actions)
 
-# Generate all datasets
-print("Creating master data...")
-dim_date_df = create_date_dimension()
-customers_df = create_customers(50)
-materials_df = create_materials(200)
-gl_accounts_df = create_gl_accounts()
-employees_df = create_employees(500)
-
-print("Creating customer sales data...")
-knvv_df = customers_df.copy()
-knvv_df['sales_org'] = knvv_df.apply(lambda x: random.choice(['SO01', 'SO02', 'SO03']), axis=1)
-knvv_df['distribution_channel'] = knvv_df.apply(lambda x: random.choice(['DC01', 'DC02']), axis=1)
-knvv_df['division'] = knvv_df.apply(lambda x: random.choice(['DIV01', 'DIV02', 'DIV03']), axis=1)
-knvv_df['customer_classification'] = knvv_df.apply(lambda x: random.choice(['A', 'B', 'C']), axis=1)
-knvv_df['payment_terms'] = knvv_df.apply(lambda x: random.choice(['NET30', 'NET60', 'COD']), axis=1)
-knvv_df['sales_rep'] = knvv_df.apply(lambda x: f'REP{random.randint(1001, 1099)}', axis=1)
-
-print("Creating transactional data...")
-print("- Sales orders...")
-sales_orders_df = create_sales_orders(customers_df, materials_df, business_days)
-print(f"  Generated {len(sales_orders_df)} sales orders")
-
-print("- Billing documents...")
-billing_df = create_billing_documents(sales_orders_df, business_days)
-print(f"  Generated {len(billing_df)} billing documents")
-
-print("- GL line items...")
-gl_items_df = create_gl_line_items(billing_df, gl_accounts_df, business_days)
-print(f"  Generated {len(gl_items_df)} GL line items")
-
-print("- CO-PA items...")
-copa_df = create_copa_items(billing_df, customers_df, materials_df)
-print(f"  Generated {len(copa_df)} CO-PA records")
-
-print("- Employee actions...")
-employee_actions_df = create_employee_actions(employees_df)
-print(f"  Generated {len(employee_actions_df)} employee actions")
-
-# Create document headers
-doc_headers = []
-for doc_num in gl_items_df['document_number'].unique():
-    gl_doc = gl_items_df[gl_items_df['document_number'] == doc_num].iloc[0]
-    doc_headers.append({
-        'document_number': doc_num,
-        'company_code': gl_doc['company_code'],
-        'document_date': gl_doc['posting_date'],
-        'posting_date': gl_doc['posting_date'],
+def create_document_headers(gl_items_df):
+    # One header per document, taken from its first GL line in a single pass
+    first_lines = gl_items_df.drop_duplicates('document_number', keep='first')
+    
+    return pd.DataFrame({
+        'document_number': first_lines['document_number'].to_numpy(),
+        'company_code': first_lines['company_code'].to_numpy(),
+        'document_date': first_lines['posting_date'].to_numpy(),
+        'posting_date': first_lines['posting_date'].to_numpy(),
         'document_type': 'SA',  # Sales document
-        'reference': gl_doc['reference_doc'],
-        'currency': gl_doc['currency_local'],
+        'reference': first_lines['reference_doc'].to_numpy(),
+        'currency': first_lines['currency_local'].to_numpy(),
         'exchange_rate': 1.0
     })
 
-doc_headers_df = pd.DataFrame(doc_headers)
-
-# Save all datasets
-datasets = {
-    'dim_date': dim_date_df,
-    'kna1_customers': customers_df,
-    'knvv_customer_sales': knvv_df,
-    'mara_materials': materials_df,
-    'skat_gl_accounts': gl_accounts_df,
-    'pa0001_hr_master': employees_df,
-    'vbap_sales_orders': sales_orders_df,
-    'vbrp_billing': billing_df,
-    'faglflexa_gl_items': gl_items_df,
-    'bkpf_doc_header': doc_headers_df,
-    'coep_copa_items': copa_df,
-    'pa0000_employee_actions': employee_actions_df
-}
+def generate_sales_shard(shard, seed_sequence, customers_df, materials_df, last_billing_date=end_date):
+    """Generates sales orders, billing documents and CO-PA items for one month of business days.
+
+    Sales order numbers are final (counts are drawn up front); billing documents
+    and CO-PA ids are renumbered once the shards are concatenated. Orders billed
+    after last_billing_date come back as pending billings.
+    """
+    shard_days, daily_orders, first_order_id = shard
+    rng = np.random.default_rng(seed_sequence)
+    sales_orders_df = create_sales_orders(customers_df, materials_df, shard_days, daily_orders, rng, first_order_id)
+    billing_df, pending_df = create_billing_documents(sales_orders_df, rng, last_billing_date)
+    copa_df = create_copa_items(billing_df, materials_df, rng)
+    return sales_orders_df, billing_df, copa_df, pending_df
+
+def generate_ceo_facts(days, customers_df, materials_df, employees_df, run_state,
+                       period_start, period_end):
+    """Generates every CEO fact table for the business days of one period.
+
+    run_state carries what an appended run continues from: the rows already
+    written per table (document numbers and ids continue after them), the
+    orders billed after the period and the seed children already spawned. A
+    full run starts from an empty dict; the dict is updated in place.
+    """
+    rows_written = run_state.setdefault('rows', {})
+    root_seed = continued_seed(SEED, run_state.get('seed_children', 0))
+    counts_seed, gl_seed, shards_seed, pending_seed = root_seed.spawn(4)
+    run_state['seed_children'] = root_seed.n_children_spawned
+
+    def first_id(table_name, count):
+        # Numbering continues after the rows earlier runs wrote
+        first = rows_written.get(table_name, 0) + 1
+        rows_written[table_name] = first - 1 + count
+        return first
+
+    # Month shards, each with its own random stream; order counts are drawn up
+    # front so every shard knows its first sales order number
+    daily_orders = draw_daily_order_counts(days, np.random.default_rng(counts_seed), ORDER_VOLUME_SCALE * SCALE)
+    first_order_ids = np.cumsum(daily_orders) - daily_orders + first_id('vbap_sales_orders', int(daily_orders.sum()))
+    shards = [(days[start:stop], daily_orders[start:stop], int(first_order_ids[start]))
+              for start, stop in month_shard_bounds(days)]
+    with run_log.stage("Sales orders, billing documents and CO-PA items", total=len(shards)) as stage:
+        shard_results = run_shards(generate_sales_shard, shards, shards_seed, workers=NUM_WORKERS,
+                                   on_result=lambda result: stage.advance(sum(map(len, result[:3])), units=1),
+                                   customers_df=customers_df, materials_df=materials_df, last_billing_date=period_end)
+        order_batches, billing_batches, copa_batches, pending_batches = zip(*shard_results)
+        # Orders carried over from an earlier run are billed ahead of the new ones
+        billing_batches, copa_batches = list(billing_batches), list(copa_batches)
+        if 'pending_billings' in run_state:
+            pending_rng = np.random.default_rng(pending_seed)
+            carried_billing_df, run_state['pending_billings'] = bill_pending_orders(
+                run_state['pending_billings'], pending_rng, period_end)
+            billing_batches.insert(0, carried_billing_df)
+            copa_batches.insert(0, create_copa_items(carried_billing_df, materials_df, pending_rng))
+            pending_batches = (run_state['pending_billings'],) + pending_batches
+            stage.advance(2 * len(carried_billing_df))
+        run_state['pending_billings'] = pd.concat(pending_batches, ignore_index=True)
+        sales_orders_df = pd.concat(order_batches, ignore_index=True)
+        billing_df = pd.concat(billing_batches, ignore_index=True)
+        billing_df['billing_document'] = format_document_ids('BD', first_id('vbrp_billing', len(billing_df)), len(billing_df))
+        copa_df = pd.concat(copa_batches, ignore_index=True)
+        first_copa_id = first_id('coep_copa_items', len(copa_df))
+        copa_df['id'] = np.arange(first_copa_id, first_copa_id + len(copa_df))
+    run_log.info(f"  Generated {len(sales_orders_df)} sales orders")
+    run_log.info(f"  Generated {len(billing_df)} billing documents")
+    run_log.info(f"  Generated {len(copa_df)} CO-PA records")
+
+    with run_log.stage("GL line items") as stage:
+        gl_items_df = create_gl_line_items(billing_df, np.random.default_rng(gl_seed),
+                                           first_id=rows_written.get('faglflexa_gl_items', 0) + 1,
+                                           first_document=rows_written.get('bkpf_doc_header', 0) + 1,
+                                           period_start=period_start, period_end=period_end)
+        first_id('faglflexa_gl_items', len(gl_items_df))
+        stage.advance(len(gl_items_df))
+
+    with run_log.stage("Employee actions") as stage:
+        employee_actions_df = create_employee_actions(employees_df, period_start, period_end,
+                                                      rows_written.get('pa0000_employee_actions', 0) + 1)
+        first_id('pa0000_employee_actions', len(employee_actions_df))
+        stage.advance(len(employee_actions_df))
+
+    with run_log.stage("Document headers") as stage:
+        doc_headers_df = create_document_headers(gl_items_df)
+        first_id('bkpf_doc_header', len(doc_headers_df))
+        stage.advance(len(doc_headers_df))
+
+    return {
+        'vbap_sales_orders': sales_orders_df,
+        'vbrp_billing': billing_df,
+        'faglflexa_gl_items': gl_items_df,
+        'bkpf_doc_header': doc_headers_df,
+        'coep_copa_items': copa_df,
+        'pa0000_employee_actions': employee_actions_df
+    }
+
+def save_run_state(dimensions, run_state, last_date):
+    """Saves what an appended run needs to continue after last_date."""
+    save_state(OUTPUT_DIR, 'ceo', {
+        'end_date': last_date,
+        'dimensions': dimensions,
+        'run_state': run_state,
+        'random_state': random.getstate(),
+        'faker_random_state': fake.random.getstate()
+    })
+
+def generate_ceo_dataset():
+    """Generates all CEO dashboard demo datasets and saves their state for append runs."""
+    random.seed(SEED)
+    fake.seed(SEED)
+    calendar = ceo_calendar()
+    business_days = calendar.business_days
+    run_log.info(f"Generating data for {len(business_days)} business days from {start_date.date()} to {end_date.date()}",
+                 start_date=start_date.date(), end_date=end_date.date(), scale=SCALE, seed=SEED)
+
+    with run_log.stage("Creating master data") as stage:
+        dim_date_df = create_date_dimension(calendar)
+        customers_df = create_customers(scaled(50, SCALE))
+        materials_df = create_materials(scaled(200, SCALE))
+        gl_accounts_df = create_gl_accounts()
+        employees_df = create_employees(scaled(500, SCALE))
+        stage.advance(sum(map(len, (dim_date_df, customers_df, materials_df, gl_accounts_df, employees_df))))
+
+    with run_log.stage("Creating customer sales data") as stage:
+        knvv_df = customers_df.copy()
+        knvv_df['sales_org'] = knvv_df.apply(lambda x: random.choice(['SO01', 'SO02', 'SO03']), axis=1)
+        knvv_df['distribution_channel'] = knvv_df.apply(lambda x: random.choice(['DC01', 'DC02']), axis=1)
+        knvv_df['division'] = knvv_df.apply(lambda x: random.choice(['DIV01', 'DIV02', 'DIV03']), axis=1)
+        knvv_df['customer_classification'] = knvv_df.apply(lambda x: random.choice(['A', 'B', 'C']), axis=1)
+        knvv_df['payment_terms'] = knvv_df.apply(lambda x: random.choice(['NET30', 'NET60', 'COD']), axis=1)
+        knvv_df['sales_rep'] = knvv_df.apply(lambda x: f'REP{random.randint(1001, 1099)}', axis=1)
+        stage.advance(len(knvv_df))
+
+    run_state = {}
+    facts = generate_ceo_facts(business_days, customers_df, materials_df, employees_df, run_state,
+                               start_date, end_date)
+    sales_orders_df, billing_df, gl_items_df = facts['vbap_sales_orders'], facts['vbrp_billing'], facts['faglflexa_gl_items']
+    employee_actions_df = facts['pa0000_employee_actions']
+
+    # Save all datasets
+    datasets = {
+        'dim_date': dim_date_df,
+        'kna1_customers': customers_df,
+        'knvv_customer_sales': knvv_df,
+        'mara_materials': materials_df,
+        'skat_gl_accounts': gl_accounts_df,
+        'pa0001_hr_master': employees_df,
+        **facts
+    }
+
+    with run_log.stage(f"Saving datasets as {OUTPUT_FORMAT} files", total=len(datasets)) as stage, \
+            DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES) as output:
+        for name, df in datasets.items():
+            rows = output.write(df, name)
+            run_log.saved(name, rows, os.path.relpath(output.path(name)))
+            stage.advance(rows, units=1)
+    dimensions = {'customers': customers_df, 'materials': materials_df, 'gl_accounts': gl_accounts_df,
+                  'employees': employees_df}
+    save_run_state(dimensions, run_state, end_date)
+
+    run_log.info(f"\nData generation complete!")
+    run_log.info(f"Date range: {start_date.date()} to {end_date.date()}")
+    run_log.info(f"Business days: {len(business_days)}")
+    run_log.info(f"Total sales orders: {len(sales_orders_df):,}")
+    run_log.info(f"Total billing documents: {len(billing_df):,}")
+    run_log.info(f"Total GL postings: {len(gl_items_df):,}")
+
+    # Quick data quality check
+    run_log.info("\n=== DATA QUALITY SUMMARY ===")
+    run_log.info(f"Revenue total: ${billing_df['net_value'].sum():,.2f}")
+    run_log.info(f"COGS total: ${billing_df['cost_of_goods'].sum():,.2f}")
+    run_log.info(f"Gross margin: {((billing_df['net_value'].sum() - billing_df['cost_of_goods'].sum()) / billing_df['net_value'].sum() * 100):.1f}%")
+    run_log.info(f"Active customers: {customers_df['customer_id'].nunique()}")
+    run_log.info(f"Active materials: {materials_df['material_id'].nunique()}")
+    run_log.info(f"Employee actions: {employee_actions_df['action_type'].value_counts().to_dict()}")
+    run_log.finish()
+
+def append_ceo_dataset(days):
+    """Extends the dataset in OUTPUT_DIR by the given number of days.
+
+    Continues from the state saved by the previous run: master data, document
+    counters, orders still waiting to be billed and random states. Only the
+    new dates are generated and their rows are appended to the existing tables.
+    """
+    state = load_state(OUTPUT_DIR, 'ceo')
+    random.setstate(state['random_state'])
+    fake.random.setstate(state['faker_random_state'])
+    first_date, last_date = append_window(state['end_date'], days)
+    calendar = ceo_calendar(first_date, last_date)
+    new_business_days = calendar.business_days
+    run_log.info(f"Appending data for {len(new_business_days)} business days from {first_date.date()} to {last_date.date()}",
+                 start_date=first_date.date(), end_date=last_date.date(), scale=SCALE)
+    dimensions = state['dimensions']
+    run_state = state['run_state']
+    facts = {}
+    if len(new_business_days):
+        facts = generate_ceo_facts(new_business_days, dimensions['customers'], dimensions['materials'],
+                                   dimensions['employees'], run_state, first_date, last_date)
+    with run_log.stage(f"Appending to {OUTPUT_FORMAT} files", total=len(facts) + 1) as stage, \
+            DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES) as output:
+        stage.advance(output.write(create_date_dimension(calendar), 'dim_date', append=True), units=1)
+        for name, df in facts.items():
+            if len(df):
+                output.write(df, name, append=True)
+            run_log.saved(name, len(df), os.path.relpath(output.path(name)), append=True)
+            stage.advance(len(df), units=1)
+    save_run_state(dimensions, run_state, last_date)
+    run_log.info(f"\nAppended {days} days; the dataset now ends on {last_date.date()}.")
+    run_log.finish()
 
-print("\nSaving datasets to CSV files...")
-for name, df in datasets.items():
-    filename = f'{name}.csv'
-    df.to_csv(filename, index=False)
-    print(f"Saved {filename} - {len(df)} records")
-
-print(f"\nData generation complete!")
-print(f"Date range: {start_date.date()} to {end_date.date()}")
-print(f"Business days: {len(business_days)}")
-print(f"Total sales orders: {len(sales_orders_df):,}")
-print(f"Total billing documents: {len(billing_df):,}")
-print(f"Total GL postings: {len(gl_items_df):,}")
-
-# Quick data quality check
-print("\n=== DATA QUALITY SUMMARY ===")
-print(f"Revenue total: ${billing_df['net_value'].sum():,.2f}")
-print(f"COGS total: ${billing_df['cost_of_goods'].sum():,.2f}")
-print(f"Gross margin: {((billing_df['net_value'].sum() - billing_df['cost_of_goods'].sum()) / billing_df['net_value'].sum() * 100):.1f}%")
-print(f"Active customers: {customers_df['customer_id'].nunique()}")
-print(f"Active materials: {materials_df['material_id'].nunique()}")
-print(f"Employee actions: {employee_actions_df['action_type'].value_counts().to_dict()}")
\ No newline at end of file
+if __name__ == "__main__":
+    if APPEND_DAYS > 0:
+        append_ceo_dataset(APPEND_DAYS)
+    else:
+        generate_ceo_dataset()
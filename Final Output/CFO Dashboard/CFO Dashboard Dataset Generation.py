@@ -1,20 +1,39 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import random
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen.calendar import build_calendar
+from datagen.config import scaled
+from datagen.lazy import lazy_import
+from datagen.output import DatasetOutput
+from datagen.progress import RunLog
+from datagen.state import append_window, load_state, save_state
+
+np = lazy_import("numpy") # Imported on first use, so importing this module stays cheap
+pd = lazy_import("pandas")
 
 # --- Configuration Parameters ---
-START_DATE = datetime(2023, 4, 1)
-END_DATE = datetime(2024, 3, 31)
-OUTPUT_DIR = "Dataset"
+# Settings can be overridden through CFO_* environment variables (see datagen.config)
+START_DATE = datetime.fromisoformat(os.environ.get("CFO_START_DATE", "2023-04-01"))
+END_DATE = datetime.fromisoformat(os.environ.get("CFO_END_DATE", "2024-03-31"))
+FISCAL_YEAR_START_MONTH = 4 # April-March fiscal year (fiscal variant V3)
+HOLIDAYS = None # e.g. "us_federal" (see datagen.calendar) to skip public holidays like weekends
+OUTPUT_DIR = os.environ.get("CFO_OUTPUT_DIR", "Dataset")
+OUTPUT_FORMAT = os.environ.get("CFO_FORMAT", "csv") # csv, parquet or feather (parquet/feather need pyarrow)
+SEED = int(os.environ["CFO_SEED"]) if "CFO_SEED" in os.environ else None # Unseeded unless set
+SCALE = float(os.environ.get("CFO_SCALE", "1")) # Multiplies master-data counts and daily volumes together
+PROFILE = os.environ.get("CFO_PROFILE") # cprofile or pyinstrument: profile every stage into OUTPUT_DIR/_profiles
+APPEND_DAYS = int(os.environ.get("CFO_APPEND_DAYS", "0")) # >0: extend the dataset in OUTPUT_DIR by this many days from its saved state
+PARTITION_BY = None # e.g. ("fiscal_year", "fiscal_period") or ("company_code",) to write fact tables as Hive partitions with a _manifest.json
 
 # Enterprise Size Volumes (Adjust these for different company sizes)
-BASE_GL_POSTINGS_PER_DAY = 200 # Average daily GL postings
-BASE_ASSET_ACQUISITIONS_PER_MONTH = 50 # New assets
-BASE_CUSTOMER_INVOICES_PER_DAY = 100 # New customer invoices
-BASE_VENDOR_INVOICES_PER_DAY = 50 # New vendor invoices
-BASE_MATERIAL_MOVEMENTS_PER_DAY = 150 # Material movements
+BASE_GL_POSTINGS_PER_DAY = 200 * SCALE # Average daily GL postings
+BASE_ASSET_ACQUISITIONS_PER_MONTH = 50 * SCALE # New assets
+BASE_CUSTOMER_INVOICES_PER_DAY = 100 * SCALE # New customer invoices
+BASE_VENDOR_INVOICES_PER_DAY = 50 * SCALE # New vendor invoices
+BASE_MATERIAL_MOVEMENTS_PER_DAY = 150 * SCALE # Material movements
 
 # Financial Ratio Targets (used for guiding data generation)
 TARGET_EBITDA_MARGIN = 0.20 # 20%
@@ -52,16 +71,84 @@ GL_ACCOUNTS = {
     }}
 }
 
+# --- Output Schemas ---
+# Column types for the Parquet/Feather backends (see datagen.output); unlisted columns are inferred
+AMOUNT = "decimal(18,2)"
+OPEN_ITEM_SCHEMA = {
+    "company_code": "code", "line_item": "int32", "posting_date": "date", "document_date": "date",
+    "clearing_date": "date", "amount_in_doc_currency": AMOUNT, "currency": "code",
+    "debit_credit_indicator": "code", "open_item_status": "code", "due_date": "date"
+}
+CLEARING_SCHEMA = {"company_code": "code", "line_item": "int32", "clearing_date": "date", "open_item_status": "code"}
+# Columns of the clearing tables, which record invoices an appended run cleared after earlier runs wrote them as open
+CLEARING_COLUMNS = ["company_code", "document_number", "line_item", "clearing_date", "clearing_document", "open_item_status"]
+TABLE_SCHEMAS = {
+    "faglflexa_gl_items": {
+        "company_code": "code", "gl_account": "code", "posting_date": "date", "item_number": "int32",
+        "amount_local": AMOUNT, "amount_group": AMOUNT, "currency_local": "code", "currency_group": "code",
+        "debit_credit_indicator": "code", "cost_center": "code", "profit_center": "code",
+        "fiscal_year": "int32", "fiscal_period": "int32", "value_date": "date", "reference_document": "string"
+    },
+    "bseg_doc_segment": {
+        "company_code": "code", "fiscal_year": "int32", "line_item": "int32", "gl_account": "code",
+        "amount_in_doc_curr": AMOUNT, "currency": "code", "debit_credit_indicator": "code",
+        "cost_center": "code", "profit_center": "code", "special_gl_indicator": "code", "text": "code"
+    },
+    "anlc_asset_values": {
+        "company_code": "code", "sub_number": "code", "fiscal_year": "int32", "acquisition_value": AMOUNT,
+        "accumulated_depreciation": AMOUNT, "net_book_value": AMOUNT, "currency": "code"
+    },
+    "dfkkop_customer_line_items": dict(OPEN_ITEM_SCHEMA, customer_id="code"),
+    "dfkko_vendor_line_items": dict(OPEN_ITEM_SCHEMA, vendor_id="code"),
+    "dfkkop_customer_clearings": dict(CLEARING_SCHEMA, customer_id="code"),
+    "dfkko_vendor_clearings": dict(CLEARING_SCHEMA, vendor_id="code")
+}
+# Fact tables partitioned when PARTITION_BY is set, with the date column their fiscal keys and manifest ranges come from
+# (bseg_doc_segment takes its keys from the GL lines it is projected from)
+PARTITIONED_TABLES = {
+    "faglflexa_gl_items": "posting_date",
+    "bseg_doc_segment": "posting_date",
+    "dfkkop_customer_line_items": "posting_date",
+    "dfkko_vendor_line_items": "posting_date"
+}
+output = DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES,
+                       fiscal_year_start_month=FISCAL_YEAR_START_MONTH)
+run_log = RunLog("cfo", OUTPUT_DIR, PROFILE)
+
 # --- Helper Functions ---
-def save_dataframe_to_csv(df, filename):
-    """Saves a pandas DataFrame to a CSV file in the specified output directory."""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    df.to_csv(filepath, index=False)
-    print(f"Saved {len(df)} records to {filepath}")
-
-def get_fiscal_period(date, fiscal_year_start_month=4):
+def save_dataframe_to_csv(df, filename, append=False):
+    """
+    Saves a pandas DataFrame to the specified output directory in OUTPUT_FORMAT (CSV by default).
+    Also accepts an iterable of DataFrame chunks, streamed to the file with a single header.
+    With append=True the rows are added to the existing table. Returns the number of records written.
+    """
+    table_name = os.path.splitext(filename)[0]
+    num_records = output.write(df, table_name, append=append)
+    run_log.saved(table_name, num_records, output.path(table_name), append=append)
+    return num_records
+
+def save_gl_line_batches_to_csv(gl_line_batches, first_id=1, append=False, stage=None):
+    """
+    Streams GL line buffer batches into the faglflexa_gl_items and bseg_doc_segment tables.
+    faglflexa ids start at first_id; returns the number of GL lines written.
+    stage, if given, is advanced by the rows of every batch (see datagen.progress).
+    """
+    partition_bseg = output.is_partitioned("bseg_doc_segment")
+    with output.open("faglflexa_gl_items", append=append) as faglflexa_writer, \
+            output.open("bseg_doc_segment", append=append) as bseg_writer:
+        for gl_lines_df in gl_line_batches:
+            faglflexa_writer.write(faglflexa_view(gl_lines_df, first_id=first_id + faglflexa_writer.rows))
+            if partition_bseg:
+                bseg_writer.write(bseg_view(gl_lines_df), keys=gl_lines_df)
+            else:
+                bseg_writer.write(bseg_view(gl_lines_df))
+            if stage is not None:
+                stage.advance(2 * len(gl_lines_df))
+    run_log.saved("faglflexa_gl_items", faglflexa_writer.rows, output.path("faglflexa_gl_items"), append=append)
+    run_log.saved("bseg_doc_segment", bseg_writer.rows, output.path("bseg_doc_segment"), append=append)
+    return faglflexa_writer.rows
+
+def get_fiscal_period(date, fiscal_year_start_month=FISCAL_YEAR_START_MONTH):
     """Determines fiscal year and period based on a given date and fiscal year start month."""
     year = date.year
     month = date.month
@@ -74,6 +161,10 @@ def get_fiscal_period(date, fiscal_year_start_month=4):
     fiscal_quarter = (fiscal_month - 1) // 3 + 1
     return fiscal_year, fiscal_month, fiscal_quarter
 
+def build_company_code_cache(t001_company_codes_df):
+    """Builds the company_code -> {currency, country, fiscal_year_variant} lookup shared by the fact generators."""
+    return t001_company_codes_df.set_index("company_code")[["currency", "country", "fiscal_year_variant"]].to_dict("index")
+
 def get_gl_account_details(gl_account_num):
     """Returns the account group and type for a given GL account number."""
     for group, details in GL_ACCOUNTS.items():
@@ -86,33 +177,13 @@ def get_gl_account_details(gl_account_num):
 
 # --- Data Generation Functions ---
 
-def generate_dim_date(start_date, end_date, fiscal_year_start_month=4):
-    """Generates the dim_date table."""
-    dates = []
-    current_date = start_date
-    while current_date <= end_date:
-        fiscal_year, fiscal_month, fiscal_quarter = get_fiscal_period(current_date, fiscal_year_start_month)
-        
-        dates.append({
-            "date_key": current_date.strftime("%Y-%m-%d"),
-            "year": current_date.year,
-            "quarter": (current_date.month - 1) // 3 + 1,
-            "month": current_date.month,
-            "month_name": current_date.strftime("%B"),
-            "week": current_date.isocalendar()[1],
-            "day_of_week": current_date.weekday() + 1, # Monday is 1, Sunday is 7
-            "day_name": current_date.strftime("%A"),
-            "fiscal_year": fiscal_year,
-            "fiscal_quarter": fiscal_quarter,
-            "fiscal_month": fiscal_month,
-            "is_weekend": current_date.weekday() >= 5, # Saturday (5) or Sunday (6)
-            "is_holiday": False, # For simplicity, no holidays generated
-            "month_start_date": current_date.replace(day=1).strftime("%Y-%m-%d"),
-            "quarter_start_date": (current_date.replace(month=((current_date.month - 1) // 3) * 3 + 1, day=1)).strftime("%Y-%m-%d"),
-            "year_start_date": current_date.replace(month=1, day=1).strftime("%Y-%m-%d")
-        })
-        current_date += timedelta(days=1)
-    return pd.DataFrame(dates)
+def build_cfo_calendar(start_date, end_date):
+    """The shared, memoized calendar of a period (see datagen.calendar)."""
+    return build_calendar(start_date, end_date, FISCAL_YEAR_START_MONTH, HOLIDAYS)
+
+def generate_dim_date(calendar):
+    """Generates the dim_date table, with dates as ISO strings."""
+    return calendar.date_dimension(as_strings=True)
 
 def generate_skat_gl_accounts():
     """Generates the skat_gl_accounts table."""
@@ -132,9 +203,9 @@ def generate_skat_gl_accounts():
 def generate_t001_company_codes():
     """Generates the t001_company_codes table."""
     return pd.DataFrame([
-        {"company_code": "US01", "company_name": "Global Corp US", "country": "USA", "currency": "USD", "chart_of_accounts": "INT"},
-        {"company_code": "DE01", "company_name": "Global Corp DE", "country": "GER", "currency": "EUR", "chart_of_accounts": "INT"},
-        {"company_code": "IN01", "company_name": "Global Corp IN", "country": "IND", "currency": "INR", "chart_of_accounts": "INT"},
+        {"company_code": "US01", "company_name": "Global Corp US", "country": "USA", "currency": "USD", "chart_of_accounts": "INT", "fiscal_year_variant": "V3"},
+        {"company_code": "DE01", "company_name": "Global Corp DE", "country": "GER", "currency": "EUR", "chart_of_accounts": "INT", "fiscal_year_variant": "V3"},
+        {"company_code": "IN01", "company_name": "Global Corp IN", "country": "IND", "currency": "INR", "chart_of_accounts": "INT", "fiscal_year_variant": "V3"}, # V3: April-March
     ])
 
 def generate_cepc_profit_centers(num_profit_centers=20):
@@ -224,17 +295,91 @@ def generate_mbew_material_valuation(num_materials=3000):
     return pd.DataFrame(materials)
 
 
-def generate_faglflexa_and_bseg(dim_date_df, skat_gl_accounts_df, t001_company_codes_df, cepc_profit_centers_df, csks_cost_centers_df, anla_asset_master_df):
+def post_journal_documents(document_numbers, company_codes, currencies, posting_date, fiscal_year, fiscal_period,
+                           debit_accounts, credit_accounts, amounts, cost_centers, profit_centers, texts):
+    """
+    Expands two-line documents into GL line buffer rows.
+    Arguments hold one entry per document (scalars are broadcast). Each document becomes a
+    debit line (item 1, +amount) and a credit line (item 2, -amount), so it balances to zero.
+    """
+    num_docs = len(document_numbers)
+
+    def per_line(values):
+        return np.repeat(np.broadcast_to(values, num_docs), 2)
+
+    def debit_credit_pairs(debit_values, credit_values):
+        return np.column_stack([np.broadcast_to(debit_values, num_docs), np.broadcast_to(credit_values, num_docs)]).ravel()
+
+    amounts = np.asarray(amounts, dtype=float)
+    return pd.DataFrame({
+        "document_number": per_line(document_numbers),
+        "company_code": per_line(company_codes),
+        "posting_date": per_line(posting_date),
+        "fiscal_year": per_line(fiscal_year),
+        "fiscal_period": per_line(fiscal_period),
+        "line_item": np.tile([1, 2], num_docs),
+        "gl_account": debit_credit_pairs(debit_accounts, credit_accounts),
+        "amount": debit_credit_pairs(amounts, -amounts),
+        "currency": per_line(currencies),
+        "debit_credit_indicator": np.tile(["S", "H"], num_docs),
+        "cost_center": per_line(cost_centers),
+        "profit_center": per_line(profit_centers),
+        "text": per_line(texts)
+    })
+
+def bseg_view(gl_lines_df):
+    """Projects the GL line buffer onto the bseg_doc_segment layout."""
+    return pd.DataFrame({
+        "document_number": gl_lines_df["document_number"],
+        "company_code": gl_lines_df["company_code"],
+        "fiscal_year": gl_lines_df["fiscal_year"],
+        "line_item": gl_lines_df["line_item"],
+        "gl_account": gl_lines_df["gl_account"],
+        "amount_in_doc_curr": gl_lines_df["amount"],
+        "currency": gl_lines_df["currency"],
+        "debit_credit_indicator": gl_lines_df["debit_credit_indicator"],
+        "cost_center": gl_lines_df["cost_center"],
+        "profit_center": gl_lines_df["profit_center"],
+        "special_gl_indicator": None,
+        "text": gl_lines_df["text"]
+    })
+
+def faglflexa_view(gl_lines_df, first_id=1):
+    """Projects the GL line buffer onto the faglflexa_gl_items layout."""
+    return pd.DataFrame({
+        "id": np.arange(first_id, first_id + len(gl_lines_df)),
+        "company_code": gl_lines_df["company_code"],
+        "gl_account": gl_lines_df["gl_account"],
+        "posting_date": gl_lines_df["posting_date"],
+        "document_number": gl_lines_df["document_number"],
+        "item_number": gl_lines_df["line_item"],
+        "amount_local": gl_lines_df["amount"],
+        "amount_group": gl_lines_df["amount"],
+        "currency_local": gl_lines_df["currency"],
+        "currency_group": "USD",
+        "debit_credit_indicator": gl_lines_df["debit_credit_indicator"],
+        "cost_center": gl_lines_df["cost_center"],
+        "profit_center": gl_lines_df["profit_center"],
+        "fiscal_year": gl_lines_df["fiscal_year"],
+        "fiscal_period": gl_lines_df["fiscal_period"],
+        "value_date": gl_lines_df["posting_date"],
+        "reference_document": None
+    })
+
+def generate_gl_line_batches(calendar, skat_gl_accounts_df, company_code_cache, cepc_profit_centers_df, csks_cost_centers_df, anla_asset_master_df, run_state):
     """
-    Generates faglflexa_gl_items and bseg_doc_segment tables.
+    Generates the GL line buffer behind faglflexa_gl_items and bseg_doc_segment.
     Focus on creating transactions that broadly support the target ratios.
+    Yields one batch for the opening balances, one per business day and one per
+    depreciation document, so the tables can be streamed to disk.
+    run_state carries the next document number between runs; a full run starts
+    from an empty dict and is the only one that posts opening balances.
     """
-    faglflexa_records = []
-    bseg_records = []
-    
+    appending = "next_document" in run_state
     # Pre-select master data IDs for efficiency
     gl_accounts_df = skat_gl_accounts_df.copy()
-    company_codes = t001_company_codes_df["company_code"].tolist()
+    company_codes = np.array(list(company_code_cache))
+    company_currencies = np.array([company_code_cache[c]["currency"] for c in company_codes])
     profit_centers = cepc_profit_centers_df["profit_center"].tolist()
     cost_centers = csks_cost_centers_df["cost_center"].tolist()
 
@@ -254,266 +399,101 @@ def generate_faglflexa_and_bseg(dim_date_df, skat_gl_accounts_df, t001_company_c
     depreciation_expense_accounts = gl_accounts_df[gl_accounts_df['account_description'].str.contains('Depreciation Expense')]['gl_account'].tolist()
     interest_expense_accounts = gl_accounts_df[gl_accounts_df['account_description'].str.contains('Interest Expense')]['gl_account'].tolist()
     tax_expense_accounts = gl_accounts_df[gl_accounts_df['account_description'].str.contains('Tax Expense')]['gl_account'].tolist()
+    retained_earnings_accounts = gl_accounts_df[gl_accounts_df['account_description'].str.contains('Retained Earnings')]['gl_account'].tolist()
     
-    faglflexa_id_counter = 1
-    bseg_id_counter = 1
-
     # Initial Balance Sheet Entries (before START_DATE)
-    # Simulate opening balances for key balance sheet accounts
-    initial_balance_date = START_DATE - timedelta(days=1)
-    doc_num_prefix = "IB"
-    
-    # Assets (Debits)
-    for i, acc in enumerate(random.sample(cash_accounts, 1) + random.sample(receivable_accounts, 1) + random.sample(inventory_accounts, 1) + random.sample(fixed_asset_gross_accounts, 1)):
-        amount = round(np.random.normal(500000, 100000), 2)
-        if acc in acc_dep_accounts: amount = -amount # Accumulated depreciation has credit balance
-        
-        doc_num = f"{doc_num_prefix}{str(bseg_id_counter).zfill(8)}"
-        bseg_records.append({
-            "document_number": doc_num,
-            "company_code": "US01",
-            "fiscal_year": initial_balance_date.year,
-            "line_item": i + 1,
-            "gl_account": acc,
-            "amount_in_doc_curr": amount,
-            "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == "US01"]['currency'].iloc[0],
-            "debit_credit_indicator": "S" if amount >= 0 else "H",
-            "cost_center": random.choice(cost_centers),
-            "profit_center": random.choice(profit_centers),
-            "special_gl_indicator": None,
-            "text": "Initial Balance"
-        })
-        faglflexa_records.append({
-            "id": faglflexa_id_counter,
-            "company_code": "US01",
-            "gl_account": acc,
-            "posting_date": initial_balance_date.strftime("%Y-%m-%d"),
-            "document_number": doc_num,
-            "item_number": i + 1,
-            "amount_local": amount,
-            "amount_group": amount,
-            "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == "US01"]['currency'].iloc[0],
-            "currency_group": "USD",
-            "debit_credit_indicator": "S" if amount >= 0 else "H",
-            "cost_center": random.choice(cost_centers),
-            "profit_center": random.choice(profit_centers),
-            "fiscal_year": initial_balance_date.year,
-            "fiscal_period": get_fiscal_period(initial_balance_date)[1],
-            "value_date": initial_balance_date.strftime("%Y-%m-%d"),
-            "reference_document": None
-        })
-        faglflexa_id_counter += 1
-        bseg_id_counter += 1
-
-    # Liabilities & Equity (Credits)
-    for i, acc in enumerate(random.sample(payable_accounts, 1) + random.sample(short_term_debt_accounts, 1) + random.sample(long_term_debt_accounts, 1) + random.sample(equity_accounts, 1)):
-        amount = round(np.random.normal(300000, 50000), 2)
-        doc_num = f"{doc_num_prefix}{str(bseg_id_counter).zfill(8)}"
-        bseg_records.append({
-            "document_number": doc_num,
-            "company_code": "US01",
-            "fiscal_year": initial_balance_date.year,
-            "line_item": i + 1,
-            "gl_account": acc,
-            "amount_in_doc_curr": -amount, # Credit balance
-            "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == "US01"]['currency'].iloc[0],
-            "debit_credit_indicator": "H",
-            "cost_center": random.choice(cost_centers),
-            "profit_center": random.choice(profit_centers),
-            "special_gl_indicator": None,
-            "text": "Initial Balance"
-        })
-        faglflexa_records.append({
-            "id": faglflexa_id_counter,
-            "company_code": "US01",
-            "gl_account": acc,
-            "posting_date": initial_balance_date.strftime("%Y-%m-%d"),
-            "document_number": doc_num,
-            "item_number": i + 1,
-            "amount_local": -amount,
-            "amount_group": -amount,
-            "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == "US01"]['currency'].iloc[0],
-            "currency_group": "USD",
-            "debit_credit_indicator": "H",
-            "cost_center": random.choice(cost_centers),
-            "profit_center": random.choice(profit_centers),
-            "fiscal_year": initial_balance_date.year,
-            "fiscal_period": get_fiscal_period(initial_balance_date)[1],
-            "value_date": initial_balance_date.strftime("%Y-%m-%d"),
-            "reference_document": None
-        })
-        faglflexa_id_counter += 1
-        bseg_id_counter += 1
+    # Simulate opening balances for key balance sheet accounts, one two-line document each:
+    # the balance against the opening balance clearing account, so every document nets to zero
+    if not appending:
+        initial_balance_date = START_DATE - timedelta(days=1)
+        clearing_account = retained_earnings_accounts[0] # Opening balance clearing; absorbs the net opening equity
+        opening_equity_accounts = [account for account in equity_accounts if account != clearing_account]
+        asset_accounts = random.sample(cash_accounts, 1) + random.sample(receivable_accounts, 1) + random.sample(inventory_accounts, 1) + random.sample(fixed_asset_gross_accounts, 1)
+        liability_equity_accounts = random.sample(payable_accounts, 1) + random.sample(short_term_debt_accounts, 1) + random.sample(long_term_debt_accounts, 1) + random.sample(opening_equity_accounts, 1)
+        opening_amounts = np.concatenate([
+            np.random.normal(500000, 100000, len(asset_accounts)).round(2), # Assets (Debits)
+            np.random.normal(300000, 50000, len(liability_equity_accounts)).round(2) # Liabilities & Equity (Credits)
+        ])
+        num_opening = len(opening_amounts)
+        is_asset = np.arange(num_opening) < len(asset_accounts)
+        balance_accounts = np.array(asset_accounts + liability_equity_accounts)
+        yield post_journal_documents(
+            [f"IB{str(i).zfill(8)}" for i in range(1, num_opening + 1)],
+            "US01", company_code_cache["US01"]["currency"],
+            initial_balance_date.strftime("%Y-%m-%d"), initial_balance_date.year, get_fiscal_period(initial_balance_date)[1],
+            np.where(is_asset, balance_accounts, clearing_account), np.where(is_asset, clearing_account, balance_accounts),
+            opening_amounts,
+            np.random.choice(cost_centers, num_opening), np.random.choice(profit_centers, num_opening),
+            "Initial Balance"
+        )
+        run_state["next_document"] = num_opening + 1
+    document_counter = run_state["next_document"]
 
     # Main Transactional Data Generation
-    for index, row in dim_date_df.iterrows():
-        current_date = datetime.strptime(row["date_key"], "%Y-%m-%d")
-        if row["is_weekend"]:
-            continue # Skip weekends for most business transactions
+    revenue_debit_accounts = cash_accounts + receivable_accounts
+    expense_credit_accounts = cash_accounts + payable_accounts
+    business_days = calendar.is_business_day # Skip weekends (and holidays) for most business transactions
+    for current_date, date_key, fiscal_year, fiscal_month in zip(
+            calendar.days[business_days].to_pydatetime(), calendar.date_keys(business_days),
+            calendar.fiscal_year[business_days].tolist(), calendar.fiscal_month[business_days].tolist()):
 
         num_postings = int(BASE_GL_POSTINGS_PER_DAY * (1 + 0.2 * np.sin(current_date.month * np.pi / 6))) # Seasonality
         if current_date.day > 25: # End of month push
             num_postings = int(num_postings * 1.2)
 
-        for _ in range(num_postings):
-            company_code = random.choice(company_codes)
-            profit_center = random.choice(profit_centers)
-            cost_center = random.choice(cost_centers)
-            
-            # Simulate a simple double-entry booking
-            doc_num = f"DOC{str(bseg_id_counter).zfill(8)}"
-            
-            # Scenario: Revenue Recognition (Debit Cash/Receivables, Credit Revenue)
-            if random.random() < 0.4: # 40% chance of revenue posting
-                revenue_amount = round(np.random.normal(5000, 1000), 2)
-                debit_account = random.choice(cash_accounts + receivable_accounts)
-                credit_account = random.choice(revenue_accounts)
-
-                # Debit Entry
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": row["fiscal_year"],
-                    "line_item": 1, "gl_account": debit_account, "amount_in_doc_curr": revenue_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "S", "cost_center": cost_center, "profit_center": profit_center,
-                    "special_gl_indicator": None, "text": "Sales Revenue"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": debit_account,
-                    "posting_date": row["date_key"], "document_number": doc_num, "item_number": 1,
-                    "amount_local": revenue_amount, "amount_group": revenue_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "S", "cost_center": cost_center,
-                    "profit_center": profit_center, "fiscal_year": row["fiscal_year"], "fiscal_period": row["fiscal_month"],
-                    "value_date": row["date_key"], "reference_document": None
-                })
-                faglflexa_id_counter += 1
-
-                # Credit Entry
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": row["fiscal_year"],
-                    "line_item": 2, "gl_account": credit_account, "amount_in_doc_curr": -revenue_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "H", "cost_center": cost_center, "profit_center": profit_center,
-                    "special_gl_indicator": None, "text": "Sales Revenue"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": credit_account,
-                    "posting_date": row["date_key"], "document_number": doc_num, "item_number": 2,
-                    "amount_local": -revenue_amount, "amount_group": -revenue_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "H", "cost_center": cost_center,
-                    "profit_center": profit_center, "fiscal_year": row["fiscal_year"], "fiscal_period": row["fiscal_month"],
-                    "value_date": row["date_key"], "reference_document": None
-                })
-                faglflexa_id_counter += 1
-                bseg_id_counter += 1
-
-            # Scenario: Expense Posting (Debit Expense, Credit Cash/Payables)
-            elif random.random() < 0.7: # 30% chance of expense posting
-                expense_amount = round(np.random.normal(1000, 300), 2)
-                debit_account = random.choice(operating_expense_accounts)
-                credit_account = random.choice(cash_accounts + payable_accounts)
-                
-                # Debit Entry
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": row["fiscal_year"],
-                    "line_item": 1, "gl_account": debit_account, "amount_in_doc_curr": expense_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "S", "cost_center": cost_center, "profit_center": profit_center,
-                    "special_gl_indicator": None, "text": "Operating Expense"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": debit_account,
-                    "posting_date": row["date_key"], "document_number": doc_num, "item_number": 1,
-                    "amount_local": expense_amount, "amount_group": expense_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "S", "cost_center": cost_center,
-                    "profit_center": profit_center, "fiscal_year": row["fiscal_year"], "fiscal_period": row["fiscal_month"],
-                    "value_date": row["date_key"], "reference_document": None
-                })
-                faglflexa_id_counter += 1
-
-                # Credit Entry
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": row["fiscal_year"],
-                    "line_item": 2, "gl_account": credit_account, "amount_in_doc_curr": -expense_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "H", "cost_center": cost_center, "profit_center": profit_center,
-                    "special_gl_indicator": None, "text": "Operating Expense"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": credit_account,
-                    "posting_date": row["date_key"], "document_number": doc_num, "item_number": 2,
-                    "amount_local": -expense_amount, "amount_group": -expense_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "H", "cost_center": cost_center,
-                    "profit_center": profit_center, "fiscal_year": row["fiscal_year"], "fiscal_period": row["fiscal_month"],
-                    "value_date": row["date_key"], "reference_document": None
-                })
-                faglflexa_id_counter += 1
-                bseg_id_counter += 1
+        # Scenario per posting: 40% Revenue Recognition (Debit Cash/Receivables, Credit Revenue),
+        # 70% of the rest Expense Posting (Debit Expense, Credit Cash/Payables), otherwise no document
+        is_revenue = np.random.random(num_postings) < 0.4
+        is_expense = ~is_revenue & (np.random.random(num_postings) < 0.7)
+        is_revenue = is_revenue[is_revenue | is_expense]
+        num_docs = len(is_revenue)
+
+        company_idx = np.random.randint(0, len(company_codes), num_docs)
+        amounts = np.where(is_revenue, np.random.normal(5000, 1000, num_docs), np.random.normal(1000, 300, num_docs)).round(2)
+        debit_accounts = np.where(is_revenue, np.random.choice(revenue_debit_accounts, num_docs), np.random.choice(operating_expense_accounts, num_docs))
+        credit_accounts = np.where(is_revenue, np.random.choice(revenue_accounts, num_docs), np.random.choice(expense_credit_accounts, num_docs))
+
+        yield post_journal_documents(
+            [f"DOC{str(i).zfill(8)}" for i in range(document_counter, document_counter + num_docs)],
+            company_codes[company_idx], company_currencies[company_idx],
+            date_key, fiscal_year, fiscal_month,
+            debit_accounts, credit_accounts, amounts,
+            np.random.choice(cost_centers, num_docs), np.random.choice(profit_centers, num_docs),
+            np.where(is_revenue, "Sales Revenue", "Operating Expense")
+        )
+        document_counter += num_docs
 
     # Add monthly depreciation postings
+    capitalization_dates = pd.to_datetime(anla_asset_master_df['capitalization_date'])
+    deactivation_dates = pd.to_datetime(anla_asset_master_df['deactivation_date'])
+    if appending: # Appended runs post on every 28th inside their window
+        dep_dates = list(calendar.days[calendar.day == 28].to_pydatetime())
+    else:
+        dep_dates = [(START_DATE + timedelta(days=30 * month_offset)).replace(day=28) # End of month
+                     for month_offset in range(0, (END_DATE.year - START_DATE.year) * 12 + END_DATE.month - START_DATE.month + 1)]
     for company_code in company_codes:
-        for month_offset in range(0, (END_DATE.year - START_DATE.year) * 12 + END_DATE.month - START_DATE.month + 1):
-            dep_date = (START_DATE + timedelta(days=30 * month_offset)).replace(day=28) # End of month
+        for dep_date in dep_dates:
             
             # Get assets active in this period
-            active_assets = anla_asset_master_df[
+            active_assets = (
                 (anla_asset_master_df['company_code'] == company_code) &
-                (pd.to_datetime(anla_asset_master_df['capitalization_date']) <= dep_date) &
-                ((pd.to_datetime(anla_asset_master_df['deactivation_date']).isna()) | 
-                 (pd.to_datetime(anla_asset_master_df['deactivation_date']) >= dep_date))
-            ]
+                (capitalization_dates <= dep_date) &
+                (deactivation_dates.isna() | (deactivation_dates >= dep_date))
+            )
             
-            if not active_assets.empty:
-                total_asset_value = active_assets['asset_number'].count() * 50000 # Avg asset value for depreciation calc
+            if active_assets.any():
+                total_asset_value = active_assets.sum() * 50000 # Avg asset value for depreciation calc
                 monthly_depreciation_amount = round(total_asset_value * 0.10 / 12, 2) # 10% annual depreciation
                 
-                doc_num = f"DEP{str(bseg_id_counter).zfill(8)}"
-                
-                # Debit Depreciation Expense
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": dep_date.year,
-                    "line_item": 1, "gl_account": random.choice(depreciation_expense_accounts), "amount_in_doc_curr": monthly_depreciation_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "S", "cost_center": random.choice(cost_centers), "profit_center": random.choice(profit_centers),
-                    "special_gl_indicator": None, "text": "Monthly Depreciation"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": random.choice(depreciation_expense_accounts),
-                    "posting_date": dep_date.strftime("%Y-%m-%d"), "document_number": doc_num, "item_number": 1,
-                    "amount_local": monthly_depreciation_amount, "amount_group": monthly_depreciation_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "S", "cost_center": random.choice(cost_centers),
-                    "profit_center": random.choice(profit_centers), "fiscal_year": dep_date.year, "fiscal_period": get_fiscal_period(dep_date)[1],
-                    "value_date": dep_date.strftime("%Y-%m-%d"), "reference_document": None
-                })
-                faglflexa_id_counter += 1
-
-                # Credit Accumulated Depreciation
-                bseg_records.append({
-                    "document_number": doc_num, "company_code": company_code, "fiscal_year": dep_date.year,
-                    "line_item": 2, "gl_account": random.choice(acc_dep_accounts), "amount_in_doc_curr": -monthly_depreciation_amount,
-                    "currency": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "debit_credit_indicator": "H", "cost_center": random.choice(cost_centers), "profit_center": random.choice(profit_centers),
-                    "special_gl_indicator": None, "text": "Monthly Depreciation"
-                })
-                faglflexa_records.append({
-                    "id": faglflexa_id_counter, "company_code": company_code, "gl_account": random.choice(acc_dep_accounts),
-                    "posting_date": dep_date.strftime("%Y-%m-%d"), "document_number": doc_num, "item_number": 2,
-                    "amount_local": -monthly_depreciation_amount, "amount_group": -monthly_depreciation_amount,
-                    "currency_local": t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0],
-                    "currency_group": "USD", "debit_credit_indicator": "H", "cost_center": random.choice(cost_centers),
-                    "profit_center": random.choice(profit_centers), "fiscal_year": dep_date.year, "fiscal_period": get_fiscal_period(dep_date)[1],
-                    "value_date": dep_date.strftime("%Y-%m-%d"), "reference_document": None
-                })
-                faglflexa_id_counter += 1
-                bseg_id_counter += 1
-
-    faglflexa_df = pd.DataFrame(faglflexa_records)
-    bseg_df = pd.DataFrame(bseg_records)
-    return faglflexa_df, bseg_df
+                # Debit Depreciation Expense, Credit Accumulated Depreciation
+                yield post_journal_documents(
+                    [f"DEP{str(document_counter).zfill(8)}"], company_code, company_code_cache[company_code]["currency"],
+                    dep_date.strftime("%Y-%m-%d"), dep_date.year, get_fiscal_period(dep_date)[1],
+                    random.choice(depreciation_expense_accounts), random.choice(acc_dep_accounts), [monthly_depreciation_amount],
+                    random.choice(cost_centers), random.choice(profit_centers), "Monthly Depreciation"
+                )
+                document_counter += 1
+    run_state["next_document"] = document_counter
 
 def generate_anlc_asset_values(anla_asset_master_df, dim_date_df):
     """Generates the anlc_asset_values table based on asset master data."""
@@ -572,19 +552,70 @@ def generate_anlc_asset_values(anla_asset_master_df, dim_date_df):
             })
     return pd.DataFrame(anlc_records)
 
-def generate_dfkkop_customer_line_items(dim_date_df, t001_company_codes_df):
-    """Generates dfkkop_customer_line_items table."""
+def clearing_line_item(invoice, partner_column, payment_date, clearing_document):
+    """Payment line clearing an invoice line, with the opposite sign and debit/credit indicator."""
+    payment_day = payment_date.strftime("%Y-%m-%d")
+    return {
+        partner_column: invoice[partner_column],
+        "company_code": invoice["company_code"],
+        "document_number": clearing_document,
+        "line_item": 1,
+        "posting_date": payment_day,
+        "document_date": payment_day,
+        "clearing_date": payment_day,
+        "amount_in_doc_currency": -invoice["amount_in_doc_currency"],
+        "currency": invoice["currency"],
+        "debit_credit_indicator": "H" if invoice["debit_credit_indicator"] == "S" else "S",
+        "clearing_document": invoice["document_number"], # Links to the invoice
+        "open_item_status": "Cleared",
+        "due_date": None
+    }
+
+def post_pending_payments(run_state, period_end, prefix, partner_column, records, clearings, doc_num_counter):
+    """
+    Posts the payments an earlier run deferred past its last date once they fall
+    on or before period_end. The invoices they pay were written as open, so each
+    payment also adds the invoice's new clearing fields to clearings (the rows of
+    the clearing table). Returns the next document number.
+    """
+    still_pending = []
+    for invoice, payment_date in run_state.get("pending_payments", []):
+        if payment_date <= period_end:
+            clearing_line = clearing_line_item(invoice, partner_column, payment_date, f"{prefix}{str(doc_num_counter).zfill(8)}")
+            records.append(clearing_line)
+            clearings.append({
+                partner_column: invoice[partner_column],
+                "company_code": invoice["company_code"],
+                "document_number": invoice["document_number"],
+                "line_item": invoice["line_item"],
+                "clearing_date": clearing_line["clearing_date"],
+                "clearing_document": clearing_line["document_number"],
+                "open_item_status": "Cleared"
+            })
+            doc_num_counter += 1
+        else:
+            still_pending.append((invoice, payment_date))
+    run_state["pending_payments"] = still_pending
+    return doc_num_counter
+
+def generate_dfkkop_customer_line_items(calendar, company_code_cache, run_state):
+    """
+    Generates dfkkop_customer_line_items table, and the dfkkop_customer_clearings
+    rows for invoices earlier runs wrote as open that this one clears.
+    run_state carries the document counter and the payments dated after the
+    last date, which an appended run posts once their date is reached.
+    """
     dfkkop_records = []
     customer_id_counter = 1
-    doc_num_counter = 1
-    
-    company_codes = t001_company_codes_df["company_code"].tolist()
+    period_end = calendar.days[-1].to_pydatetime()
+    clearings = []
+    doc_num_counter = post_pending_payments(run_state, period_end, "CLR", "customer_id", dfkkop_records, clearings,
+                                            run_state.get("next_document", 1))
 
-    for index, row in dim_date_df.iterrows():
-        current_date = datetime.strptime(row["date_key"], "%Y-%m-%d")
-        if row["is_weekend"]:
-            continue
+    company_codes = list(company_code_cache)
 
+    business_days = calendar.is_business_day
+    for current_date, date_key in zip(calendar.days[business_days].to_pydatetime(), calendar.date_keys(business_days)):
         num_invoices = int(BASE_CUSTOMER_INVOICES_PER_DAY * (1 + 0.1 * np.sin(current_date.month * np.pi / 6)))
         for _ in range(num_invoices):
             company_code = random.choice(company_codes)
@@ -592,16 +623,16 @@ def generate_dfkkop_customer_line_items(dim_date_df, t001_company_codes_df):
             document_number = f"INV{str(doc_num_counter).zfill(8)}"
             
             amount = round(np.random.normal(1500, 500), 2)
-            currency = t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0]
+            currency = company_code_cache[company_code]["currency"]
             
             # Invoice (Debit)
-            dfkkop_records.append({
+            invoice = {
                 "customer_id": customer_id,
                 "company_code": company_code,
                 "document_number": document_number,
                 "line_item": 1,
-                "posting_date": row["date_key"],
-                "document_date": row["date_key"],
+                "posting_date": date_key,
+                "document_date": date_key,
                 "clearing_date": None, # Will be filled by payments
                 "amount_in_doc_currency": amount,
                 "currency": currency,
@@ -609,53 +640,43 @@ def generate_dfkkop_customer_line_items(dim_date_df, t001_company_codes_df):
                 "clearing_document": None,
                 "open_item_status": "Open",
                 "due_date": (current_date + timedelta(days=TARGET_DSO_DAYS + random.randint(-5, 10))).strftime("%Y-%m-%d")
-            })
+            }
+            dfkkop_records.append(invoice)
             doc_num_counter += 1
 
             # Simulate payments for some invoices (clearing them)
             if random.random() < 0.7: # 70% of invoices get paid
                 payment_date = current_date + timedelta(days=random.randint(5, TARGET_DSO_DAYS + 10))
-                if payment_date <= END_DATE:
+                if payment_date <= period_end:
                     clearing_doc_num = f"CLR{str(doc_num_counter).zfill(8)}"
-                    dfkkop_records.append({
-                        "customer_id": customer_id,
-                        "company_code": company_code,
-                        "document_number": clearing_doc_num,
-                        "line_item": 1,
-                        "posting_date": payment_date.strftime("%Y-%m-%d"),
-                        "document_date": payment_date.strftime("%Y-%m-%d"),
-                        "clearing_date": payment_date.strftime("%Y-%m-%d"),
-                        "amount_in_doc_currency": -amount, # Credit for payment
-                        "currency": currency,
-                        "debit_credit_indicator": "H", # Credit
-                        "clearing_document": document_number, # Links to the invoice
-                        "open_item_status": "Cleared",
-                        "due_date": None
-                    })
+                    dfkkop_records.append(clearing_line_item(invoice, "customer_id", payment_date, clearing_doc_num)) # Credit for payment
                     # Update the original invoice to 'Cleared'
-                    for rec in dfkkop_records:
-                        if rec["document_number"] == document_number and rec["company_code"] == company_code:
-                            rec["clearing_date"] = payment_date.strftime("%Y-%m-%d")
-                            rec["clearing_document"] = clearing_doc_num
-                            rec["open_item_status"] = "Cleared"
-                            break
+                    invoice["clearing_date"] = payment_date.strftime("%Y-%m-%d")
+                    invoice["clearing_document"] = clearing_doc_num
+                    invoice["open_item_status"] = "Cleared"
                     doc_num_counter += 1
-    
-    return pd.DataFrame(dfkkop_records)
+                else:
+                    run_state["pending_payments"].append((invoice, payment_date))
+
+    run_state["next_document"] = doc_num_counter
+    return pd.DataFrame(dfkkop_records), pd.DataFrame(clearings, columns=["customer_id"] + CLEARING_COLUMNS)
 
-def generate_dfkko_vendor_line_items(dim_date_df, t001_company_codes_df):
-    """Generates dfkko_vendor_line_items table."""
+def generate_dfkko_vendor_line_items(calendar, company_code_cache, run_state):
+    """
+    Generates dfkko_vendor_line_items table and its dfkko_vendor_clearings rows.
+    run_state carries the document counter and pending payments, as for dfkkop.
+    """
     dfkko_records = []
     vendor_id_counter = 1
-    doc_num_counter = 1
+    period_end = calendar.days[-1].to_pydatetime()
+    clearings = []
+    doc_num_counter = post_pending_payments(run_state, period_end, "VPAY", "vendor_id", dfkko_records, clearings,
+                                            run_state.get("next_document", 1))
 
-    company_codes = t001_company_codes_df["company_code"].tolist()
-
-    for index, row in dim_date_df.iterrows():
-        current_date = datetime.strptime(row["date_key"], "%Y-%m-%d")
-        if row["is_weekend"]:
-            continue
+    company_codes = list(company_code_cache)
 
+    business_days = calendar.is_business_day
+    for current_date, date_key in zip(calendar.days[business_days].to_pydatetime(), calendar.date_keys(business_days)):
         num_invoices = int(BASE_VENDOR_INVOICES_PER_DAY * (1 + 0.1 * np.sin(current_date.month * np.pi / 6)))
         for _ in range(num_invoices):
             company_code = random.choice(company_codes)
@@ -663,16 +684,16 @@ def generate_dfkko_vendor_line_items(dim_date_df, t001_company_codes_df):
             document_number = f"POINV{str(doc_num_counter).zfill(8)}"
             
             amount = round(np.random.normal(800, 300), 2)
-            currency = t001_company_codes_df[t001_company_codes_df['company_code'] == company_code]['currency'].iloc[0]
+            currency = company_code_cache[company_code]["currency"]
 
             # Invoice (Credit)
-            dfkko_records.append({
+            invoice = {
                 "vendor_id": vendor_id,
                 "company_code": company_code,
                 "document_number": document_number,
                 "line_item": 1,
-                "posting_date": row["date_key"],
-                "document_date": row["date_key"],
+                "posting_date": date_key,
+                "document_date": date_key,
                 "clearing_date": None, # Will be filled by payments
                 "amount_in_doc_currency": -amount, # Credit for vendor invoice
                 "currency": currency,
@@ -680,88 +701,163 @@ def generate_dfkko_vendor_line_items(dim_date_df, t001_company_codes_df):
                 "clearing_document": None,
                 "open_item_status": "Open",
                 "due_date": (current_date + timedelta(days=TARGET_DPO_DAYS + random.randint(-5, 10))).strftime("%Y-%m-%d")
-            })
+            }
+            dfkko_records.append(invoice)
             doc_num_counter += 1
 
             # Simulate payments for some invoices
             if random.random() < 0.8: # 80% of vendor invoices get paid
                 payment_date = current_date + timedelta(days=random.randint(5, TARGET_DPO_DAYS + 10))
-                if payment_date <= END_DATE:
+                if payment_date <= period_end:
                     clearing_doc_num = f"VPAY{str(doc_num_counter).zfill(8)}"
-                    dfkko_records.append({
-                        "vendor_id": vendor_id,
-                        "company_code": company_code,
-                        "document_number": clearing_doc_num,
-                        "line_item": 1,
-                        "posting_date": payment_date.strftime("%Y-%m-%d"),
-                        "document_date": payment_date.strftime("%Y-%m-%d"),
-                        "clearing_date": payment_date.strftime("%Y-%m-%d"),
-                        "amount_in_doc_currency": amount, # Debit for payment
-                        "currency": currency,
-                        "debit_credit_indicator": "S", # Debit
-                        "clearing_document": document_number, # Links to the invoice
-                        "open_item_status": "Cleared",
-                        "due_date": None
-                    })
+                    dfkko_records.append(clearing_line_item(invoice, "vendor_id", payment_date, clearing_doc_num)) # Debit for payment
                     # Update the original invoice to 'Cleared'
-                    for rec in dfkko_records:
-                        if rec["document_number"] == document_number and rec["company_code"] == company_code:
-                            rec["clearing_date"] = payment_date.strftime("%Y-%m-%d")
-                            rec["clearing_document"] = clearing_doc_num
-                            rec["open_item_status"] = "Cleared"
-                            break
+                    invoice["clearing_date"] = payment_date.strftime("%Y-%m-%d")
+                    invoice["clearing_document"] = clearing_doc_num
+                    invoice["open_item_status"] = "Cleared"
                     doc_num_counter += 1
-    return pd.DataFrame(dfkko_records)
-
+                else:
+                    run_state["pending_payments"].append((invoice, payment_date))
+    run_state["next_document"] = doc_num_counter
+    return pd.DataFrame(dfkko_records), pd.DataFrame(clearings, columns=["vendor_id"] + CLEARING_COLUMNS)
+
+
+def save_run_state(dimensions, run_state, end_date):
+    """Saves what an appended run needs to continue after end_date."""
+    save_state(OUTPUT_DIR, "cfo", {
+        "end_date": end_date,
+        "dimensions": dimensions,
+        "run_state": run_state,
+        "random_state": random.getstate(),
+        "numpy_random_state": np.random.get_state(),
+    })
 
 def generate_cfo_dataset():
-    """Generates all CFO dashboard demo datasets."""
+    """Generates all CFO dashboard demo datasets and saves their state for append runs."""
     
-    print("Starting CFO Demo Data Generation...")
+    run_log.info("Starting CFO Demo Data Generation...", start_date=START_DATE.date(), end_date=END_DATE.date(),
+                 scale=SCALE, seed=SEED)
+    if SEED is not None:
+        # The fact loops stay serial on these global streams (not month shards): payments are
+        # deferred from one day to a later one (post_pending_payments) and GL document numbers
+        # run on from batch to batch
+        random.seed(SEED)
+        np.random.seed(SEED)
     
     # 1. Dimension Tables
-    dim_date_df = generate_dim_date(START_DATE, END_DATE)
-    save_dataframe_to_csv(dim_date_df, "dim_date.csv")
+    with run_log.stage("Generating dimension tables") as stage:
+        calendar = build_cfo_calendar(START_DATE, END_DATE)
+        dim_date_df = generate_dim_date(calendar)
+        stage.advance(save_dataframe_to_csv(dim_date_df, "dim_date.csv"))
 
-    skat_gl_accounts_df = generate_skat_gl_accounts()
-    save_dataframe_to_csv(skat_gl_accounts_df, "skat_gl_accounts.csv")
+        skat_gl_accounts_df = generate_skat_gl_accounts()
+        stage.advance(save_dataframe_to_csv(skat_gl_accounts_df, "skat_gl_accounts.csv"))
 
-    t001_company_codes_df = generate_t001_company_codes()
-    save_dataframe_to_csv(t001_company_codes_df, "t001_company_codes.csv")
+        t001_company_codes_df = generate_t001_company_codes()
+        stage.advance(save_dataframe_to_csv(t001_company_codes_df, "t001_company_codes.csv"))
+        company_code_cache = build_company_code_cache(t001_company_codes_df)
 
-    cepc_profit_centers_df = generate_cepc_profit_centers()
-    save_dataframe_to_csv(cepc_profit_centers_df, "cepc_profit_centers.csv")
+        cepc_profit_centers_df = generate_cepc_profit_centers(scaled(20, SCALE))
+        stage.advance(save_dataframe_to_csv(cepc_profit_centers_df, "cepc_profit_centers.csv"))
 
-    csks_cost_centers_df = generate_csks_cost_centers()
-    save_dataframe_to_csv(csks_cost_centers_df, "csks_cost_centers.csv")
+        csks_cost_centers_df = generate_csks_cost_centers(scaled(30, SCALE))
+        stage.advance(save_dataframe_to_csv(csks_cost_centers_df, "csks_cost_centers.csv"))
 
-    anla_asset_master_df = generate_anla_asset_master()
-    save_dataframe_to_csv(anla_asset_master_df, "anla_asset_master.csv")
+        anla_asset_master_df = generate_anla_asset_master(scaled(2000, SCALE))
+        stage.advance(save_dataframe_to_csv(anla_asset_master_df, "anla_asset_master.csv"))
 
-    mbew_material_valuation_df = generate_mbew_material_valuation()
-    save_dataframe_to_csv(mbew_material_valuation_df, "mbew_material_valuation.csv")
+        mbew_material_valuation_df = generate_mbew_material_valuation(scaled(3000, SCALE))
+        stage.advance(save_dataframe_to_csv(mbew_material_valuation_df, "mbew_material_valuation.csv"))
 
     # 2. Fact Tables (Interdependent generation)
-    # GL Items and Document Segments
-    faglflexa_gl_items_df, bseg_doc_segment_df = generate_faglflexa_and_bseg(
-        dim_date_df, skat_gl_accounts_df, t001_company_codes_df, cepc_profit_centers_df, csks_cost_centers_df, anla_asset_master_df
-    )
-    save_dataframe_to_csv(faglflexa_gl_items_df, "faglflexa_gl_items.csv")
-    save_dataframe_to_csv(bseg_doc_segment_df, "bseg_doc_segment.csv")
+    # GL Items and Document Segments, streamed batch by batch
+    run_state = {"gl": {}, "customer_items": {}, "vendor_items": {}}
+    with run_log.stage("Generating GL line items and document segments") as stage:
+        gl_line_batches = generate_gl_line_batches(
+            calendar, skat_gl_accounts_df, company_code_cache, cepc_profit_centers_df, csks_cost_centers_df, anla_asset_master_df,
+            run_state["gl"]
+        )
+        run_state["gl"]["lines"] = save_gl_line_batches_to_csv(gl_line_batches, stage=stage)
 
     # Asset Values
-    anlc_asset_values_df = generate_anlc_asset_values(anla_asset_master_df, dim_date_df)
-    save_dataframe_to_csv(anlc_asset_values_df, "anlc_asset_values.csv")
+    with run_log.stage("Generating asset values") as stage:
+        anlc_asset_values_df = generate_anlc_asset_values(anla_asset_master_df, dim_date_df)
+        stage.advance(save_dataframe_to_csv(anlc_asset_values_df, "anlc_asset_values.csv"))
 
     # Customer Line Items
-    dfkkop_customer_line_items_df = generate_dfkkop_customer_line_items(dim_date_df, t001_company_codes_df)
-    save_dataframe_to_csv(dfkkop_customer_line_items_df, "dfkkop_customer_line_items.csv")
+    with run_log.stage("Generating customer line items") as stage:
+        dfkkop_customer_line_items_df, dfkkop_customer_clearings_df = generate_dfkkop_customer_line_items(
+            calendar, company_code_cache, run_state["customer_items"])
+        stage.advance(save_dataframe_to_csv(dfkkop_customer_line_items_df, "dfkkop_customer_line_items.csv"))
+        stage.advance(save_dataframe_to_csv(dfkkop_customer_clearings_df, "dfkkop_customer_clearings.csv")) # Empty until an append run
 
     # Vendor Line Items
-    dfkko_vendor_line_items_df = generate_dfkko_vendor_line_items(dim_date_df, t001_company_codes_df)
-    save_dataframe_to_csv(dfkko_vendor_line_items_df, "dfkko_vendor_line_items.csv")
-
-    print("\nCFO Demo Data Generation Completed!")
+    with run_log.stage("Generating vendor line items") as stage:
+        dfkko_vendor_line_items_df, dfkko_vendor_clearings_df = generate_dfkko_vendor_line_items(
+            calendar, company_code_cache, run_state["vendor_items"])
+        stage.advance(save_dataframe_to_csv(dfkko_vendor_line_items_df, "dfkko_vendor_line_items.csv"))
+        stage.advance(save_dataframe_to_csv(dfkko_vendor_clearings_df, "dfkko_vendor_clearings.csv"))
+    output.close()
+    dimensions = {
+        "skat_gl_accounts": skat_gl_accounts_df, "company_code_cache": company_code_cache,
+        "cepc_profit_centers": cepc_profit_centers_df, "csks_cost_centers": csks_cost_centers_df,
+        "anla_asset_master": anla_asset_master_df
+    }
+    save_run_state(dimensions, run_state, END_DATE)
+
+    run_log.info("\nCFO Demo Data Generation Completed!")
+    run_log.finish()
+
+def append_cfo_dataset(days):
+    """
+    Extends the dataset in OUTPUT_DIR by the given number of days.
+    Continues from the state saved by the previous run (master data, document
+    counters, deferred payments and random states) and appends the new dates'
+    rows to dim_date and the fact tables. Master data and anlc_asset_values are
+    left as they are. Invoices written as open that the new dates' payments
+    clear get a row in the clearing tables rather than being rewritten.
+    """
+    state = load_state(OUTPUT_DIR, "cfo")
+    random.setstate(state["random_state"])
+    np.random.set_state(state["numpy_random_state"])
+    first_date, last_date = append_window(state["end_date"], days)
+    run_log.info(f"Appending CFO demo data from {first_date.date()} to {last_date.date()}",
+                 start_date=first_date.date(), end_date=last_date.date(), scale=SCALE)
+    dimensions = state["dimensions"]
+    run_state = state["run_state"]
+    company_code_cache = dimensions["company_code_cache"]
+
+    calendar = build_cfo_calendar(first_date, last_date)
+    save_dataframe_to_csv(generate_dim_date(calendar), "dim_date.csv", append=True)
+
+    with run_log.stage("Generating GL line items and document segments") as stage:
+        gl_line_batches = generate_gl_line_batches(
+            calendar, dimensions["skat_gl_accounts"], company_code_cache, dimensions["cepc_profit_centers"],
+            dimensions["csks_cost_centers"], dimensions["anla_asset_master"], run_state["gl"]
+        )
+        run_state["gl"]["lines"] += save_gl_line_batches_to_csv(gl_line_batches, first_id=run_state["gl"]["lines"] + 1,
+                                                                append=True, stage=stage)
+
+    for generate_line_items, table_name, clearing_table_name, items_state, stage_name in [
+        (generate_dfkkop_customer_line_items, "dfkkop_customer_line_items", "dfkkop_customer_clearings",
+         run_state["customer_items"], "Generating customer line items"),
+        (generate_dfkko_vendor_line_items, "dfkko_vendor_line_items", "dfkko_vendor_clearings",
+         run_state["vendor_items"], "Generating vendor line items")
+    ]:
+        with run_log.stage(stage_name) as stage:
+            line_items_df, clearings_df = generate_line_items(calendar, company_code_cache, items_state)
+            if len(line_items_df):
+                stage.advance(save_dataframe_to_csv(line_items_df, f"{table_name}.csv", append=True))
+            if len(clearings_df):
+                stage.advance(save_dataframe_to_csv(clearings_df, f"{clearing_table_name}.csv", append=True))
+    output.close()
+    save_run_state(dimensions, run_state, last_date)
+
+    run_log.info(f"\nAppended {days} days; the dataset now ends on {last_date.date()}.")
+    run_log.finish()
 
 if __name__ == "__main__":
-    generate_cfo_dataset()
\ No newline at end of file
+    if APPEND_DAYS > 0:
+        append_cfo_dataset(APPEND_DAYS)
+    else:
+        generate_cfo_dataset()
\ No newline at end of file
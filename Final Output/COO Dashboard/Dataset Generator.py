@@ -1,28 +1,49 @@
-import pandas as pd
-import numpy as np
-from faker import Faker
 import datetime
 from datetime import timedelta
 import os
 import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen.calendar import build_calendar
+from datagen.config import scaled
+from datagen.lazy import LazyFaker, lazy_import
+from datagen.output import DatasetOutput
+from datagen.pools import FakerPools, hex_codes
+from datagen.progress import RunLog
+from datagen.sharding import month_shard_bounds, run_shards, shard_random
+from datagen.state import append_window, continued_seed, load_state, save_state
+
+np = lazy_import('numpy') # Imported on first use, so importing this module stays cheap
+pd = lazy_import('pandas')
 
 # --- Configuration ---
-START_DATE = datetime.date(2023, 4, 1) # April 1, 2023
-END_DATE = datetime.date(2025, 3, 31)   # March 31, 2025 (2 years of data)
-OUTPUT_DIR = "cfo_demo_data"
+# Settings can be overridden through COO_* environment variables (see datagen.config)
+START_DATE = datetime.date.fromisoformat(os.environ.get("COO_START_DATE", "2023-04-01")) # April 1, 2023
+END_DATE = datetime.date.fromisoformat(os.environ.get("COO_END_DATE", "2025-03-31"))   # March 31, 2025 (2 years of data)
+FISCAL_YEAR_START_MONTH = 4 # April-March fiscal year
+HOLIDAYS = None # e.g. 'us_federal' (see datagen.calendar) to give public holidays weekend volumes
+OUTPUT_DIR = os.environ.get("COO_OUTPUT_DIR", "cfo_demo_data")
+OUTPUT_FORMAT = os.environ.get("COO_FORMAT", "csv") # csv, parquet or feather (parquet/feather need pyarrow)
+PARTITION_BY = None # e.g. ('fiscal_year', 'fiscal_period') or ('company_code',) to write fact tables as Hive partitions with a _manifest.json
+SEED = int(os.environ.get("COO_SEED", "42")) # Root seed; every month shard draws from its own stream spawned from it
+SCALE = float(os.environ.get("COO_SCALE", "1")) # Multiplies master-data counts and daily volumes together
+NUM_WORKERS = int(os.environ.get("COO_WORKERS", "1")) # Processes for the sharded fact loops; output is identical for any value
+PROFILE = os.environ.get("COO_PROFILE") # cprofile or pyinstrument: profile every stage into OUTPUT_DIR/_profiles
+APPEND_DAYS = int(os.environ.get("COO_APPEND_DAYS", "0")) # >0: extend the dataset in OUTPUT_DIR by this many days from its saved state
 NUM_COMPANIES = 3 # Enterprise size: 3-5 companies
 NUM_GL_ACCOUNTS = 700 # Enterprise size: 500-1000 accounts
-NUM_PROFIT_CENTERS = 70 # Enterprise size: 50-100
-NUM_COST_CENTERS = 150 # Enterprise size: 100-200
-NUM_ASSETS = 3000 # Enterprise size: 2k-5k assets
-NUM_MATERIALS = 1000 # Enterprise size: 500-1500 materials
-NUM_CUSTOMERS = 7000 # Enterprise size: 5k-10k customers
-NUM_VENDORS = 1500 # Enterprise size: 1k-2k vendors
+NUM_PROFIT_CENTERS = scaled(70, SCALE) # Enterprise size: 50-100
+NUM_COST_CENTERS = scaled(150, SCALE) # Enterprise size: 100-200
+NUM_ASSETS = scaled(3000, SCALE) # Enterprise size: 2k-5k assets
+NUM_MATERIALS = scaled(1000, SCALE) # Enterprise size: 500-1500 materials
+NUM_CUSTOMERS = scaled(7000, SCALE) # Enterprise size: 5k-10k customers
+NUM_VENDORS = scaled(1500, SCALE) # Enterprise size: 1k-2k vendors
 # Average daily transaction volumes for Enterprise scale (adjusted to hit targets)
-AVG_DAILY_GL_POSTINGS = 200 # Roughly 5k-10k per month per company
-AVG_DAILY_INVENTORY_MOVEMENTS = 80
-AVG_DAILY_AR_ITEMS = 30
-AVG_DAILY_AP_ITEMS = 20
+AVG_DAILY_GL_POSTINGS = 200 * SCALE # Roughly 5k-10k per month per company
+AVG_DAILY_INVENTORY_MOVEMENTS = 80 * SCALE
+AVG_DAILY_AR_ITEMS = 30 * SCALE
+AVG_DAILY_AP_ITEMS = 20 * SCALE
 # KPI Target Ranges (approximate, generation aims for these)
 TARGET_REVENUE_GROWTH_YOY = (0.08, 0.12) # 8-12%
 TARGET_EBITDA_MARGIN = (0.18, 0.25)    # 18-25%
@@ -37,54 +58,82 @@ TARGET_DSCR = (1.5, 2.5) # >1.5
 TARGET_ROA = (0.06, 0.10)              # 6-10%
 TARGET_INVENTORY_TURNOVER = (4.0, 6.0) # Times per year
 TARGET_QUICK_RATIO = (0.9, 1.2)
-# --- Faker Initialization ---
-fake = Faker('en_US') # Use US locale for realistic names/addresses
+# --- Output Schemas ---
+# Column types for the Parquet/Feather backends (see datagen.output); unlisted columns are inferred
+AMOUNT = 'decimal(18,2)'
+OPEN_ITEM_SCHEMA = {
+    'company_code': 'code', 'fiscal_year': 'int32', 'line_item': 'int32', 'posting_date': 'date',
+    'clearing_date': 'date', 'due_date': 'date', 'amount_local': AMOUNT, 'currency': 'code',
+    'debit_credit_indicator': 'code', 'is_open': 'bool'
+}
+CLEARING_SCHEMA = {
+    'company_code': 'code', 'fiscal_year': 'int32', 'line_item': 'int32', 'clearing_date': 'date', 'is_open': 'bool'
+}
+TABLE_SCHEMAS = {
+    'fact_gl_postings': {
+        'company_code': 'code', 'gl_account': 'code', 'posting_date': 'date', 'item_number': 'int32',
+        'amount_local': AMOUNT, 'amount_group': AMOUNT, 'currency_local': 'code', 'currency_group': 'code',
+        'debit_credit_indicator': 'code', 'cost_center': 'code', 'profit_center': 'code',
+        'fiscal_year': 'int32', 'fiscal_period': 'int32', 'value_date': 'date', 'reference_document': 'string',
+        'special_gl_indicator': 'code', 'transaction_text': 'string'
+    },
+    'fact_asset_movements': {
+        'sub_number': 'code', 'company_code': 'code', 'fiscal_year': 'int32', 'depreciation_area': 'code',
+        'posting_date': 'date', 'acquisition_value': AMOUNT, 'ordinary_depreciation_posted': AMOUNT,
+        'net_book_value': AMOUNT, 'movement_type': 'code'
+    },
+    'fact_inventory_movements': {
+        'material_document_year': 'int32', 'material_document_item': 'int32', 'material_number': 'code',
+        'plant': 'code', 'storage_location': 'code', 'movement_type': 'code', 'posting_date': 'date',
+        'quantity': 'decimal(15,3)', 'unit_of_measure': 'code', 'amount_local': AMOUNT
+    },
+    'fact_ar_open_items': dict(OPEN_ITEM_SCHEMA, customer_number='code'),
+    'fact_ap_open_items': dict(OPEN_ITEM_SCHEMA, vendor_number='code'),
+    'fact_ar_clearings': CLEARING_SCHEMA,
+    'fact_ap_clearings': CLEARING_SCHEMA
+}
+# Fact tables partitioned when PARTITION_BY is set, with the date column their fiscal keys and manifest ranges come from
+PARTITIONED_TABLES = {
+    'fact_gl_postings': 'posting_date', 'fact_asset_movements': 'posting_date',
+    'fact_inventory_movements': 'posting_date', 'fact_ar_open_items': 'posting_date',
+    'fact_ap_open_items': 'posting_date'
+}
+# Open item key columns repeated in the clearing tables, which record items cleared by a later run
+CLEARING_KEYS = {
+    'fact_ar_open_items': ['ar_item_id', 'document_number', 'company_code', 'fiscal_year', 'line_item'],
+    'fact_ap_open_items': ['ap_item_id', 'document_number', 'company_code', 'fiscal_year', 'line_item']
+}
+output = DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES,
+                       fiscal_year_start_month=FISCAL_YEAR_START_MONTH)
+run_log = RunLog('coo', OUTPUT_DIR, PROFILE)
+
+# --- Faker Initialization (built on first use) ---
+fake = LazyFaker('en_US') # Use US locale for realistic names/addresses
+pools = FakerPools('en_US', SEED, faker=fake) # Pre-generated names, places and texts, sampled instead of calling Faker per row
 # --- Helper Functions ---
+def save_table(df, table_name, append=False):
+    """Writes a table to OUTPUT_DIR in OUTPUT_FORMAT, partitioned if it is a fact table and PARTITION_BY is set.
+
+    Returns the number of rows written.
+    """
+    rows = output.write(df, table_name, append)
+    run_log.saved(table_name, rows, output.path(table_name), append=append)
+    return rows
+
 def generate_dates(start_date, end_date):
-    """Generates the dim_date table with April-March fiscal calendar."""
-    dates = []
-    current_date = start_date
-    while current_date <= end_date:
-        fiscal_year = current_date.year if current_date.month >= 4 else current_date.year - 1
-        fiscal_quarter = ((current_date.month - 4) // 3) + 1
-        if fiscal_quarter <= 0: # Adjust for Jan-Mar being Q4 of previous fiscal year
-             fiscal_quarter += 4
-        fiscal_month = (current_date.month - 4) % 12 + 1
-        is_weekend = current_date.weekday() >= 5 # Saturday or Sunday
-
-        dates.append({
-            'date_key': current_date,
-            'year': current_date.year,
-            'quarter': (current_date.month - 1) // 3 + 1,
-            'month': current_date.month,
-            'month_name': current_date.strftime('%B'),
-            'week': current_date.isocalendar()[1],
-            'day_of_week': current_date.weekday() + 1,
-            'day_name': current_date.strftime('%A'),
-            'fiscal_year': fiscal_year,
-            'fiscal_quarter': fiscal_quarter,
-            'fiscal_month': fiscal_month,
-            'is_weekend': is_weekend,
-            'is_holiday': False, # Can be expanded with a holiday calendar
-            'month_start_date': current_date.replace(day=1),
-            'quarter_start_date': datetime.date(current_date.year, (current_date.month - 1) // 3 * 3 + 1, 1),
-            'year_start_date': datetime.date(current_date.year, 1, 1),
-        })
-        current_date += timedelta(days=1)
-    df = pd.DataFrame(dates)
-    return df
+    """Generates the dim_date table from the shared calendar (see datagen.calendar)."""
+    return build_calendar(start_date, end_date, FISCAL_YEAR_START_MONTH, HOLIDAYS).date_dimension()
 
 def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num_cost_centers, num_assets, num_materials, num_customers, num_vendors):
     """Generates all dimension tables."""
-    print("Generating Master Data...")
     # dim_company_codes
     companies = []
     for i in range(num_companies):
         company_code = f"CO{i+1:02d}"
         companies.append({
             'company_code': company_code,
-            'company_name': fake.company() + (f" Global {i+1}" if i > 0 else " Corp"),
-            'country': fake.country_code(),
+            'company_name': pools.choice('company') + (f" Global {i+1}" if i > 0 else " Corp"),
+            'country': pools.choice('country_code'),
             'currency': 'USD' if i == 0 else random.choice(['EUR', 'GBP', 'CAD', 'JPY']),
             'chart_of_accounts': 'INT'
         })
@@ -98,17 +147,17 @@ def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num
     gl_accounts.append({'gl_account': "200000", 'account_description': 'Accounts Payable', 'account_group': 'Liabilities', 'account_type': 'Balance Sheet'})
     gl_accounts.append({'gl_account': "600001", 'account_description': 'Depreciation Expense', 'account_group': 'Expenses', 'account_type': 'P&L'})
     # Asset Accounts (1xxxx)
-    for i in range(1, 100): gl_accounts.append({'gl_account': f"100{i+2:03d}", 'account_description': fake.bs(), 'account_group': 'Assets', 'account_type': 'Balance Sheet'})
+    for i in range(1, 100): gl_accounts.append({'gl_account': f"100{i+2:03d}", 'account_description': pools.choice('bs'), 'account_group': 'Assets', 'account_type': 'Balance Sheet'})
     # Liability Accounts (2xxxx)
-    for i in range(1, 100): gl_accounts.append({'gl_account': f"200{i+1:03d}", 'account_description': fake.bs(), 'account_group': 'Liabilities', 'account_type': 'Balance Sheet'})
+    for i in range(1, 100): gl_accounts.append({'gl_account': f"200{i+1:03d}", 'account_description': pools.choice('bs'), 'account_group': 'Liabilities', 'account_type': 'Balance Sheet'})
     # Equity Accounts (3xxxx)
-    for i in range(50): gl_accounts.append({'gl_account': f"300{i+1:03d}", 'account_description': fake.bs(), 'account_group': 'Equity', 'account_type': 'Balance Sheet'})
+    for i in range(50): gl_accounts.append({'gl_account': f"300{i+1:03d}", 'account_description': pools.choice('bs'), 'account_group': 'Equity', 'account_type': 'Balance Sheet'})
     # Revenue Accounts (4xxxx)
-    for i in range(150): gl_accounts.append({'gl_account': f"400{i+1:03d}", 'account_description': fake.word().capitalize() + ' Revenue', 'account_group': 'Revenue', 'account_type': 'P&L'})
+    for i in range(150): gl_accounts.append({'gl_account': f"400{i+1:03d}", 'account_description': pools.choice('word').capitalize() + ' Revenue', 'account_group': 'Revenue', 'account_type': 'P&L'})
     # COGS Accounts (5xxxx)
-    for i in range(50): gl_accounts.append({'gl_account': f"500{i+1:03d}", 'account_description': fake.word().capitalize() + ' COGS', 'account_group': 'COGS', 'account_type': 'P&L'})
+    for i in range(50): gl_accounts.append({'gl_account': f"500{i+1:03d}", 'account_description': pools.choice('word').capitalize() + ' COGS', 'account_group': 'COGS', 'account_type': 'P&L'})
     # Expense Accounts (6xxxx)
-    for i in range(1, 250): gl_accounts.append({'gl_account': f"600{i+1:03d}", 'account_description': fake.word().capitalize() + ' Expense', 'account_group': 'Expenses', 'account_type': 'P&L'})
+    for i in range(1, 250): gl_accounts.append({'gl_account': f"600{i+1:03d}", 'account_description': pools.choice('word').capitalize() + ' Expense', 'account_group': 'Expenses', 'account_type': 'P&L'})
     # Non-Operating / Interest / Tax (7xxxx)
     gl_accounts.append({'gl_account': "700001", 'account_description': 'Interest Income', 'account_group': 'Other Income', 'account_type': 'P&L'})
     gl_accounts.append({'gl_account': "700002", 'account_description': 'Interest Expense', 'account_group': 'Other Expenses', 'account_type': 'P&L'})
@@ -121,7 +170,7 @@ def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num
         profit_centers.append({
             'profit_center': f"PC{i+1:03d}",
             'controlling_area': 'CA01', # Assuming one controlling area
-            'profit_center_name': fake.city() + ' Operations',
+            'profit_center_name': pools.choice('city') + ' Operations',
             'valid_from': fake.date_between(start_date=START_DATE - timedelta(days=365*5), end_date=START_DATE),
             'valid_to': END_DATE + timedelta(days=365*5)
         })
@@ -132,7 +181,7 @@ def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num
         cost_centers.append({
             'cost_center': f"CC{i+1:04d}",
             'controlling_area': 'CA01',
-            'cost_center_name': fake.word().capitalize() + ' Dept ' + str(i+1),
+            'cost_center_name': pools.choice('word').capitalize() + ' Dept ' + str(i+1),
             'valid_from': fake.date_between(start_date=START_DATE - timedelta(days=365*5), end_date=START_DATE),
             'valid_to': END_DATE + timedelta(days=365*5)
         })
@@ -147,7 +196,7 @@ def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num
             'sub_number': '0', # Simple sub-number
             'company_code': comp_code,
             'asset_class': random.choice(asset_classes),
-            'asset_description': fake.sentence(nb_words=4),
+            'asset_description': pools.choice('sentence4'),
             'capitalization_date': fake.date_between(start_date=START_DATE - timedelta(days=365*2), end_date=END_DATE - timedelta(days=30)),
             'deactivation_date': None # Most are active
         })
@@ -164,196 +213,258 @@ def generate_master_data(num_companies, num_gl_accounts, num_profit_centers, num
             'moving_average_price': round(random.uniform(9.0, 5100.0), 2),
         })
     df_materials = pd.DataFrame(materials)
-    # dim_customers
-    customers = []
-    for i in range(num_customers):
-        customers.append({
-            'customer_number': f"CUST{i+1:05d}",
-            'customer_name': fake.company(),
-            'country': fake.country_code(),
-            'city': fake.city()
-        })
-    df_customers = pd.DataFrame(customers)
+    # dim_customers (names and places are drawn column-wise from the Faker pools)
+    df_customers = pd.DataFrame({
+        'customer_number': [f"CUST{i+1:05d}" for i in range(num_customers)],
+        'customer_name': pools.sample('company', num_customers),
+        'country': pools.sample('country_code', num_customers),
+        'city': pools.sample('city', num_customers)
+    })
     # dim_vendors
-    vendors = []
-    for i in range(num_vendors):
-        vendors.append({
-            'vendor_number': f"VEND{i+1:05d}",
-            'vendor_name': fake.company() + ' Suppliers',
-            'country': fake.country_code(),
-            'city': fake.city()
-        })
-    df_vendors = pd.DataFrame(vendors)
+    df_vendors = pd.DataFrame({
+        'vendor_number': [f"VEND{i+1:05d}" for i in range(num_vendors)],
+        'vendor_name': pools.sample('company', num_vendors) + ' Suppliers',
+        'country': pools.sample('country_code', num_vendors),
+        'city': pools.sample('city', num_vendors)
+    })
     return df_companies, df_gl_accounts, df_profit_centers, df_cost_centers, \
            df_assets, df_materials, df_customers, df_vendors
 
-def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers, df_cost_centers,
-                       df_assets, df_materials, df_customers, df_vendors):
-    """Generates all fact tables based on business logic."""
-    print("Generating Fact Data...")
-    # --- Pre-calculate daily base volumes with seasonality ---
-    total_days = (END_DATE - START_DATE).days + 1
+def build_fact_context(df_dates, df_companies, df_gl_accounts, df_profit_centers, df_cost_centers,
+                       df_materials, df_customers, df_vendors, volume_norms=None):
+    """Precomputes the per-run lookups shared by all fact tables.
+
+    Holds the normalized daily volume curves, the GL account lists per account
+    group and the dimension key lists, so the per-day loops never rescan the
+    dimension frames or re-sum the seasonality factors. The curves are
+    normalized over df_dates unless volume_norms from an earlier run is given,
+    so appended days keep the volumes of the original history.
+    """
+    # --- Daily base volumes with seasonality ---
+    total_days = len(df_dates)
     daily_revenue_factors = []
     daily_expense_factors = []
     daily_ar_factors = []
     daily_ap_factors = []
     daily_inv_factors = []
-    for _, row in df_dates.iterrows():
+    for row in df_dates.to_dict('records'):
         # Overall growth factor over time
         growth_factor = 1 + (TARGET_REVENUE_GROWTH_YOY[0] + (TARGET_REVENUE_GROWTH_YOY[1] - TARGET_REVENUE_GROWTH_YOY[0]) * random.random()) * ((row['date_key'] - START_DATE).days / 365.0)
         # Seasonality (Q4 spike for Oct-Dec, adjusted for Apr-Mar fiscal)
         # Assuming Q4 of fiscal year (Jan-Mar) is peak for this fiscal calendar
-        month_of_fiscal_year = row['fiscal_month']
         season_factor = 1.0
         if 10 <= row['month'] <= 12: # Calendar Q4 - often a general business peak
             season_factor = 1.25 # Higher volume
         elif row['month'] >= 1 and row['month'] <= 3: # Fiscal Q4 (Jan-Mar)
              season_factor = 1.35 # Higher volume for fiscal year end close
-        # Weekend factor
-        weekend_factor = 0.2 if row['is_weekend'] else 1.0 # Much lower on weekends
+        # Weekend (and holiday) factor
+        weekend_factor = 0.2 if row['is_weekend'] or row['is_holiday'] else 1.0 # Much lower on weekends
         daily_revenue_factors.append(growth_factor * season_factor * weekend_factor)
         daily_expense_factors.append(growth_factor * weekend_factor * random.uniform(0.9, 1.1)) # Expenses less seasonal
         daily_ar_factors.append(growth_factor * season_factor * weekend_factor * random.uniform(0.9, 1.1))
         daily_ap_factors.append(growth_factor * weekend_factor * random.uniform(0.8, 1.2))
         daily_inv_factors.append(growth_factor * weekend_factor * random.uniform(0.9, 1.1))
+    daily_revenue_factors = np.array(daily_revenue_factors)
+    daily_ar_factors = np.array(daily_ar_factors)
+    daily_ap_factors = np.array(daily_ap_factors)
+    daily_inv_factors = np.array(daily_inv_factors)
+    if volume_norms is None:
+        volume_norms = {
+            'revenue_total': daily_revenue_factors.sum(),
+            'revenue_per_day': daily_revenue_factors.sum() / total_days,
+            'inventory_per_day': daily_inv_factors.sum() / total_days,
+            'ar_per_day': daily_ar_factors.sum() / total_days,
+            'ap_per_day': daily_ap_factors.sum() / total_days,
+        }
+    return {
+        'end_date': df_dates['date_key'].iloc[-1],
+        'volume_norms': volume_norms,
+        # Share of annual revenue booked on each day, and daily document counts
+        # scaled so the average day hits the configured volume
+        'daily_revenue_share': daily_revenue_factors / volume_norms['revenue_total'],
+        'daily_gl_postings': (AVG_DAILY_GL_POSTINGS * daily_revenue_factors / volume_norms['revenue_per_day']).astype(int),
+        'daily_inventory_movements': (AVG_DAILY_INVENTORY_MOVEMENTS * daily_inv_factors / volume_norms['inventory_per_day']).astype(int),
+        'daily_ar_items': (AVG_DAILY_AR_ITEMS * daily_ar_factors / volume_norms['ar_per_day']).astype(int),
+        'daily_ap_items': (AVG_DAILY_AP_ITEMS * daily_ap_factors / volume_norms['ap_per_day']).astype(int),
+        'revenue_accounts': df_gl_accounts[df_gl_accounts['account_group'] == 'Revenue']['gl_account'].tolist(),
+        'cogs_accounts': df_gl_accounts[df_gl_accounts['account_group'] == 'COGS']['gl_account'].tolist(),
+        'expense_accounts': df_gl_accounts[df_gl_accounts['account_group'] == 'Expenses']['gl_account'].tolist(),
+        'cash_bank_accounts': df_gl_accounts[df_gl_accounts['account_description'].str.contains('Cash|Bank', case=False)]['gl_account'].tolist(),
+        'has_depreciation_account': '600001' in set(df_gl_accounts['gl_account']),
+        'company_codes': df_companies['company_code'].tolist(),
+        'profit_centers': df_profit_centers['profit_center'].tolist(),
+        'cost_centers': df_cost_centers['cost_center'].tolist(),
+        'materials': df_materials['material_number'].tolist(),
+        'material_prices': df_materials.set_index('material_number')['standard_price'].to_dict(),
+        'customers': df_customers['customer_number'].tolist(),
+        'vendors': df_vendors['vendor_number'].tolist(),
+    }
+
+class AssetRegister:
+    """Append-friendly columnar asset register.
+
+    Columns live in preallocated numpy arrays whose capacity doubles when full,
+    so acquisitions are amortized O(1) and the depreciation run reads views of
+    the filled prefix without copying. Materialized to a DataFrame only at export.
+    """
+    COLUMNS = ['asset_number', 'sub_number', 'company_code', 'asset_class',
+               'asset_description', 'capitalization_date', 'deactivation_date']
+
+    def __init__(self, df_assets):
+        self.size = len(df_assets)
+        capacity = max(2 * self.size, 16)
+        self._columns = {}
+        for column in self.COLUMNS:
+            if column == 'capitalization_date':
+                values = pd.to_datetime(df_assets[column]).to_numpy().astype('datetime64[D]')
+            else:
+                values = df_assets[column].to_numpy(dtype=object)
+            buffer = np.empty(capacity, dtype=values.dtype)
+            buffer[:self.size] = values
+            self._columns[column] = buffer
+        # Depreciation base: the digits among the last three characters of the asset number
+        last3_digits = df_assets['asset_number'].str[-3:].str.replace(r'\D', '', regex=True)
+        self._columns['depreciation_base'] = np.zeros(capacity)
+        self._columns['depreciation_base'][:self.size] = pd.to_numeric(last3_digits, errors='coerce').fillna(0).to_numpy()
+
+    def append(self, **asset):
+        """Adds one asset, doubling the buffers when they are full."""
+        if self.size == len(self._columns['asset_number']):
+            for column, buffer in self._columns.items():
+                grown = np.zeros(2 * len(buffer), dtype=buffer.dtype)
+                grown[:self.size] = buffer[:self.size]
+                self._columns[column] = grown
+        for column in self.COLUMNS:
+            self._columns[column][self.size] = asset[column]
+        last3_digits = ''.join(filter(str.isdigit, asset['asset_number'][-3:]))
+        self._columns['depreciation_base'][self.size] = int(last3_digits) if last3_digits else 0
+        self.size += 1
+
+    def arrays(self):
+        """Views of the filled part of every column (no copy)."""
+        return {column: buffer[:self.size] for column, buffer in self._columns.items()}
+
+    def to_frame(self):
+        df_assets = pd.DataFrame({column: self._columns[column][:self.size] for column in self.COLUMNS})
+        df_assets['capitalization_date'] = df_assets['capitalization_date'].dt.date
+        return df_assets
+
+def run_monthly_depreciation(asset_register, posting_date):
+    """Computes one month's depreciation for every active asset in a single vectorized step."""
+    active = asset_register['capitalization_date'] <= np.datetime64(posting_date, 'D')
+    return {
+        'asset_number': asset_register['asset_number'][active],
+        'sub_number': asset_register['sub_number'][active],
+        'company_code': asset_register['company_code'][active],
+        'amount': np.round(asset_register['depreciation_base'][active] * 0.5 + np.random.uniform(50, 500, int(active.sum())), 2),
+    }
+
+def generate_daily_facts(shard, seed_sequence, ctx, company_annual_revenues):
+    """Generates the day-driven fact rows (GL, inventory, AR, AP) for one month shard.
+
+    Rows are numbered per shard; generate_fact_data renumbers them after the
+    shards are concatenated in date order.
+    """
+    shard_dates, first_day_idx = shard
+    rnd = shard_random(seed_sequence)
+    text_rng = np.random.default_rng(rnd.getrandbits(64)) # Reference documents and posting texts, filled in column-wise below
     # --- fact_gl_postings ---
     gl_postings = []
-    gl_account_types = df_gl_accounts.set_index('gl_account')['account_type'].to_dict()
-    gl_account_groups = df_gl_accounts.set_index('gl_account')['account_group'].to_dict()
-    # Pre-determine total revenue for KPI calculation
-    # Base annual revenue per company, then adjust by daily factors
-    base_annual_revenue_per_company = 250_000_000 # For an Enterprise
-
-    company_annual_revenues = {comp: base_annual_revenue_per_company * random.uniform(0.9, 1.1) for comp in df_companies['company_code']}
-    for day_idx, (idx, date_row) in enumerate(df_dates.iterrows()):
+    for day_idx, date_row in enumerate(shard_dates.to_dict('records'), start=first_day_idx):
         current_date = date_row['date_key']
 
-        for company_code in df_companies['company_code']:
-            daily_rev_budget = company_annual_revenues[company_code] * (daily_revenue_factors[day_idx] / sum(daily_revenue_factors)) # Distribute annual revenue based on daily factors
-            num_daily_gl = int(AVG_DAILY_GL_POSTINGS * daily_revenue_factors[day_idx] / (sum(daily_revenue_factors)/total_days)) # Scale daily postings
+        for company_code in ctx['company_codes']:
+            daily_rev_budget = company_annual_revenues[company_code] * ctx['daily_revenue_share'][day_idx] # Distribute annual revenue based on daily factors
+            num_daily_gl = ctx['daily_gl_postings'][day_idx] # Scale daily postings
 
             # Simulate high-level P&L and Balance Sheet to hit KPIs
             # Revenue (4xxxx accounts)
-            rev_accounts = df_gl_accounts[df_gl_accounts['account_group'] == 'Revenue']['gl_account'].tolist()
+            rev_accounts = ctx['revenue_accounts']
             if rev_accounts and daily_rev_budget > 0:
                 gl_postings.append({
                     'gl_posting_id': len(gl_postings) + 1,
                     'company_code': company_code,
-                    'gl_account': random.choice(rev_accounts),
+                    'gl_account': rnd.choice(rev_accounts),
                     'posting_date': current_date,
                     'document_number': f"DOC{len(gl_postings)+1:08d}",
                     'item_number': 1,
-                    'amount_local': round(daily_rev_budget * random.uniform(0.9, 1.1), 2),
-                    'amount_group': round(daily_rev_budget * random.uniform(0.9, 1.1) * random.uniform(0.95, 1.05), 2),
+                    'amount_local': round(daily_rev_budget * rnd.uniform(0.9, 1.1), 2),
+                    'amount_group': round(daily_rev_budget * rnd.uniform(0.9, 1.1) * rnd.uniform(0.95, 1.05), 2),
                     'currency_local': 'USD', # Simplified for demo
                     'currency_group': 'USD',
                     'debit_credit_indicator': 'H', # Credit for Revenue
                     'cost_center': None,
-                    'profit_center': random.choice(df_profit_centers['profit_center']),
+                    'profit_center': rnd.choice(ctx['profit_centers']),
                     'fiscal_year': date_row['fiscal_year'],
                     'fiscal_period': date_row['fiscal_month'],
                     'value_date': current_date,
-                    'reference_document': fake.uuid4()[:8].upper(),
+                    'reference_document': None,
                     'special_gl_indicator': None,
-                    'transaction_text': fake.sentence(nb_words=3)
+                    'transaction_text': None
                 })
             # COGS (5xxxx accounts) - typically 50-70% of revenue
-            cogs_accounts = df_gl_accounts[df_gl_accounts['account_group'] == 'COGS']['gl_account'].tolist()
+            cogs_accounts = ctx['cogs_accounts']
             if cogs_accounts and daily_rev_budget > 0:
                  gl_postings.append({
                     'gl_posting_id': len(gl_postings) + 1,
                     'company_code': company_code,
-                    'gl_account': random.choice(cogs_accounts),
+                    'gl_account': rnd.choice(cogs_accounts),
                     'posting_date': current_date,
                     'document_number': f"DOC{len(gl_postings)+1:08d}",
                     'item_number': 1,
-                    'amount_local': round(daily_rev_budget * random.uniform(0.5, 0.7), 2), # COGS percentage
-                    'amount_group': round(daily_rev_budget * random.uniform(0.5, 0.7) * random.uniform(0.95, 1.05), 2),
+                    'amount_local': round(daily_rev_budget * rnd.uniform(0.5, 0.7), 2), # COGS percentage
+                    'amount_group': round(daily_rev_budget * rnd.uniform(0.5, 0.7) * rnd.uniform(0.95, 1.05), 2),
                     'currency_local': 'USD',
                     'currency_group': 'USD',
                     'debit_credit_indicator': 'S', # Debit for COGS
                     'cost_center': None,
-                    'profit_center': random.choice(df_profit_centers['profit_center']),
+                    'profit_center': rnd.choice(ctx['profit_centers']),
                     'fiscal_year': date_row['fiscal_year'],
                     'fiscal_period': date_row['fiscal_month'],
                     'value_date': current_date,
-                    'reference_document': fake.uuid4()[:8].upper(),
+                    'reference_document': None,
                     'special_gl_indicator': None,
-                    'transaction_text': fake.sentence(nb_words=3)
+                    'transaction_text': None
                 })
             # Operating Expenses (6xxxx accounts) - to hit EBITDA target
             # Target EBITDA = Revenue * Target EBITDA Margin
             # Operating Exp = Revenue - COGS - Target EBITDA
-            target_ebitda_amount = daily_rev_budget * random.uniform(*TARGET_EBITDA_MARGIN)
-            approx_operating_expense = daily_rev_budget * random.uniform(0.2, 0.3) # General range
+            target_ebitda_amount = daily_rev_budget * rnd.uniform(*TARGET_EBITDA_MARGIN)
+            approx_operating_expense = daily_rev_budget * rnd.uniform(0.2, 0.3) # General range
 
-            exp_accounts = df_gl_accounts[df_gl_accounts['account_group'] == 'Expenses']['gl_account'].tolist()
+            exp_accounts = ctx['expense_accounts']
             if exp_accounts and approx_operating_expense > 0:
                 for _ in range(int(num_daily_gl / 5)): # Simulate multiple expense postings
                     gl_postings.append({
                         'gl_posting_id': len(gl_postings) + 1,
                         'company_code': company_code,
-                        'gl_account': random.choice(exp_accounts),
+                        'gl_account': rnd.choice(exp_accounts),
                         'posting_date': current_date,
                         'document_number': f"DOC{len(gl_postings)+1:08d}",
                         'item_number': 1,
-                        'amount_local': round(approx_operating_expense * random.uniform(0.01, 0.05), 2), # Small individual expenses
-                        'amount_group': round(approx_operating_expense * random.uniform(0.01, 0.05) * random.uniform(0.95, 1.05), 2),
+                        'amount_local': round(approx_operating_expense * rnd.uniform(0.01, 0.05), 2), # Small individual expenses
+                        'amount_group': round(approx_operating_expense * rnd.uniform(0.01, 0.05) * rnd.uniform(0.95, 1.05), 2),
                         'currency_local': 'USD',
                         'currency_group': 'USD',
                         'debit_credit_indicator': 'S', # Debit for Expenses
-                        'cost_center': random.choice(df_cost_centers['cost_center']),
-                        'profit_center': random.choice(df_profit_centers['profit_center']),
+                        'cost_center': rnd.choice(ctx['cost_centers']),
+                        'profit_center': rnd.choice(ctx['profit_centers']),
                         'fiscal_year': date_row['fiscal_year'],
                         'fiscal_period': date_row['fiscal_month'],
                         'value_date': current_date,
-                        'reference_document': fake.uuid4()[:8].upper(),
+                        'reference_document': None,
                         'special_gl_indicator': None,
-                        'transaction_text': fake.sentence(nb_words=3)
+                        'transaction_text': None
                     })
 
-            # Asset Movements / Depreciation (monthly for anlc)
-            if current_date.day == 15: # Mid-month for monthly depreciation postings
-                for asset_idx, asset_row in df_assets[df_assets['company_code'] == company_code].iterrows():
-                    if asset_row['capitalization_date'] <= current_date:
-                        # Extract last 3 digits, convert to int, handle non-numeric gracefully
-                        try:
-                            asset_num_last3 = int(''.join(filter(str.isdigit, asset_row['asset_number'][-3:])))
-                        except Exception:
-                            asset_num_last3 = 0
-                        depreciation_amount = round(asset_num_last3 * 0.5 + random.uniform(50, 500), 2) # Simulate depreciation
-                        # Check if 'Depreciation Expense' GL account exists before adding
-                        if '600001' in df_gl_accounts['gl_account'].tolist():
-                             gl_postings.append({
-                                'gl_posting_id': len(gl_postings) + 1,
-                                'company_code': company_code,
-                                'gl_account': '600001', # Example Depreciation Expense GL
-                                'posting_date': current_date,
-                                'document_number': f"DOC{len(gl_postings)+1:08d}",
-                                'item_number': 1,
-                                'amount_local': depreciation_amount,
-                                'amount_group': depreciation_amount,
-                                'currency_local': 'USD',
-                                'currency_group': 'USD',
-                                'debit_credit_indicator': 'S',
-                                'cost_center': random.choice(df_cost_centers['cost_center']),
-                                'profit_center': random.choice(df_profit_centers['profit_center']),
-                                'fiscal_year': date_row['fiscal_year'],
-                                'fiscal_period': date_row['fiscal_month'],
-                                'value_date': current_date,
-                                'reference_document': f"DEP{asset_row['asset_number']}-{date_row['fiscal_year']}{date_row['fiscal_month']}",
-                                'special_gl_indicator': None,
-                                'transaction_text': f"Depreciation for Asset {asset_row['asset_number']}"
-                            })
-
             # Simulate cash/bank movements for P&L reconciliation (simplified)
             # This helps balance the GL for cash flow later
-            if random.random() < 0.2: # Some days have cash entries
+            if rnd.random() < 0.2: # Some days have cash entries
                 # Use the explicitly added Cash/Bank accounts
-                cash_bank_accounts = df_gl_accounts[df_gl_accounts['account_description'].str.contains('Cash|Bank', case=False)]['gl_account'].tolist()
+                cash_bank_accounts = ctx['cash_bank_accounts']
                 if cash_bank_accounts: # Ensure list is not empty before sampling
-                    cash_account = random.choice(cash_bank_accounts)
-                    amount = round(daily_rev_budget * random.uniform(0.01, 0.05), 2)
+                    cash_account = rnd.choice(cash_bank_accounts)
+                    amount = round(daily_rev_budget * rnd.uniform(0.01, 0.05), 2)
                     gl_postings.append({
                         'gl_posting_id': len(gl_postings) + 1,
                         'company_code': company_code,
@@ -365,83 +476,27 @@ def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers
                         'amount_group': amount,
                         'currency_local': 'USD',
                         'currency_group': 'USD',
-                        'debit_credit_indicator': random.choice(['S', 'H']), # Random debit/credit
+                        'debit_credit_indicator': rnd.choice(['S', 'H']), # Random debit/credit
                         'cost_center': None,
                         'profit_center': None,
                         'fiscal_year': date_row['fiscal_year'],
                         'fiscal_period': date_row['fiscal_month'],
                         'value_date': current_date,
-                        'reference_document': fake.uuid4()[:8].upper(),
+                        'reference_document': None,
                         'special_gl_indicator': None,
-                        'transaction_text': fake.sentence(nb_words=3)
+                        'transaction_text': None
                     })
-    df_gl_postings = pd.DataFrame(gl_postings)
-    # --- fact_asset_movements ---
-    asset_movements = []
-    asset_id_counter = 0
-    for _, date_row in df_dates.iterrows():
-        current_date = date_row['date_key']
-        if current_date.day == 15: # Monthly depreciation posting
-            for _, asset_row in df_assets.iterrows():
-                if asset_row['capitalization_date'] <= current_date:
-                    depreciation_amount = round(random.uniform(100.0, 5000.0), 2)
-                    asset_movements.append({
-                        'asset_movement_id': len(asset_movements) + 1,
-                        'asset_number': asset_row['asset_number'],
-                        'sub_number': asset_row['sub_number'],
-                        'company_code': asset_row['company_code'],
-                        'fiscal_year': date_row['fiscal_year'],
-                        'depreciation_area': '01',
-                        'posting_date': current_date,
-                        'acquisition_value': 0.0, # Not an acquisition record
-                        'ordinary_depreciation_posted': depreciation_amount,
-                        'net_book_value': None, # Calculated in BI
-                        'movement_type': 'Depreciation'
-                    })
-
-            # Simulate new asset acquisitions (fewer)
-            if random.random() < 0.1: # 10% chance per month to acquire some assets
-                num_new_assets = random.randint(1, 5)
-                for _ in range(num_new_assets):
-                    asset_id_counter += 1
-                    new_asset_num = f"A{NUM_ASSETS + asset_id_counter:05d}"
-                    comp_code = random.choice(df_companies['company_code'].tolist())
-                    acquisition_value = round(random.uniform(5000.0, 100000.0), 2)
-                    asset_movements.append({
-                        'asset_movement_id': len(asset_movements) + 1,
-                        'asset_number': new_asset_num,
-                        'sub_number': '0',
-                        'company_code': comp_code,
-                        'fiscal_year': date_row['fiscal_year'],
-                        'depreciation_area': '01',
-                        'posting_date': current_date,
-                        'acquisition_value': acquisition_value,
-                        'ordinary_depreciation_posted': 0.0,
-                        'net_book_value': None,
-                        'movement_type': 'Acquisition'
-                    })
-                    # Add to dim_assets temporarily to ensure referential integrity for subsequent movements
-                    df_assets.loc[len(df_assets)] = {
-                        'asset_number': new_asset_num,
-                        'sub_number': '0',
-                        'company_code': comp_code,
-                        'asset_class': random.choice(['MACHINERY', 'COMPUTER']),
-                        'asset_description': fake.sentence(nb_words=4),
-                        'capitalization_date': current_date,
-                        'deactivation_date': None
-                    }
-    df_asset_movements = pd.DataFrame(asset_movements)
     # --- fact_inventory_movements ---
     inventory_movements = []
-    material_prices = df_materials.set_index('material_number')['standard_price'].to_dict()
-    for day_idx, (idx, date_row) in enumerate(df_dates.iterrows()):
+    material_prices = ctx['material_prices']
+    for day_idx, date_row in enumerate(shard_dates.to_dict('records'), start=first_day_idx):
         current_date = date_row['date_key']
-        num_daily_inv = int(AVG_DAILY_INVENTORY_MOVEMENTS * daily_inv_factors[day_idx] / (sum(daily_inv_factors)/total_days))
+        num_daily_inv = ctx['daily_inventory_movements'][day_idx]
         for _ in range(num_daily_inv):
-            material = random.choice(df_materials['material_number'].tolist())
-            comp_code = random.choice(df_companies['company_code'].tolist())
-            movement_type = random.choices(['GR', 'GI_SALES', 'GI_PROD', 'TRSF'], weights=[0.4, 0.3, 0.2, 0.1], k=1)[0]
-            quantity = round(random.uniform(1, 100), 2)
+            material = rnd.choice(ctx['materials'])
+            comp_code = rnd.choice(ctx['company_codes'])
+            movement_type = rnd.choices(['GR', 'GI_SALES', 'GI_PROD', 'TRSF'], weights=[0.4, 0.3, 0.2, 0.1], k=1)[0]
+            quantity = round(rnd.uniform(1, 100), 2)
 
             unit = 'EA'
             amount = round(quantity * material_prices.get(material, 100), 2)
@@ -459,29 +514,29 @@ def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers
                 'unit_of_measure': unit,
                 'amount_local': amount
             })
-    df_inventory_movements = pd.DataFrame(inventory_movements)
     # --- fact_ar_open_items ---
     ar_items = []
-    for day_idx, (idx, date_row) in enumerate(df_dates.iterrows()):
+    for day_idx, date_row in enumerate(shard_dates.to_dict('records'), start=first_day_idx):
         current_date = date_row['date_key']
-        num_daily_ar = int(AVG_DAILY_AR_ITEMS * daily_ar_factors[day_idx] / (sum(daily_ar_factors)/total_days))
+        num_daily_ar = ctx['daily_ar_items'][day_idx]
         for _ in range(num_daily_ar):
-            customer = random.choice(df_customers['customer_number'].tolist())
-            comp_code = random.choice(df_companies['company_code'].tolist())
-            amount = round(random.uniform(500.0, 50000.0), 2)
-            due_date = current_date + timedelta(days=int(random.gauss(TARGET_DSO[0], 5))) # Aim for DSO
+            customer = rnd.choice(ctx['customers'])
+            comp_code = rnd.choice(ctx['company_codes'])
+            amount = round(rnd.uniform(500.0, 50000.0), 2)
+            due_date = current_date + timedelta(days=int(rnd.gauss(TARGET_DSO[0], 5))) # Aim for DSO
 
             # Simulate clearing: 85% paid on time/early, 10% slightly late, 5% very late
-            rand_clear = random.random()
+            rand_clear = rnd.random()
             if rand_clear < 0.85: # Paid on time/early
-                clearing_date = current_date + timedelta(days=random.randint(5, 30))
+                clearing_date = current_date + timedelta(days=rnd.randint(5, 30))
             elif rand_clear < 0.95: # Slightly late
-                clearing_date = due_date + timedelta(days=random.randint(1, 15))
+                clearing_date = due_date + timedelta(days=rnd.randint(1, 15))
             else: # Very late / open
-                clearing_date = None if current_date < END_DATE - timedelta(days=60) else current_date + timedelta(days=random.randint(15, 60)) # Ensure some stay open
-            # Ensure clearing_date is not in future
-            if clearing_date and clearing_date > END_DATE:
-                clearing_date = None
+                clearing_date = None if current_date < ctx['end_date'] - timedelta(days=60) else current_date + timedelta(days=rnd.randint(15, 60)) # Ensure some stay open
+            # Ensure clearing_date is not in future; an appended run clears the item on that date instead
+            planned_clearing_date = None
+            if clearing_date and clearing_date > ctx['end_date']:
+                clearing_date, planned_clearing_date = None, clearing_date
             ar_items.append({
                 'ar_item_id': len(ar_items) + 1,
                 'document_number': f"AR{len(ar_items)+1:08d}",
@@ -495,29 +550,30 @@ def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers
                 'amount_local': amount,
                 'currency': 'USD',
                 'debit_credit_indicator': 'S',
-                'is_open': clearing_date is None
+                'is_open': clearing_date is None,
+                'planned_clearing_date': planned_clearing_date # Dropped by clear_carried_items
             })
-    df_ar_open_items = pd.DataFrame(ar_items)
     # --- fact_ap_open_items ---
     ap_items = []
-    for day_idx, (idx, date_row) in enumerate(df_dates.iterrows()):
+    for day_idx, date_row in enumerate(shard_dates.to_dict('records'), start=first_day_idx):
         current_date = date_row['date_key']
-        num_daily_ap = int(AVG_DAILY_AP_ITEMS * daily_ap_factors[day_idx] / (sum(daily_ap_factors)/total_days))
+        num_daily_ap = ctx['daily_ap_items'][day_idx]
         for _ in range(num_daily_ap):
-            vendor = random.choice(df_vendors['vendor_number'].tolist())
-            comp_code = random.choice(df_companies['company_code'].tolist())
-            amount = round(random.uniform(100.0, 20000.0), 2)
-            due_date = current_date + timedelta(days=int(random.gauss(TARGET_DPO[0], 5))) # Aim for DPO
+            vendor = rnd.choice(ctx['vendors'])
+            comp_code = rnd.choice(ctx['company_codes'])
+            amount = round(rnd.uniform(100.0, 20000.0), 2)
+            due_date = current_date + timedelta(days=int(rnd.gauss(TARGET_DPO[0], 5))) # Aim for DPO
             # Simulate clearing: 80% paid on time/early, 15% slightly late, 5% very late
-            rand_clear = random.random()
+            rand_clear = rnd.random()
             if rand_clear < 0.80: # Paid on time/early
-                clearing_date = current_date + timedelta(days=random.randint(5, 30))
+                clearing_date = current_date + timedelta(days=rnd.randint(5, 30))
             elif rand_clear < 0.95: # Slightly late
-                clearing_date = due_date + timedelta(days=random.randint(1, 10))
+                clearing_date = due_date + timedelta(days=rnd.randint(1, 10))
             else: # Very late / open
-                clearing_date = None if current_date < END_DATE - timedelta(days=45) else current_date + timedelta(days=random.randint(10, 45))
-            if clearing_date and clearing_date > END_DATE:
-                clearing_date = None
+                clearing_date = None if current_date < ctx['end_date'] - timedelta(days=45) else current_date + timedelta(days=rnd.randint(10, 45))
+            planned_clearing_date = None
+            if clearing_date and clearing_date > ctx['end_date']:
+                clearing_date, planned_clearing_date = None, clearing_date
 
             ap_items.append({
                 'ap_item_id': len(ap_items) + 1,
@@ -532,56 +588,300 @@ def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers
                 'amount_local': amount,
                 'currency': 'USD',
                 'debit_credit_indicator': 'H', # Credit for AP
-                'is_open': clearing_date is None
+                'is_open': clearing_date is None,
+                'planned_clearing_date': planned_clearing_date
             })
-    df_ap_open_items = pd.DataFrame(ap_items)
-    return df_gl_postings, df_asset_movements, df_inventory_movements, df_ar_open_items, df_ap_open_items
+    df_gl_postings = pd.DataFrame(gl_postings)
+    df_gl_postings['reference_document'] = hex_codes(len(df_gl_postings), text_rng)
+    df_gl_postings['transaction_text'] = pools.sample('sentence3', len(df_gl_postings), text_rng)
+    return df_gl_postings, pd.DataFrame(inventory_movements), pd.DataFrame(ar_items), pd.DataFrame(ap_items)
+
+def clear_carried_items(run_state, table_name, df_items, period_end):
+    """Open items cleared by period_end that earlier runs wrote as open, for the clearing tables.
+
+    Items whose clearing date falls after their run's last date are written
+    open and carried in run_state['open_items'] with that date. Each later run
+    returns the ones it reaches as rows keyed like the open item, with the new
+    clearing_date and is_open, so readers can update the rows already written.
+    Drops the planned_clearing_date helper column from df_items.
+    """
+    keys = CLEARING_KEYS[table_name]
+    if 'planned_clearing_date' in df_items:
+        planned = df_items.pop('planned_clearing_date')
+        new_open = df_items.loc[planned.notna(), keys].assign(clearing_date=planned[planned.notna()])
+    else: # No items in the period
+        new_open = pd.DataFrame(columns=keys + ['clearing_date'])
+    open_items = run_state.setdefault('open_items', {})
+    carried = pd.concat([open_items[table_name], new_open], ignore_index=True) if table_name in open_items else new_open
+    due = (carried['clearing_date'] <= period_end).to_numpy(dtype=bool)
+    open_items[table_name] = carried[~due].reset_index(drop=True)
+    return carried[due].assign(is_open=False).reset_index(drop=True)
+
+def generate_fact_data(df_dates, df_companies, df_gl_accounts, df_profit_centers, df_cost_centers,
+                       asset_register, df_materials, df_customers, df_vendors, run_state):
+    """Generates all fact tables based on business logic.
+
+    run_state carries what an appended run must continue from: the volume
+    normalizers, the company revenue targets, the rows already written per
+    fact table (ids continue after them), the shard seeds already spawned and
+    the open AR/AP items due to clear after the last date. A full run starts
+    from an empty dict; the dict is updated in place.
+    """
+    ctx = build_fact_context(df_dates, df_companies, df_gl_accounts, df_profit_centers, df_cost_centers,
+                             df_materials, df_customers, df_vendors, run_state.get('volume_norms'))
+    run_state['volume_norms'] = ctx['volume_norms']
+    rows_written = run_state.setdefault('rows', {})
+    # --- Monthly depreciation runs and asset acquisitions ---
+    # One vectorized run per month over the asset register feeds both
+    # fact_gl_postings and fact_asset_movements
+    asset_movement_batches = []
+    depreciation_gl_batches = []
+    asset_id_counter = asset_register.size - NUM_ASSETS # Assets acquired by earlier runs
+    with run_log.stage("Monthly depreciation and asset acquisitions", total=len(df_dates)) as stage:
+        for date_row in df_dates.to_dict('records'):
+            stage.advance(units=1)
+            current_date = date_row['date_key']
+            if current_date.day == 15: # Monthly depreciation posting
+                run = run_monthly_depreciation(asset_register.arrays(), current_date)
+                num_lines = len(run['amount'])
+                asset_movement_batches.append(pd.DataFrame({
+                    'asset_movement_id': 0, # Numbered once all movements are collected
+                    'asset_number': run['asset_number'],
+                    'sub_number': run['sub_number'],
+                    'company_code': run['company_code'],
+                    'fiscal_year': date_row['fiscal_year'],
+                    'depreciation_area': '01',
+                    'posting_date': current_date,
+                    'acquisition_value': 0.0, # Not an acquisition record
+                    'ordinary_depreciation_posted': run['amount'],
+                    'net_book_value': None, # Calculated in BI
+                    'movement_type': 'Depreciation'
+                }))
+                # Check if 'Depreciation Expense' GL account exists before adding
+                if ctx['has_depreciation_account']:
+                    period_suffix = f"-{date_row['fiscal_year']}{date_row['fiscal_month']}"
+                    depreciation_gl_batches.append(pd.DataFrame({
+                        'gl_posting_id': 0, # Numbered once all postings are collected
+                        'company_code': run['company_code'],
+                        'gl_account': '600001', # Example Depreciation Expense GL
+                        'posting_date': current_date,
+                        'document_number': None,
+                        'item_number': 1,
+                        'amount_local': run['amount'],
+                        'amount_group': run['amount'],
+                        'currency_local': 'USD',
+                        'currency_group': 'USD',
+                        'debit_credit_indicator': 'S',
+                        'cost_center': np.random.choice(ctx['cost_centers'], num_lines),
+                        'profit_center': np.random.choice(ctx['profit_centers'], num_lines),
+                        'fiscal_year': date_row['fiscal_year'],
+                        'fiscal_period': date_row['fiscal_month'],
+                        'value_date': current_date,
+                        'reference_document': ["DEP" + asset + period_suffix for asset in run['asset_number']],
+                        'special_gl_indicator': None,
+                        'transaction_text': ["Depreciation for Asset " + asset for asset in run['asset_number']]
+                    }))
+
+                # Simulate new asset acquisitions (fewer)
+                if random.random() < 0.1: # 10% chance per month to acquire some assets
+                    acquisitions = []
+                    num_new_assets = random.randint(1, 5)
+                    for _ in range(num_new_assets):
+                        asset_id_counter += 1
+                        new_asset_num = f"A{NUM_ASSETS + asset_id_counter:05d}"
+                        comp_code = random.choice(ctx['company_codes'])
+                        acquisition_value = round(random.uniform(5000.0, 100000.0), 2)
+                        acquisitions.append({
+                            'asset_movement_id': 0,
+                            'asset_number': new_asset_num,
+                            'sub_number': '0',
+                            'company_code': comp_code,
+                            'fiscal_year': date_row['fiscal_year'],
+                            'depreciation_area': '01',
+                            'posting_date': current_date,
+                            'acquisition_value': acquisition_value,
+                            'ordinary_depreciation_posted': 0.0,
+                            'net_book_value': None,
+                            'movement_type': 'Acquisition'
+                        })
+                        # Register the asset so subsequent depreciation runs include it
+                        asset_register.append(
+                            asset_number=new_asset_num,
+                            sub_number='0',
+                            company_code=comp_code,
+                            asset_class=random.choice(['MACHINERY', 'COMPUTER']),
+                            asset_description=pools.choice('sentence4'),
+                            capitalization_date=current_date,
+                            deactivation_date=None
+                        )
+                    asset_movement_batches.append(pd.DataFrame(acquisitions))
+        stage.advance(sum(map(len, asset_movement_batches)) + sum(map(len, depreciation_gl_batches)))
+    # --- fact_gl_postings ---
+    gl_account_types = df_gl_accounts.set_index('gl_account')['account_type'].to_dict()
+    gl_account_groups = df_gl_accounts.set_index('gl_account')['account_group'].to_dict()
+    # Pre-determine total revenue for KPI calculation
+    # Base annual revenue per company, then adjust by daily factors
+    base_annual_revenue_per_company = 250_000_000 # For an Enterprise
+
+    if 'company_annual_revenues' not in run_state:
+        run_state['company_annual_revenues'] = {comp: base_annual_revenue_per_company * random.uniform(0.9, 1.1) for comp in ctx['company_codes']}
+    # Day-driven facts run as month shards, each with its own random streams
+    shards = [(df_dates.iloc[start:stop], start) for start, stop in month_shard_bounds(df_dates['date_key'])]
+    shard_seed = continued_seed(SEED, run_state.get('shard_seeds_spawned', 0))
+    with run_log.stage("Daily GL postings, inventory movements and open items", total=len(shards)) as stage:
+        shard_results = run_shards(generate_daily_facts, shards, shard_seed, workers=NUM_WORKERS,
+                                   on_result=lambda result: stage.advance(sum(map(len, result)), units=1),
+                                   ctx=ctx, company_annual_revenues=run_state['company_annual_revenues'])
+    run_state['shard_seeds_spawned'] = shard_seed.n_children_spawned
+    gl_batches, inventory_batches, ar_batches, ap_batches = zip(*shard_results)
+
+    def first_id(table_name, count):
+        # Ids continue after the rows earlier runs wrote
+        first = rows_written.get(table_name, 0) + 1
+        rows_written[table_name] = first - 1 + count
+        return first
+
+    df_gl_postings = pd.concat(list(gl_batches) + depreciation_gl_batches, ignore_index=True)
+    df_gl_postings = df_gl_postings.sort_values('posting_date', kind='stable', ignore_index=True)
+    first = first_id('fact_gl_postings', len(df_gl_postings))
+    df_gl_postings['gl_posting_id'] = np.arange(first, first + len(df_gl_postings))
+    df_gl_postings['document_number'] = [f"DOC{i:08d}" for i in df_gl_postings['gl_posting_id']]
+    # --- fact_asset_movements ---
+    df_asset_movements = pd.concat(asset_movement_batches or [pd.DataFrame()], ignore_index=True)
+    first = first_id('fact_asset_movements', len(df_asset_movements))
+    df_asset_movements['asset_movement_id'] = np.arange(first, first + len(df_asset_movements))
+    # --- fact_inventory_movements ---
+    df_inventory_movements = pd.concat(inventory_batches, ignore_index=True)
+    first = first_id('fact_inventory_movements', len(df_inventory_movements))
+    df_inventory_movements['inventory_movement_id'] = np.arange(first, first + len(df_inventory_movements))
+    df_inventory_movements['material_document'] = [f"MDOC{i:08d}" for i in df_inventory_movements['inventory_movement_id']]
+    # --- fact_ar_open_items ---
+    df_ar_open_items = pd.concat(ar_batches, ignore_index=True)
+    first = first_id('fact_ar_open_items', len(df_ar_open_items))
+    df_ar_open_items['ar_item_id'] = np.arange(first, first + len(df_ar_open_items))
+    df_ar_open_items['document_number'] = [f"AR{i:08d}" for i in df_ar_open_items['ar_item_id']]
+    # --- fact_ap_open_items ---
+    df_ap_open_items = pd.concat(ap_batches, ignore_index=True)
+    first = first_id('fact_ap_open_items', len(df_ap_open_items))
+    df_ap_open_items['ap_item_id'] = np.arange(first, first + len(df_ap_open_items))
+    df_ap_open_items['document_number'] = [f"AP{i:08d}" for i in df_ap_open_items['ap_item_id']]
+    # --- fact_ar_clearings / fact_ap_clearings ---
+    df_ar_clearings = clear_carried_items(run_state, 'fact_ar_open_items', df_ar_open_items, ctx['end_date'])
+    df_ap_clearings = clear_carried_items(run_state, 'fact_ap_open_items', df_ap_open_items, ctx['end_date'])
+    return (df_gl_postings, df_asset_movements, df_inventory_movements, df_ar_open_items, df_ap_open_items,
+            df_ar_clearings, df_ap_clearings)
 
 # --- Main Execution ---
-if __name__ == "__main__":
+FACT_TABLES = ['fact_gl_postings', 'fact_asset_movements', 'fact_inventory_movements',
+               'fact_ar_open_items', 'fact_ap_open_items', 'fact_ar_clearings', 'fact_ap_clearings']
+
+def save_run_state(dimensions, asset_register, run_state, end_date):
+    """Saves what an appended run needs to continue after end_date."""
+    save_state(OUTPUT_DIR, 'coo', {
+        'end_date': end_date,
+        'dimensions': dimensions,
+        'asset_register': asset_register,
+        'run_state': run_state,
+        'random_state': random.getstate(),
+        'numpy_random_state': np.random.get_state(),
+        'faker_random_state': fake.random.getstate(),
+    })
+
+def generate_coo_dataset():
+    """Generates the full COO dataset into OUTPUT_DIR and saves its state for append runs."""
+    random.seed(SEED)
+    np.random.seed(SEED)
+    fake.seed(SEED)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    print(f"Generating data for period: {START_DATE} to {END_DATE} (Fiscal Year: April-March)")
-    print(f"Output directory: {OUTPUT_DIR}")
+    run_log.info(f"Generating data for period: {START_DATE} to {END_DATE} (Fiscal Year: April-March)",
+                 start_date=START_DATE, end_date=END_DATE, scale=SCALE, seed=SEED)
+    run_log.info(f"Output directory: {OUTPUT_DIR}")
     # 1. Generate Date Dimension
     df_dates = generate_dates(START_DATE, END_DATE)
-    df_dates.to_csv(os.path.join(OUTPUT_DIR, 'dim_date.csv'), index=False)
-    print(f"Generated dim_date: {len(df_dates)} rows")
+    save_table(df_dates, 'dim_date')
     # 2. Generate Master Data Dimensions
-    df_companies, df_gl_accounts, df_profit_centers, df_cost_centers, \
-    df_assets, df_materials, df_customers, df_vendors = generate_master_data(
-        NUM_COMPANIES, NUM_GL_ACCOUNTS, NUM_PROFIT_CENTERS, NUM_COST_CENTERS,
-        NUM_ASSETS, NUM_MATERIALS, NUM_CUSTOMERS, NUM_VENDORS
-    )
-    df_companies.to_csv(os.path.join(OUTPUT_DIR, 'dim_company_codes.csv'), index=False)
-    print(f"Generated dim_company_codes: {len(df_companies)} rows")
-    df_gl_accounts.to_csv(os.path.join(OUTPUT_DIR, 'dim_gl_accounts.csv'), index=False)
-    print(f"Generated dim_gl_accounts: {len(df_gl_accounts)} rows")
-    df_profit_centers.to_csv(os.path.join(OUTPUT_DIR, 'dim_profit_centers.csv'), index=False)
-    print(f"Generated dim_profit_centers: {len(df_profit_centers)} rows")
-    df_cost_centers.to_csv(os.path.join(OUTPUT_DIR, 'dim_cost_centers.csv'), index=False)
-    print(f"Generated dim_cost_centers: {len(df_cost_centers)} rows")
-    df_assets.to_csv(os.path.join(OUTPUT_DIR, 'dim_assets.csv'), index=False)
-    print(f"Generated dim_assets: {len(df_assets)} rows")
-    df_materials.to_csv(os.path.join(OUTPUT_DIR, 'dim_materials.csv'), index=False)
-    print(f"Generated dim_materials: {len(df_materials)} rows")
-    df_customers.to_csv(os.path.join(OUTPUT_DIR, 'dim_customers.csv'), index=False)
-    print(f"Generated dim_customers: {len(df_customers)} rows")
-    df_vendors.to_csv(os.path.join(OUTPUT_DIR, 'dim_vendors.csv'), index=False)
-    print(f"Generated dim_vendors: {len(df_vendors)} rows")
+    with run_log.stage("Generating master data") as stage:
+        df_companies, df_gl_accounts, df_profit_centers, df_cost_centers, \
+        df_assets, df_materials, df_customers, df_vendors = generate_master_data(
+            NUM_COMPANIES, NUM_GL_ACCOUNTS, NUM_PROFIT_CENTERS, NUM_COST_CENTERS,
+            NUM_ASSETS, NUM_MATERIALS, NUM_CUSTOMERS, NUM_VENDORS
+        )
+        stage.advance(save_table(df_companies, 'dim_company_codes'))
+        stage.advance(save_table(df_gl_accounts, 'dim_gl_accounts'))
+        stage.advance(save_table(df_profit_centers, 'dim_profit_centers'))
+        stage.advance(save_table(df_cost_centers, 'dim_cost_centers'))
+        stage.advance(save_table(df_materials, 'dim_materials'))
+        stage.advance(save_table(df_customers, 'dim_customers'))
+        stage.advance(save_table(df_vendors, 'dim_vendors'))
     # 3. Generate Fact Tables
+    asset_register = AssetRegister(df_assets)
+    run_state = {}
     df_gl_postings, df_asset_movements, df_inventory_movements, \
-    df_ar_open_items, df_ap_open_items = generate_fact_data(
+    df_ar_open_items, df_ap_open_items, df_ar_clearings, df_ap_clearings = generate_fact_data(
         df_dates, df_companies, df_gl_accounts, df_profit_centers, df_cost_centers,
-        df_assets, df_materials, df_customers, df_vendors
+        asset_register, df_materials, df_customers, df_vendors, run_state
     )
-    df_gl_postings.to_csv(os.path.join(OUTPUT_DIR, 'fact_gl_postings.csv'), index=False)
-    print(f"Generated fact_gl_postings: {len(df_gl_postings)} rows")
-    df_asset_movements.to_csv(os.path.join(OUTPUT_DIR, 'fact_asset_movements.csv'), index=False)
-    print(f"Generated fact_asset_movements: {len(df_asset_movements)} rows")
-    df_inventory_movements.to_csv(os.path.join(OUTPUT_DIR, 'fact_inventory_movements.csv'), index=False)
-    print(f"Generated fact_inventory_movements: {len(df_inventory_movements)} rows")
-    df_ar_open_items.to_csv(os.path.join(OUTPUT_DIR, 'fact_ar_open_items.csv'), index=False)
-    print(f"Generated fact_ar_open_items: {len(df_ar_open_items)} rows")
-    df_ap_open_items.to_csv(os.path.join(OUTPUT_DIR, 'fact_ap_open_items.csv'), index=False)
-    print(f"Generated fact_ap_open_items: {len(df_ap_open_items)} rows")
-    print("\nData generation complete! Check the 'cfo_demo_data' directory.")
+    with run_log.stage(f"Saving fact tables as {OUTPUT_FORMAT}") as stage:
+        # dim_assets is exported after the facts so it includes assets acquired during the period
+        df_assets = asset_register.to_frame()
+        stage.advance(save_table(df_assets, 'dim_assets'))
+        stage.advance(save_table(df_gl_postings, 'fact_gl_postings'))
+        stage.advance(save_table(df_asset_movements, 'fact_asset_movements'))
+        stage.advance(save_table(df_inventory_movements, 'fact_inventory_movements'))
+        stage.advance(save_table(df_ar_open_items, 'fact_ar_open_items'))
+        stage.advance(save_table(df_ap_open_items, 'fact_ap_open_items'))
+        # Empty after a full run; appended runs add the items they clear
+        stage.advance(save_table(df_ar_clearings, 'fact_ar_clearings'))
+        stage.advance(save_table(df_ap_clearings, 'fact_ap_clearings'))
+    output.close()
+    dimensions = {
+        'companies': df_companies, 'gl_accounts': df_gl_accounts, 'profit_centers': df_profit_centers,
+        'cost_centers': df_cost_centers, 'materials': df_materials, 'customers': df_customers, 'vendors': df_vendors
+    }
+    save_run_state(dimensions, asset_register, run_state, END_DATE)
+    run_log.info(f"\nData generation complete! Check the '{OUTPUT_DIR}' directory.")
+    run_log.finish()
+
+def append_coo_dataset(days):
+    """Extends the dataset in OUTPUT_DIR by the given number of days.
+
+    Continues from the state saved by the previous run: master data, the asset
+    register, id counters, volume normalizers, open AR/AP items and random
+    states. Only the new dates are generated; their rows are appended to
+    dim_date and the fact tables, and dim_assets is rewritten to include the
+    new acquisitions. Open items the new dates clear are appended to
+    fact_ar_clearings/fact_ap_clearings rather than rewritten in place.
+    """
+    state = load_state(OUTPUT_DIR, 'coo')
+    random.setstate(state['random_state'])
+    np.random.set_state(state['numpy_random_state'])
+    fake.random.setstate(state['faker_random_state'])
+    first_date, last_date = append_window(state['end_date'], days)
+    run_log.info(f"Appending data for period: {first_date} to {last_date}",
+                 start_date=first_date, end_date=last_date, scale=SCALE)
+    dimensions = state['dimensions']
+    asset_register = state['asset_register']
+    run_state = state['run_state']
+    df_dates = generate_dates(first_date, last_date)
+    save_table(df_dates, 'dim_date', append=True)
+    facts = generate_fact_data(
+        df_dates, dimensions['companies'], dimensions['gl_accounts'], dimensions['profit_centers'],
+        dimensions['cost_centers'], asset_register, dimensions['materials'], dimensions['customers'],
+        dimensions['vendors'], run_state
+    )
+    with run_log.stage(f"Appending fact tables to {OUTPUT_FORMAT}") as stage:
+        save_table(asset_register.to_frame(), 'dim_assets')
+        for table_name, df in zip(FACT_TABLES, facts):
+            if len(df):
+                stage.advance(save_table(df, table_name, append=True))
+    output.close()
+    save_run_state(dimensions, asset_register, run_state, last_date)
+    run_log.info(f"\nAppended {days} days; the dataset now ends on {last_date}.")
+    run_log.finish()
+
+if __name__ == "__main__":
+    if APPEND_DAYS > 0:
+        append_coo_dataset(APPEND_DAYS)
+    else:
+        generate_coo_dataset()
+
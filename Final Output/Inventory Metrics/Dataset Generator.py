@@ -1,24 +1,80 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import random
-from faker import Faker
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen.calendar import build_calendar, fiscal_year_and_period
+from datagen.config import scaled
+from datagen.lazy import LazyFaker, lazy_import
+from datagen.output import DatasetOutput
+from datagen.pools import FakerPools
+from datagen.progress import RunLog
+from datagen.sharding import iter_shards, month_shard_bounds, shard_random
+from datagen.state import append_window, continued_seed, load_state, save_state
+
+np = lazy_import("numpy")  # Imported on first use, so importing this module stays cheap
+pd = lazy_import("pandas")
 
 # --------------------------
 # CONFIGURATION (USER-EDITABLE)
 # --------------------------
-COMPANY_SIZE = "Enterprise"  # Options: Startup, SMB, Enterprise, Fortune500
+# Settings can be overridden through INVENTORY_* environment variables (see datagen.config)
+COMPANY_SIZE = os.environ.get("INVENTORY_COMPANY_SIZE", "Enterprise")  # Options: Startup, SMB, Enterprise, Fortune500
+SCALE = float(os.environ.get("INVENTORY_SCALE", "1"))  # Multiplies the size preset's master-data counts and daily volumes together
+START_DATE = datetime.fromisoformat(os.environ.get("INVENTORY_START_DATE", "2023-01-01"))
+END_DATE = datetime.fromisoformat(os.environ.get("INVENTORY_END_DATE", "2024-12-31"))
+SEED = int(os.environ.get("INVENTORY_SEED", "42"))
+OUTPUT_DIR = os.environ.get("INVENTORY_OUTPUT_DIR", ".")
 FISCAL_YEAR_START = "January"  # Options: January, April, October
+HOLIDAYS = None  # Options: None (weekends only), "us_federal" (see datagen.calendar), or a list of dates
 INDUSTRY = "Manufacturing"  # Options: Manufacturing, Retail, Healthcare
 SIMULATE_STOCKOUTS = False
 MULTI_CURRENCY = False
+GENERATE_STOCK_SNAPSHOTS = False  # Daily running MARD balance per key (large at Fortune500 size)
+TRANSACTION_VOLUME_SCALE = 1  # Multiplies daily goods receipts and sales orders
+CHUNK_ROWS = 50_000  # Sales items buffered before transaction tables are flushed to disk
+NUM_WORKERS = int(os.environ.get("INVENTORY_WORKERS", "1"))  # Processes for the month-sharded transaction loop; output is identical for any value
+OUTPUT_FORMAT = os.environ.get("INVENTORY_FORMAT", "csv")  # Options: csv, parquet, feather (parquet/feather need pyarrow)
+PARTITION_BY = None  # e.g. ("fiscal_year", "fiscal_period") to write transaction tables as Hive partitions with a _manifest.json
+PROFILE = os.environ.get("INVENTORY_PROFILE")  # Options: cprofile, pyinstrument (profiles every stage into OUTPUT_DIR/_profiles)
+APPEND_DAYS = int(os.environ.get("INVENTORY_APPEND_DAYS", "0"))  # >0: extend the dataset in this directory by this many days from its saved state
+
+# Column types for the Parquet/Feather backends (see datagen.output); unlisted columns are inferred
+AMOUNT = "decimal(18,2)"
+TABLE_SCHEMAS = {
+    "mard_stock_snapshots": {"snapshot_date": "date", "plant_id": "code", "material_id": "code",
+                             "storage_location": "code", "stock_value": AMOUNT, "fiscal_period": "int32"},
+    "mseg_movements": {"plant_id": "code", "material_id": "code", "movement_type": "code", "quantity": "int64",
+                       "amount": AMOUNT, "document_date": "date", "batch_number": "code",
+                       "storage_location": "code", "fiscal_period": "int32"},
+    "vbak_sales_orders": {"order_type": "code", "sales_org": "code", "distribution_channel": "code",
+                          "division": "code", "order_date": "date", "customer_id": "code", "fiscal_period": "int32"},
+    "vbap_sales_items": {"sales_order_item": "int32", "material_id": "code", "order_quantity": "int32",
+                         "plant_id": "code", "net_value": AMOUNT, "currency": "code"},
+    "lips_deliveries": {"delivery_item": "int32", "material_id": "code", "plant_id": "code",
+                        "delivery_quantity": "int32", "delivery_status": "code", "delivery_date": "date",
+                        "sales_order_item": "int32", "fiscal_period": "int32"},
+    "vbfa_document_flow": {"preceding_item": "int32", "subsequent_item": "int32", "document_category": "code",
+                           "quantity": "int32", "date": "date"}
+}
+# Tables partitioned when PARTITION_BY is set, with the date column their fiscal keys and manifest ranges come from
+# (vbap_sales_items takes its keys from the order header)
+PARTITIONED_TABLES = {
+    "mard_stock_snapshots": "snapshot_date",
+    "mseg_movements": "document_date",
+    "vbak_sales_orders": "order_date",
+    "vbap_sales_items": "order_date",
+    "lips_deliveries": "delivery_date",
+    "vbfa_document_flow": "date"
+}
+FISCAL_START_MONTHS = {"January": 1, "April": 4, "October": 10}
 
 # --------------------------
 # INITIALIZATION
 # --------------------------
-fake = Faker()
-np.random.seed(42)
-random.seed(42)
+fake = LazyFaker()  # Built on first use; the random streams are seeded by generate_inventory_dataset()
+pools = FakerPools('en_US', SEED, faker=fake) # Pre-generated company names, drawn with Faker's stream
 
 # Company Size Scaling
 size_params = {
@@ -28,29 +84,16 @@ size_params = {
     "Fortune500": {"plants": 10, "materials": 10000, "customers": 50000}
 }
 
-params = size_params[COMPANY_SIZE]
+if COMPANY_SIZE not in size_params:  # Same presets as datagen.config.COMPANY_SIZES, checked there for CLI runs
+    raise ValueError(f"Invalid INVENTORY_COMPANY_SIZE {COMPANY_SIZE!r}; expected one of {list(size_params)}")
+params = {name: scaled(count, SCALE) for name, count in size_params[COMPANY_SIZE].items()}
 
 # --------------------------
 # HELPER FUNCTIONS
 # --------------------------
-def generate_dates(start_date, end_date):
-    """Generate business days only"""
-    dates = []
-    current = start_date
-    while current <= end_date:
-        if current.weekday() < 5:  # Weekdays
-            dates.append(current)
-        current += timedelta(days=1)
-    return dates
-
-def get_fiscal_period(date):
-    """Dynamic fiscal period calculation"""
-    if FISCAL_YEAR_START == "January":
-        return date.month
-    elif FISCAL_YEAR_START == "April":
-        return (date.month - 3) % 12 or 12
-    else:  # October
-        return (date.month + 3) % 12 or 12
+def build_inventory_calendar(start_date, end_date):
+    """Shared, memoized calendar of the run (see datagen.calendar)"""
+    return build_calendar(start_date, end_date, FISCAL_START_MONTHS[FISCAL_YEAR_START], HOLIDAYS)
 
 def apply_seasonality(date, base_value):
     """Apply seasonal adjustments"""
@@ -67,334 +110,526 @@ def apply_seasonality(date, base_value):
     else:
         return base_value
 
-# --------------------------
-# DIMENSION TABLES
-# --------------------------
-print("Generating dimension tables...")
-
-# Plant Dimension
-plants = pd.DataFrame({
-    "plant_id": range(1, params["plants"] + 1),
-    "plant_name": [f"Plant {i}" for i in range(1, params["plants"] + 1)],
-    "region": random.choices(["North", "South", "East", "West"], k=params["plants"]),
-    "is_active": True
-})
-
-# Material Dimension
-material_types = ["RAW", "SEMI", "FINISHED"]
-product_groups = ["A", "B", "C", "D"]
-
-materials = pd.DataFrame({
-    "material_id": [f"MAT-{str(i).zfill(5)}" for i in range(1, params["materials"] + 1)],
-    "material_name": [f"Material {i}" for i in range(1, params["materials"] + 1)],
-    "material_type": random.choices(material_types, 
-                                  weights=[0.5, 0.3, 0.2], 
-                                  k=params["materials"]),
-    "product_group": random.choices(product_groups, k=params["materials"]),
-    "uom": "EA"
-})
-
-# Customer Dimension
-customers = pd.DataFrame({
-    "customer_id": [f"CUST-{str(i).zfill(5)}" for i in range(1, params["customers"] + 1)],
-    "customer_name": [fake.company() for _ in range(params["customers"])],
-    "customer_tier": random.choices(["A", "B", "C"], 
-                                  weights=[0.2, 0.3, 0.5], 
-                                  k=params["customers"]),
-    "payment_terms": random.choices(["NET30", "NET45", "NET60"], 
-                                   weights=[0.7, 0.2, 0.1], 
-                                   k=params["customers"])
-})
+output = DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES,
+                       fiscal_year_start_month=FISCAL_START_MONTHS[FISCAL_YEAR_START])
+run_log = RunLog("inventory", OUTPUT_DIR, PROFILE)
+
+def open_transaction_writer(table_name):
+    """Chunk writer for a transaction table in OUTPUT_FORMAT (appending on an append run)"""
+    return output.open(table_name, append=APPEND_DAYS > 0)
+
+def save_table(df, table_name, append=False):
+    """Write a whole table in OUTPUT_FORMAT and return its row count"""
+    rows = output.write(df, table_name, append=append)
+    run_log.saved(table_name, rows, output.path(table_name), append=append)
+    return rows
+
+def introduce_data_issues(df, col, issue_rate, issue_type="null", rng=None):
+    """Introduce controlled data quality issues (rows picked with the numpy Generator rng)"""
+    idx = df.sample(frac=issue_rate, random_state=rng).index
+    if issue_type == "null":
+        df.loc[idx, col] = None
+    elif issue_type == "zero":
+        df.loc[idx, col] = 0
+    return df
 
 # Storage Locations
 storage_locs = ["A001", "B001", "C001", "WH01", "WH02"]
+stock_keys = ["plant_id", "material_id", "storage_location"]
+
+# --------------------------
+# DIMENSION TABLES
+# --------------------------
+def generate_dimension_tables():
+    """Plant, material and customer dimensions"""
+    # Plant Dimension
+    plants = pd.DataFrame({
+        "plant_id": range(1, params["plants"] + 1),
+        "plant_name": [f"Plant {i}" for i in range(1, params["plants"] + 1)],
+        "region": random.choices(["North", "South", "East", "West"], k=params["plants"]),
+        "is_active": True
+    })
+
+    # Material Dimension
+    material_types = ["RAW", "SEMI", "FINISHED"]
+    product_groups = ["A", "B", "C", "D"]
+
+    materials = pd.DataFrame({
+        "material_id": [f"MAT-{str(i).zfill(5)}" for i in range(1, params["materials"] + 1)],
+        "material_name": [f"Material {i}" for i in range(1, params["materials"] + 1)],
+        "material_type": random.choices(material_types, 
+                                      weights=[0.5, 0.3, 0.2], 
+                                      k=params["materials"]),
+        "product_group": random.choices(product_groups, k=params["materials"]),
+        "uom": "EA"
+    })
+
+    # Customer Dimension
+    customers = pd.DataFrame({
+        "customer_id": [f"CUST-{str(i).zfill(5)}" for i in range(1, params["customers"] + 1)],
+        "customer_name": pools.sample("company", params["customers"]),
+        "customer_tier": random.choices(["A", "B", "C"], 
+                                      weights=[0.2, 0.3, 0.5], 
+                                      k=params["customers"]),
+        "payment_terms": random.choices(["NET30", "NET45", "NET60"], 
+                                       weights=[0.7, 0.2, 0.1], 
+                                       k=params["customers"])
+    })
+    return plants, materials, customers
 
 # --------------------------
 # MASTER DATA TABLES
 # --------------------------
-print("Generating master data tables...")
-
-# Material Valuation (MBEW)
-mbew = []
-for _, mat in materials.iterrows():
-    for plant_id in plants["plant_id"]:
-        std_price = round(random.uniform(10, 500), 2)
-        mbew.append({
-            "material_id": mat["material_id"],
-            "plant_id": plant_id,
-            "valuation_area": "1000",
-            "standard_price": std_price,
-            "moving_avg_price": round(std_price * random.uniform(0.95, 1.05), 2),
-            "price_unit": 1,
-            "currency": "USD"
-        })
-mbew = pd.DataFrame(mbew)
-
-# Initial Stock Levels (MARD)
-mard = []
-for _, mat in materials.iterrows():
-    for plant_id in plants["plant_id"]:
-        for loc in random.sample(storage_locs, k=2):  # 2 random locs per plant-material
-            avg_demand = random.randint(100, 1000)
-            mard.append({
+def generate_master_data_tables(plants, materials):
+    """Material valuation (MBEW) and initial stock levels (MARD)"""
+    # Material Valuation (MBEW)
+    mbew = []
+    for _, mat in materials.iterrows():
+        for plant_id in plants["plant_id"]:
+            std_price = round(random.uniform(10, 500), 2)
+            mbew.append({
                 "material_id": mat["material_id"],
                 "plant_id": plant_id,
-                "storage_location": loc,
-                "unrestricted_stock": avg_demand * 1.5,  # Initial stock
-                "quality_insp": random.randint(0, 50),
-                "blocked_stock": random.randint(0, 100) if SIMULATE_STOCKOUTS else 0,
-                "safety_stock": round(avg_demand * 0.2),
-                "last_count_date": None
+                "valuation_area": "1000",
+                "standard_price": std_price,
+                "moving_avg_price": round(std_price * random.uniform(0.95, 1.05), 2),
+                "price_unit": 1,
+                "currency": "USD"
             })
-mard = pd.DataFrame(mard)
+    mbew = pd.DataFrame(mbew)
+
+    # Initial Stock Levels (MARD)
+    mard = []
+    for _, mat in materials.iterrows():
+        for plant_id in plants["plant_id"]:
+            for loc in random.sample(storage_locs, k=2):  # 2 random locs per plant-material
+                avg_demand = random.randint(100, 1000)
+                mard.append({
+                    "material_id": mat["material_id"],
+                    "plant_id": plant_id,
+                    "storage_location": loc,
+                    "unrestricted_stock": avg_demand * 1.5,  # Initial stock
+                    "quality_insp": random.randint(0, 50),
+                    "blocked_stock": random.randint(0, 100) if SIMULATE_STOCKOUTS else 0,
+                    "safety_stock": round(avg_demand * 0.2),
+                    "last_count_date": None
+                })
+    mard = pd.DataFrame(mard)
+    return mbew, mard
 
 # --------------------------
 # TRANSACTION GENERATION
 # --------------------------
-print("Generating transactional data...")
-
-dates = generate_dates(datetime(2023, 1, 1), datetime(2024, 12, 31))
-mseg_data = []
-vbak_data = []
-vbap_data = []
-lips_data = []
-vbfa_data = []
-
-for date in dates:
-    # Daily volume adjustments
-    daily_factor = apply_seasonality(date, 1.0)
+def generate_transaction_shard(shard, seed_sequence, plant_ids, material_ids, customer_ids, std_price_index):
+    """MSEG, VBAK, VBAP, LIPS and VBFA rows for the business days of one month shard
+
+    Each shard draws from its own random stream (see datagen.sharding), so its
+    rows depend only on the seed and the month, not on the number of workers.
+    """
+    rnd = shard_random(seed_sequence)
+    mseg_data = []
+    vbak_data = []
+    vbap_data = []
+    lips_data = []
+    vbfa_data = []
+
+    for date, fiscal_period in zip(*shard):
+        # Daily volume adjustments
+        daily_factor = apply_seasonality(date, 1.0) * TRANSACTION_VOLUME_SCALE * SCALE
     
-    # Goods Receipts (MSEG 101)
-    gr_count = int(round(random.randint(10, 20) * daily_factor))
-    for _ in range(gr_count):
-        plant = random.choice(plants["plant_id"])
-        mat = random.choice(materials["material_id"])
-        std_price = mbew[(mbew["plant_id"] == plant) & 
-                        (mbew["material_id"] == mat)]["standard_price"].values[0]
+        # Goods Receipts (MSEG 101)
+        gr_count = int(round(rnd.randint(10, 20) * daily_factor))
+        for _ in range(gr_count):
+            plant = rnd.choice(plant_ids)
+            mat = rnd.choice(material_ids)
+            std_price = std_price_index[(plant, mat)]
         
-        # Manufacturing yield loss simulation
-        ordered_qty = random.randint(50, 500)
-        if INDUSTRY == "Manufacturing":
-            received_qty = round(ordered_qty * random.uniform(0.9, 1.0))
-        else:
-            received_qty = ordered_qty
+            # Manufacturing yield loss simulation
+            ordered_qty = rnd.randint(50, 500)
+            if INDUSTRY == "Manufacturing":
+                received_qty = round(ordered_qty * rnd.uniform(0.9, 1.0))
+            else:
+                received_qty = ordered_qty
             
-        mseg_data.append({
-            "plant_id": plant,
-            "material_id": mat,
-            "movement_type": "101",
-            "quantity": received_qty,
-            "amount": received_qty * std_price,
-            "document_date": date,
-            "batch_number": f"BATCH-{date.strftime('%Y%m%d')}" if random.random() > 0.05 else None,
-            "storage_location": random.choice(storage_locs) if random.random() > 0.03 else None,
-            "fiscal_period": get_fiscal_period(date)
-        })
+            mseg_data.append({
+                "plant_id": plant,
+                "material_id": mat,
+                "movement_type": "101",
+                "quantity": received_qty,
+                "amount": received_qty * std_price,
+                "document_date": date,
+                "batch_number": f"BATCH-{date.strftime('%Y%m%d')}" if rnd.random() > 0.05 else None,
+                "storage_location": rnd.choice(storage_locs) if rnd.random() > 0.03 else None,
+                "fiscal_period": fiscal_period
+            })
     
-    # Sales Orders (VBAK/VBAP)
-    so_count = int(round(random.randint(15, 30) * daily_factor))
-    for _ in range(so_count):
-        order_id = f"OR{date.strftime('%Y%m%d%H%M%S')}{random.randint(1000,9999)}"
-        customer = random.choice(customers["customer_id"])
-        
-        vbak_data.append({
-            "sales_order": order_id,
-            "order_type": "OR",
-            "sales_org": "1000",
-            "distribution_channel": "10",
-            "division": "00",
-            "order_date": date,
-            "customer_id": customer,
-            "fiscal_period": get_fiscal_period(date)
-        })
+        # Sales Orders (VBAK/VBAP)
+        so_count = int(round(rnd.randint(15, 30) * daily_factor))
+        for _ in range(so_count):
+            order_id = f"OR{date.strftime('%Y%m%d%H%M%S')}{rnd.randint(1000,9999)}"
+            customer = rnd.choice(customer_ids)
         
-        # Order Items (1-5 per order)
-        for item in range(1, random.randint(2, 6)):
-            plant = random.choice(plants["plant_id"])
-            mat = random.choice(materials["material_id"])
-            std_price = mbew[(mbew["plant_id"] == plant) & 
-                            (mbew["material_id"] == mat)]["standard_price"].values[0]
-            qty = random.randint(1, 50)
-            price = std_price * 1.2  # 20% margin
-            
-            vbap_data.append({
+            vbak_data.append({
                 "sales_order": order_id,
-                "sales_order_item": item,
-                "material_id": mat,
-                "order_quantity": qty,
-                "plant_id": plant,
-                "net_value": qty * price,
-                "currency": "USD"
+                "order_type": "OR",
+                "sales_org": "1000",
+                "distribution_channel": "10",
+                "division": "00",
+                "order_date": date,
+                "customer_id": customer,
+                "fiscal_period": fiscal_period
             })
+        
+            # Order Items (1-5 per order)
+            for item in range(1, rnd.randint(2, 6)):
+                plant = rnd.choice(plant_ids)
+                mat = rnd.choice(material_ids)
+                std_price = std_price_index[(plant, mat)]
+                qty = rnd.randint(1, 50)
+                price = std_price * 1.2  # 20% margin
             
-            # Delivery Processing (LIPS)
-            delivery_status = random.choices(
-                ["A", "B", "C"], 
-                weights=[0.8, 0.15, 0.05]
-            )[0]
+                vbap_data.append({
+                    "sales_order": order_id,
+                    "sales_order_item": item,
+                    "material_id": mat,
+                    "order_quantity": qty,
+                    "plant_id": plant,
+                    "net_value": qty * price,
+                    "currency": "USD"
+                })
+            
+                # Delivery Processing (LIPS)
+                delivery_status = rnd.choices(
+                    ["A", "B", "C"], 
+                    weights=[0.8, 0.15, 0.05]
+                )[0]
             
-            if delivery_status == "A":  # Complete
-                delivery_qty = qty
-            elif delivery_status == "B":  # Partial
-                # Only allow partial if qty > 1, else treat as backorder
-                if qty > 1:
-                    delivery_qty = random.randint(1, qty - 1)
-                else:
+                if delivery_status == "A":  # Complete
+                    delivery_qty = qty
+                elif delivery_status == "B":  # Partial
+                    # Only allow partial if qty > 1, else treat as backorder
+                    if qty > 1:
+                        delivery_qty = rnd.randint(1, qty - 1)
+                    else:
+                        delivery_qty = 0
+                else:  # Backorder
                     delivery_qty = 0
-            else:  # Backorder
-                delivery_qty = 0
                 
-            delivery_id = f"DL{date.strftime('%Y%m%d%H%M%S')}{random.randint(1000,9999)}"
-            lips_data.append({
-                "delivery_id": delivery_id,
-                "delivery_item": item,
-                "material_id": mat,
-                "plant_id": plant,
-                "delivery_quantity": delivery_qty,
-                "delivery_status": delivery_status,
-                "delivery_date": date + timedelta(days=random.randint(1, 3)),
-                "sales_order": order_id,
-                "sales_order_item": item,
-                "fiscal_period": get_fiscal_period(date)
-            })
-            
-            # Goods Issue for Delivery (MSEG 261)
-            if delivery_qty > 0:
-                mseg_data.append({
-                    "plant_id": plant,
+                delivery_id = f"DL{date.strftime('%Y%m%d%H%M%S')}{rnd.randint(1000,9999)}"
+                lips_data.append({
+                    "delivery_id": delivery_id,
+                    "delivery_item": item,
                     "material_id": mat,
-                    "movement_type": "261",
-                    "quantity": -delivery_qty,
-                    "amount": -delivery_qty * std_price,
-                    "document_date": date + timedelta(days=random.randint(1, 3)),
-                    "batch_number": None,
-                    "storage_location": random.choice(storage_locs),
-                    "fiscal_period": get_fiscal_period(date)
+                    "plant_id": plant,
+                    "delivery_quantity": delivery_qty,
+                    "delivery_status": delivery_status,
+                    "delivery_date": date + timedelta(days=rnd.randint(1, 3)),
+                    "sales_order": order_id,
+                    "sales_order_item": item,
+                    "fiscal_period": fiscal_period
                 })
             
-            # Document Flow (VBFA)
-            vbfa_data.append({
-                "preceding_doc": order_id,
-                "preceding_item": item,
-                "subsequent_doc": delivery_id,
-                "subsequent_item": item,
-                "document_category": "C",
-                "quantity": qty,
-                "date": date
-            })
+                # Goods Issue for Delivery (MSEG 261)
+                if delivery_qty > 0:
+                    mseg_data.append({
+                        "plant_id": plant,
+                        "material_id": mat,
+                        "movement_type": "261",
+                        "quantity": -delivery_qty,
+                        "amount": -delivery_qty * std_price,
+                        "document_date": date + timedelta(days=rnd.randint(1, 3)),
+                        "batch_number": None,
+                        "storage_location": rnd.choice(storage_locs),
+                        "fiscal_period": fiscal_period
+                    })
             
-            # Backorder Creation if applicable
-            if delivery_status in ["B", "C"]:
-                backorder_qty = qty - delivery_qty
+                # Document Flow (VBFA)
                 vbfa_data.append({
-                    "preceding_doc": delivery_id,
+                    "preceding_doc": order_id,
                     "preceding_item": item,
-                    "subsequent_doc": f"BO{delivery_id}",
+                    "subsequent_doc": delivery_id,
                     "subsequent_item": item,
-                    "document_category": "N",
-                    "quantity": backorder_qty,
-                    "date": date + timedelta(days=1)
+                    "document_category": "C",
+                    "quantity": qty,
+                    "date": date
                 })
-
-# Create DataFrames
-mseg = pd.DataFrame(mseg_data)
-vbak = pd.DataFrame(vbak_data)
-vbap = pd.DataFrame(vbap_data)
-lips = pd.DataFrame(lips_data)
-vbfa = pd.DataFrame(vbfa_data)
+            
+                # Backorder Creation if applicable
+                if delivery_status in ["B", "C"]:
+                    backorder_qty = qty - delivery_qty
+                    vbfa_data.append({
+                        "preceding_doc": delivery_id,
+                        "preceding_item": item,
+                        "subsequent_doc": f"BO{delivery_id}",
+                        "subsequent_item": item,
+                        "document_category": "N",
+                        "quantity": backorder_qty,
+                        "date": date + timedelta(days=1)
+                    })
+
+    return mseg_data, vbak_data, vbap_data, lips_data, vbfa_data
+
+def generate_transactions(calendar, plants, materials, customers, std_price_index, seed, stage):
+    """Generates the transaction tables for the calendar's business days, streaming them to disk
+
+    Month shards run on NUM_WORKERS processes with random streams spawned from
+    the SeedSequence seed. Their rows are written in chunks of about CHUNK_ROWS
+    sales items as they arrive; stock and KPI inputs are aggregated chunk by
+    chunk. Returns the net and daily stock movement chunks, the KPI totals and
+    the rows written per table.
+    """
+    dates = list(calendar.business_days.to_pydatetime())
+    fiscal_periods = calendar.fiscal_month[calendar.is_business_day].tolist()
+    shards_seed, issues_seed = seed.spawn(2)
+    issues_rng = np.random.default_rng(issues_seed)  # Data quality issues, drawn per written chunk
+    mseg_data = []
+    vbak_data = []
+    vbap_data = []
+    lips_data = []
+    vbfa_data = []
+
+    transaction_writers = {
+        "mseg": open_transaction_writer("mseg_movements"),
+        "vbak": open_transaction_writer("vbak_sales_orders"),
+        "vbap": open_transaction_writer("vbap_sales_items"),
+        "lips": open_transaction_writer("lips_deliveries"),
+        "vbfa": open_transaction_writer("vbfa_document_flow")
+    }
+    net_movement_chunks = []
+    daily_movement_chunks = []
+    transaction_totals = {"cogs": 0.0, "complete_deliveries": 0, "last_movement_date": dates[0]}
+
+    def write_transaction_chunk():
+        """Writes the buffered transaction rows and folds them into the running aggregates"""
+        mseg_chunk = pd.DataFrame(mseg_data)
+        lips_chunk = pd.DataFrame(lips_data)
+    
+        # Stock movements are aggregated before data issues blank out storage locations
+        net_movement_chunks.append(mseg_chunk.groupby(stock_keys)["quantity"].sum())
+        if GENERATE_STOCK_SNAPSHOTS:
+            movement_dates = pd.to_datetime(mseg_chunk["document_date"]).dt.normalize()
+            daily_movement_chunks.append(mseg_chunk.assign(snapshot_date=movement_dates).groupby(
+                stock_keys + ["snapshot_date"])["quantity"].sum())
+        transaction_totals["cogs"] += mseg_chunk.loc[mseg_chunk["movement_type"] == "261", "amount"].abs().sum()
+        transaction_totals["complete_deliveries"] += int((lips_chunk["delivery_status"] == "A").sum())
+        transaction_totals["last_movement_date"] = max(transaction_totals["last_movement_date"], mseg_chunk["document_date"].max())
+    
+        mseg_chunk = introduce_data_issues(mseg_chunk, "batch_number", 0.05, rng=issues_rng)
+        mseg_chunk = introduce_data_issues(mseg_chunk, "storage_location", 0.03, rng=issues_rng)
+        lips_chunk = introduce_data_issues(lips_chunk, "delivery_quantity", 0.02, "zero", rng=issues_rng)
+        transaction_writers["mseg"].write(mseg_chunk)
+        vbak_chunk = pd.DataFrame(vbak_data)
+        vbap_chunk = pd.DataFrame(vbap_data)
+        transaction_writers["vbak"].write(vbak_chunk)
+        if output.is_partitioned("vbap_sales_items"):
+            # Order ids embed the order date, so colliding ids still resolve to the right period
+            order_headers = vbak_chunk.drop_duplicates("sales_order")
+            order_keys = vbap_chunk[["sales_order"]].merge(order_headers, on="sales_order", how="left")
+            transaction_writers["vbap"].write(vbap_chunk, keys=order_keys)
+        else:
+            transaction_writers["vbap"].write(vbap_chunk)
+        transaction_writers["lips"].write(lips_chunk)
+        transaction_writers["vbfa"].write(pd.DataFrame(vbfa_data))
+        for rows in (mseg_data, vbak_data, vbap_data, lips_data, vbfa_data):
+            rows.clear()
+
+    shards = [(dates[start:stop], fiscal_periods[start:stop]) for start, stop in month_shard_bounds(dates)]
+    shard_results = iter_shards(generate_transaction_shard, shards, shards_seed, workers=NUM_WORKERS,
+                                plant_ids=plants["plant_id"].tolist(), material_ids=materials["material_id"].tolist(),
+                                customer_ids=customers["customer_id"].tolist(), std_price_index=std_price_index)
+    for shard_idx, shard_rows in enumerate(shard_results):
+        for rows, new_rows in zip((mseg_data, vbak_data, vbap_data, lips_data, vbfa_data), shard_rows):
+            rows.extend(new_rows)
+        if len(vbap_data) >= CHUNK_ROWS or shard_idx == len(shards) - 1:
+            stage.advance(sum(map(len, (mseg_data, vbak_data, vbap_data, lips_data, vbfa_data))))
+            write_transaction_chunk()
+        stage.advance(units=len(shards[shard_idx][0]))
+
+    for writer in transaction_writers.values():
+        writer.close()
+    rows = {name: writer.rows for name, writer in transaction_writers.items()}
+    return net_movement_chunks, daily_movement_chunks, transaction_totals, rows
 
 # --------------------------
 # STOCK LEVEL UPDATES
 # --------------------------
-print("Updating stock levels...")
-
-# Simulate daily stock changes
-for _, row in mseg.iterrows():
-    plant = row["plant_id"]
-    mat = row["material_id"]
-    loc = row["storage_location"]
-    qty = row["quantity"]
+def update_stock_levels(mard, net_movement_chunks):
+    """MARD with the net movement per stock key applied in one merge
+
+    (movements without a storage location or MARD record don't post stock)
+    """
+    net_movements = pd.concat(net_movement_chunks).groupby(level=stock_keys).sum().reset_index()
+    mard = mard.merge(net_movements, on=stock_keys, how="left")
+    mard["unrestricted_stock"] += mard.pop("quantity").fillna(0)
+    return mard
+
+def build_stock_snapshots(opening_stock, daily_movement_chunks, snapshot_start, last_movement_date, std_price_index):
+    """Daily running balance per key from the same movements, from snapshot_start to the last movement"""
+    daily_movements = pd.concat(daily_movement_chunks).groupby(level=stock_keys + ["snapshot_date"]).sum()
+    
+    snapshot_dates = pd.date_range(snapshot_start, pd.Timestamp(last_movement_date).normalize(), freq="D")
+    key_index = pd.MultiIndex.from_frame(opening_stock[stock_keys])
+    key_pos = key_index.get_indexer(daily_movements.index.droplevel("snapshot_date"))
+    day_pos = snapshot_dates.searchsorted(daily_movements.index.get_level_values("snapshot_date"))
+    posted = (key_pos >= 0) & (day_pos < len(snapshot_dates))
     
-    mask = ((mard["plant_id"] == plant) & 
-            (mard["material_id"] == mat) & 
-            (mard["storage_location"] == loc))
+    stock_changes = np.zeros((len(key_index), len(snapshot_dates)))
+    np.add.at(stock_changes, (key_pos[posted], day_pos[posted]), daily_movements.to_numpy()[posted])
+    balances = opening_stock["unrestricted_stock"].to_numpy()[:, None] + np.cumsum(stock_changes, axis=1)
     
-    if not mard[mask].empty:
-        mard.loc[mask, "unrestricted_stock"] += qty
+    key_prices = np.array([std_price_index[key] for key in zip(opening_stock["plant_id"], opening_stock["material_id"])])
+    num_days = len(snapshot_dates)
+    stock_snapshots = pd.DataFrame({
+        "snapshot_date": np.tile(snapshot_dates.values, len(key_index)),
+        "plant_id": np.repeat(opening_stock["plant_id"].to_numpy(), num_days),
+        "material_id": np.repeat(opening_stock["material_id"].to_numpy(), num_days),
+        "storage_location": np.repeat(opening_stock["storage_location"].to_numpy(), num_days),
+        "unrestricted_stock": balances.ravel(),
+        "stock_value": (balances * key_prices[:, None]).ravel().round(2),
+        "fiscal_period": np.tile(fiscal_year_and_period(snapshot_dates, FISCAL_START_MONTHS[FISCAL_YEAR_START])[1].to_numpy("int64"),
+                                 len(key_index))
+    })
+    return stock_snapshots, snapshot_dates
 
 # --------------------------
-# DATA QUALITY CHECKS
+# MAIN
 # --------------------------
-print("Running data quality checks...")
-
-# 1. Negative Stock Simulation (if enabled)
-if SIMULATE_STOCKOUTS:
-    for _, row in mard.iterrows():
-        if row["unrestricted_stock"] < 0:
-            mard.loc[_, "blocked_stock"] += abs(row["unrestricted_stock"])
-            mard.loc[_, "unrestricted_stock"] = 0
-
-# 2. Add random data issues
-def introduce_data_issues(df, col, issue_rate, issue_type="null"):
-    """Introduce controlled data quality issues"""
-    idx = df.sample(frac=issue_rate).index
-    if issue_type == "null":
-        df.loc[idx, col] = None
-    elif issue_type == "zero":
-        df.loc[idx, col] = 0
-    return df
-
-mseg = introduce_data_issues(mseg, "batch_number", 0.05)
-mseg = introduce_data_issues(mseg, "storage_location", 0.03)
-lips = introduce_data_issues(lips, "delivery_quantity", 0.02, "zero")
+def generate_inventory_dataset():
+    """Generates the inventory dataset into OUTPUT_DIR, or with APPEND_DAYS > 0 extends the saved one"""
+    random.seed(SEED)  # Master data; transactions draw from SeedSequence streams (see generate_transactions)
+    fake.seed(SEED)
+    run_log.event("run_start", company_size=COMPANY_SIZE, scale=SCALE, seed=SEED, append_days=APPEND_DAYS)
+    if APPEND_DAYS > 0:
+        # Continue the saved run: master data, closing stock and the seed children already spawned
+        with run_log.stage("Loading saved state"):
+            saved_state = load_state(OUTPUT_DIR, "inventory")
+            plants, materials, customers, mbew, mard = (saved_state[name] for name in ("plants", "materials", "customers", "mbew", "mard"))
+    else:
+        with run_log.stage("Generating dimension tables") as stage:
+            plants, materials, customers = generate_dimension_tables()
+            stage.advance(len(plants) + len(materials) + len(customers))
+        with run_log.stage("Generating master data tables") as stage:
+            mbew, mard = generate_master_data_tables(plants, materials)
+            stage.advance(len(mbew) + len(mard))
+
+    # (plant, material) -> standard price, so transactions don't scan MBEW
+    std_price_index = dict(zip(zip(mbew["plant_id"], mbew["material_id"]), mbew["standard_price"]))
+
+    if APPEND_DAYS > 0:
+        start_date, end_date = append_window(saved_state["end_date"], APPEND_DAYS)
+    else:
+        start_date, end_date = START_DATE, END_DATE
+    calendar = build_inventory_calendar(start_date, end_date)
+    dates = calendar.business_days
+    if not len(dates):
+        raise ValueError(f"No business days to append between {start_date.date()} and {end_date.date()}")
+    root_seed = continued_seed(SEED, saved_state["seed_children"] if APPEND_DAYS > 0 else 0)
+    with run_log.stage("Generating transactional data", total=len(dates)) as stage:
+        net_movement_chunks, daily_movement_chunks, transaction_totals, transaction_rows = generate_transactions(
+            calendar, plants, materials, customers, std_price_index, root_seed, stage)
+
+    with run_log.stage("Updating stock levels") as stage:
+        opening_stock = mard[stock_keys + ["unrestricted_stock"]].copy()
+        mard = update_stock_levels(mard, net_movement_chunks)
+        stage.advance(len(mard))
+
+    if GENERATE_STOCK_SNAPSHOTS:
+        with run_log.stage("Building daily stock snapshots") as stage:
+            # An appended run starts the day after the previous run's last snapshot; its
+            # movements dated earlier than that post on the first new day
+            snapshot_start = dates[0]
+            if APPEND_DAYS > 0 and saved_state["snapshot_end"] is not None:
+                snapshot_start = saved_state["snapshot_end"] + timedelta(days=1)
+            stock_snapshots, snapshot_dates = build_stock_snapshots(
+                opening_stock, daily_movement_chunks, snapshot_start, transaction_totals["last_movement_date"],
+                std_price_index)
+            stage.advance(len(stock_snapshots))
+
+    # --------------------------
+    # DATA QUALITY CHECKS
+    # --------------------------
+    with run_log.stage("Running data quality checks"):
+        # 1. Negative Stock Simulation (if enabled)
+        if SIMULATE_STOCKOUTS:
+            for _, row in mard.iterrows():
+                if row["unrestricted_stock"] < 0:
+                    mard.loc[_, "blocked_stock"] += abs(row["unrestricted_stock"])
+                    mard.loc[_, "unrestricted_stock"] = 0
+
+        # 2. Random data issues are introduced per transaction chunk before it is written
+
+    # --------------------------
+    # EXPORT TO CSV
+    # --------------------------
+    with run_log.stage(f"Exporting to {OUTPUT_FORMAT}") as stage:
+        # Dimension Tables (an appended run keeps the ones already written)
+        if APPEND_DAYS == 0:
+            stage.advance(save_table(plants, "dim_plants"))
+            stage.advance(save_table(materials, "dim_materials"))
+            stage.advance(save_table(customers, "dim_customers"))
+
+        # Master Data Tables (MARD is rewritten with the closing stock)
+        if APPEND_DAYS == 0:
+            stage.advance(save_table(mbew, "mbew_valuation"))
+        stage.advance(save_table(mard, "mard_stock"))
+        if GENERATE_STOCK_SNAPSHOTS:
+            stage.advance(save_table(stock_snapshots, "mard_stock_snapshots", append=APPEND_DAYS > 0))
+
+        # Transaction Tables were streamed during generation
+        output.close()
+
+        # State for a later append run
+        snapshot_end = saved_state["snapshot_end"] if APPEND_DAYS > 0 else None
+        if GENERATE_STOCK_SNAPSHOTS and len(snapshot_dates):
+            snapshot_end = snapshot_dates[-1].to_pydatetime()
+        save_state(OUTPUT_DIR, "inventory", {
+            "end_date": end_date,
+            "snapshot_end": snapshot_end,
+            "plants": plants,
+            "materials": materials,
+            "customers": customers,
+            "mbew": mbew,
+            "mard": mard,
+            "seed_children": root_seed.n_children_spawned
+        })
 
-# --------------------------
-# EXPORT TO CSV
-# --------------------------
-print("Exporting to CSV...")
+    # --------------------------
+    # VALIDATION REPORT
+    # --------------------------
+    run_log.info("\nData Generation Complete!")
+    run_log.info(f"\n=== Dataset Summary ({COMPANY_SIZE} Size) ===")
+    run_log.info(f"Plants: {len(plants)}")
+    run_log.info(f"Materials: {len(materials)}")
+    run_log.info(f"Customers: {len(customers)}")
+    run_log.info(f"Date Range: {dates[0].date()} to {dates[-1].date()}")
+    run_log.info(f"\n=== Transaction Volumes ===")
+    num_sales_orders = transaction_rows["vbak"]
+    num_deliveries = transaction_rows["lips"]
+    run_log.info(f"Goods Movements (MSEG): {transaction_rows['mseg']:,}")
+    run_log.info(f"Sales Orders (VBAK): {num_sales_orders:,}")
+    run_log.info(f"Deliveries (LIPS): {num_deliveries:,}")
+    run_log.info(f"Document Flows (VBFA): {transaction_rows['vbfa']:,}")
+    if GENERATE_STOCK_SNAPSHOTS:
+        run_log.info(f"Stock Snapshots (MARD daily): {len(stock_snapshots):,}")
+
+    # Calculate sample KPIs
+    sample_cogs = transaction_totals["cogs"]
+    if GENERATE_STOCK_SNAPSHOTS:
+        avg_inv = stock_snapshots.groupby("snapshot_date")["stock_value"].sum().mean()
+    else:
+        avg_inv = (mard["unrestricted_stock"] * mard.merge(mbew, on=["plant_id", "material_id"])["standard_price"]).mean()
+    turnover = sample_cogs / avg_inv
 
-# Dimension Tables
-plants.to_csv("dim_plants.csv", index=False)
-materials.to_csv("dim_materials.csv", index=False)
-customers.to_csv("dim_customers.csv", index=False)
+    complete_deliveries = transaction_totals["complete_deliveries"]
+    fill_rate = complete_deliveries / num_sales_orders
 
-# Master Data Tables
-mbew.to_csv("mbew_valuation.csv", index=False)
-mard.to_csv("mard_stock.csv", index=False)
+    run_log.info(f"\n=== Sample KPIs ===")
+    run_log.info(f"Inventory Turnover: {turnover:.1f} (Target: 4-6)")
+    run_log.info(f"Fill Rate: {fill_rate:.1%} (Target: 85-95%)")
+    run_log.info(f"Backorder Rate: {(num_deliveries - complete_deliveries)/num_sales_orders:.1%} (Target: 3-7%)")
 
-# Transaction Tables
-mseg.to_csv("mseg_movements.csv", index=False)
-vbak.to_csv("vbak_sales_orders.csv", index=False)
-vbap.to_csv("vbap_sales_items.csv", index=False)
-lips.to_csv("lips_deliveries.csv", index=False)
-vbfa.to_csv("vbfa_document_flow.csv", index=False)
+    run_log.info(f"\n{OUTPUT_FORMAT.upper()} files exported successfully!")
+    run_log.finish()
 
-# --------------------------
-# VALIDATION REPORT
-# --------------------------
-print("\nData Generation Complete!")
-print(f"\n=== Dataset Summary ({COMPANY_SIZE} Size) ===")
-print(f"Plants: {len(plants)}")
-print(f"Materials: {len(materials)}")
-print(f"Customers: {len(customers)}")
-print(f"Date Range: {dates[0].date()} to {dates[-1].date()}")
-print(f"\n=== Transaction Volumes ===")
-print(f"Goods Movements (MSEG): {len(mseg):,}")
-print(f"Sales Orders (VBAK): {len(vbak):,}")
-print(f"Deliveries (LIPS): {len(lips):,}")
-print(f"Document Flows (VBFA): {len(vbfa):,}")
-
-# Calculate sample KPIs
-sample_cogs = mseg[mseg["movement_type"] == "261"]["amount"].abs().sum()
-avg_inv = (mard["unrestricted_stock"] * mard.merge(mbew, on=["plant_id", "material_id"])["standard_price"]).mean()
-turnover = sample_cogs / avg_inv
-
-complete_deliveries = len(lips[lips["delivery_status"] == "A"])
-fill_rate = complete_deliveries / len(vbak)
-
-print(f"\n=== Sample KPIs ===")
-print(f"Inventory Turnover: {turnover:.1f} (Target: 4-6)")
-print(f"Fill Rate: {fill_rate:.1%} (Target: 85-95%)")
-print(f"Backorder Rate: {(len(lips) - complete_deliveries)/len(vbak):.1%} (Target: 3-7%)")
-
-print("\nCSV files exported successfully!")
\ No newline at end of file
+if __name__ == "__main__":
+    generate_inventory_dataset()
@@ -1,60 +1,146 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import random
 import os
-from faker import Faker
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen.calendar import build_calendar, business_day_offset
+from datagen.config import scaled
+from datagen.lazy import LazyFaker, lazy_import
+from datagen.output import DatasetOutput
+from datagen.pools import FakerPools
+from datagen.progress import RunLog
+from datagen.reliability import failure_events, weibull_scale
+from datagen.sharding import month_shard_bounds
+
+np = lazy_import("numpy") # Imported on first use, so importing this module stays cheap
+pd = lazy_import("pandas")
 
 # --- Configuration Parameters ---
-START_DATE = datetime(2023, 4, 1) # Fiscal year starts April 1st
-END_DATE = datetime(2025, 3, 31) # 2 years historical data
-OUTPUT_DIR = "manufacturing_coo_demo_data"
+# Settings can be overridden through MANUFACTURING_* environment variables (see datagen.config)
+START_DATE = datetime.fromisoformat(os.environ.get("MANUFACTURING_START_DATE", "2023-04-01")) # Fiscal year starts April 1st
+END_DATE = datetime.fromisoformat(os.environ.get("MANUFACTURING_END_DATE", "2025-03-31")) # 2 years historical data
+FISCAL_YEAR_START_MONTH = 4 # April = fiscal period 1
+HOLIDAYS = None # e.g. 'us_federal' (see datagen.calendar) to flag Is_Holiday in dim_date
+OUTPUT_DIR = os.environ.get("MANUFACTURING_OUTPUT_DIR", "manufacturing_coo_demo_data")
+OUTPUT_FORMAT = os.environ.get("MANUFACTURING_FORMAT", "csv") # csv, parquet or feather (parquet/feather need pyarrow)
+PARTITION_BY = None # e.g. ('fiscal_year', 'fiscal_period') or ('Plant_ID',) to write fact tables as Hive partitions with a _manifest.json
+SEED = int(os.environ["MANUFACTURING_SEED"]) if "MANUFACTURING_SEED" in os.environ else None # Unseeded unless set
+PROFILE = os.environ.get("MANUFACTURING_PROFILE") # cprofile or pyinstrument: profile every stage into OUTPUT_DIR/_profiles
+SCALE = float(os.environ.get("MANUFACTURING_SCALE", "1")) # Multiplies master-data counts together (plants and equipment per work center stay fixed)
 NUM_PLANTS = 3 # Enterprise scale: 3 distinct plants
-NUM_MATERIALS = 750 # Enterprise scale: 500-1000 products
-NUM_EMPLOYEES = 750 # Enterprise scale: 500-1000 employees
-NUM_WORK_CENTERS_PER_PLANT = 30 # 20-50 per plant
+NUM_MATERIALS = scaled(750, SCALE) # Enterprise scale: 500-1000 products
+NUM_EMPLOYEES = scaled(750, SCALE) # Enterprise scale: 500-1000 employees
+NUM_WORK_CENTERS_PER_PLANT = scaled(30, SCALE) # 20-50 per plant
 NUM_EQUIPMENT_PER_WORK_CENTER = 10 # 5-15 per WC
-NUM_VENDORS = 75 # 50-100 vendors
-
-# --- Ensure output directory exists ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# --- Initialize Faker for realistic data ---
-fake = Faker('en_IN') # Using Indian locale for names, cities etc. given current location context
+NUM_VENDORS = scaled(75, SCALE) # 50-100 vendors
+
+# --- Shop Floor Parameters (fact tables) ---
+SHIFTS = (('A', 6), ('B', 14), ('C', 22)) # Shift code and start hour; production runs every shift of every business day
+SHIFT_MINUTES = 480
+PLANNED_BREAK_MINUTES = 30 # Planned production time per shift = SHIFT_MINUTES - PLANNED_BREAK_MINUTES
+MAX_PLANNED_SHIFTS = 6 # Production orders are planned for 1-6 shifts on one equipment unit
+PLAN_ATTAINMENT = (0.8, 1.0) # Order quantity relative to what the unit usually makes in the planned shifts
+
+# --- Equipment Reliability Parameters (maintenance facts; see datagen.reliability) ---
+# Equipment_Type_Desc -> (Weibull shape, MTBF in hours when new, median repair hours); shapes above 1 wear out
+FAILURE_PROFILES = {
+    'Lathe': (1.6, 900, 3.0), 'Mill': (1.6, 800, 3.5), 'Drill': (1.4, 1000, 2.0),
+    'Robot': (1.2, 1200, 4.0), 'Conveyor': (1.8, 700, 1.5), 'Workstation': (1.1, 1500, 1.0),
+    'Horizontal': (1.5, 600, 5.0), 'Vertical': (1.5, 650, 4.5),
+    'Automated': (1.3, 800, 3.0), 'Manual': (1.1, 1400, 1.5),
+    'MIG': (1.4, 700, 2.0), 'TIG': (1.4, 750, 2.0), 'Arc': (1.3, 900, 1.5)
+}
+DEFAULT_FAILURE_PROFILE = (1.3, 900, 2.5) # Generic Equipment
+MTBF_DECLINE_PER_YEAR = 0.05 # MTBF shrinks 5% for every year of equipment age at START_DATE
+REPAIR_GROWTH_PER_YEAR = 0.03 # and repairs take 3% longer
+REPAIR_SIGMA = 0.8 # Lognormal spread of repair times
+FAILURE_MODES = {'M1': ('Mechanical failure', 0.5), 'E1': ('Electrical failure', 0.25),
+                 'H1': ('Hydraulic failure', 0.15), 'C1': ('Control system failure', 0.1)} # QMKAT code -> (text, share)
+
+# --- Output Schemas ---
+# Column types for the Parquet/Feather backends (see datagen.output); unlisted columns are inferred
+TABLE_SCHEMAS = {
+    'dim_date': {'Date_ID': 'date', 'Day_Of_Week': 'code', 'Day_Name': 'code', 'Month_Name': 'code',
+                 'Month_Of_Year': 'int32', 'Quarter': 'int32', 'Year': 'int32', 'Fiscal_Period': 'int32',
+                 'Fiscal_Year': 'int32', 'Is_Weekend': 'int8', 'Is_Holiday': 'int8'},
+    'dim_employee': {'Department': 'code', 'Job_Title': 'code', 'Hire_Date': 'date'},
+    'dim_equipment': {'Plant_ID': 'code', 'Manufacturer': 'code', 'Construction_Year': 'int32',
+                      'Equipment_Type_Desc': 'code', 'Equipment_Type_Code': 'code'},
+    'fact_production_order': {'Production_Order_ID': 'string', 'Material_ID': 'code', 'Plant_ID': 'code',
+                              'Work_Center_ID': 'code', 'Equipment_ID': 'code', 'Production_Supervisor_ID': 'code',
+                              'Order_Quantity': 'int64', 'Yield_Quantity': 'int64', 'Scrap_Quantity': 'int64',
+                              'Unit_Of_Measure': 'code', 'Basic_Start_Date': 'date', 'Basic_Finish_Date': 'date',
+                              'Actual_Start_Date': 'date', 'Actual_Finish_Date': 'date', 'Order_Status': 'code',
+                              'On_Time_Indicator': 'code'},
+    'fact_operation_confirmation': {'Confirmation_ID': 'int64', 'Production_Order_ID': 'string', 'Operation': 'code',
+                                    'Confirmation_Counter': 'int32', 'Work_Center_ID': 'code', 'Equipment_ID': 'code',
+                                    'Shift_Date': 'date', 'Shift': 'code', 'Scheduled_Start': 'timestamp[s]',
+                                    'Scheduled_Finish': 'timestamp[s]', 'Actual_Start': 'timestamp[s]',
+                                    'Actual_Finish': 'timestamp[s]', 'Yield_Quantity': 'int64',
+                                    'Scrap_Quantity': 'int64', 'Setup_Time_Min': 'int32', 'Run_Time_Min': 'int32',
+                                    'Final_Confirmation': 'code', 'On_Time_Indicator': 'code'},
+    'fact_equipment_oee': {'Equipment_ID': 'code', 'Plant_ID': 'code', 'Work_Center_ID': 'code', 'Shift_Date': 'date',
+                           'Shift': 'code', 'Production_Order_ID': 'string', 'Planned_Time_Min': 'int32',
+                           'Setup_Time_Min': 'int32', 'Downtime_Min': 'int32', 'Run_Time_Min': 'int32',
+                           'Ideal_Cycle_Time_Sec': 'float64', 'Total_Count': 'int64', 'Good_Count': 'int64',
+                           'Scrap_Count': 'int64', 'Availability_Pct': 'decimal(5,2)',
+                           'Performance_Pct': 'decimal(5,2)', 'Quality_Pct': 'decimal(5,2)', 'OEE_Pct': 'decimal(5,2)'},
+    'fact_maintenance_notification': {'Notification_ID': 'string', 'Notification_Type': 'code', 'Equipment_ID': 'code',
+                                      'Plant_ID': 'code', 'Work_Center_ID': 'code', 'Notification_Date': 'date',
+                                      'Malfunction_Start': 'timestamp[s]', 'Catalog_Code': 'code',
+                                      'Description': 'code', 'Breakdown_Indicator': 'code'},
+    'fact_maintenance_downtime': {'Notification_ID': 'string', 'Equipment_ID': 'code', 'Plant_ID': 'code',
+                                  'Work_Center_ID': 'code', 'Downtime_Start': 'timestamp[s]',
+                                  'Downtime_End': 'timestamp[s]', 'Downtime_Hours': 'decimal(9,2)',
+                                  'Production_Downtime_Min': 'int32'}
+}
+FACT_TABLES = ('fact_production_order', 'fact_operation_confirmation', 'fact_equipment_oee')
+# Fact tables partitioned when PARTITION_BY is set, with the date column their fiscal keys and manifest ranges come from
+PARTITIONED_TABLES = {
+    'fact_production_order': 'Basic_Start_Date', 'fact_operation_confirmation': 'Shift_Date',
+    'fact_equipment_oee': 'Shift_Date', 'fact_maintenance_notification': 'Notification_Date',
+    'fact_maintenance_downtime': 'Downtime_Start'
+}
+output = DatasetOutput(OUTPUT_DIR, OUTPUT_FORMAT, TABLE_SCHEMAS, PARTITION_BY, PARTITIONED_TABLES,
+                       fiscal_year_start_month=FISCAL_YEAR_START_MONTH)
+
+run_log = RunLog('manufacturing', OUTPUT_DIR, PROFILE)
+
+# --- Faker for realistic data (built on first use) ---
+fake = LazyFaker('en_IN') # Using Indian locale for names, cities etc. given current location context
+pools = FakerPools('en_IN', SEED, faker=fake) # Pre-generated names, cities and words, drawn with Faker's stream
 
 # --- Helper Functions ---
-def save_dataframe_to_csv(df, filename):
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    df.to_csv(filepath, index=False)
-    print(f"Saved {filename} with {len(df)} rows.")
+def save_dataframe_to_csv(df, filename, append=False):
+    # Accepts a DataFrame or an iterable of DataFrame chunks (streamed with a single header), writes it in
+    # OUTPUT_FORMAT (partitioned for fact tables when PARTITION_BY is set) and returns the number of rows written;
+    # with append=True the rows are added to the existing table
+    table_name = os.path.splitext(filename)[0]
+    num_rows = output.write(df, table_name, append=append)
+    run_log.saved(table_name, num_rows, output.path(table_name), append=append)
+    return num_rows
 
 def get_random_date_in_range(start, end):
     return start + timedelta(days=random.randint(0, (end - start).days))
 
 # --- 1. Dim_Date Generation ---
 def generate_dim_date(start_date, end_date):
-    date_list = []
-    current_date = start_date
-    while current_date <= end_date:
-        fiscal_year = current_date.year if current_date.month >= 4 else current_date.year - 1
-        fiscal_period = (current_date.month - 4) % 12 + 1 # April = 1, May = 2, ..., March = 12
-
-        date_list.append({
-            'Date_ID': current_date.strftime('%Y-%m-%d'),
-            'Day_Of_Week': current_date.strftime('%A'),
-            'Day_Name': current_date.strftime('%a'),
-            'Month_Of_Year': current_date.month,
-            'Month_Name': current_date.strftime('%B'),
-            'Quarter': (current_date.month - 1) // 3 + 1,
-            'Year': current_date.year,
-            'Fiscal_Period': fiscal_period,
-            'Fiscal_Year': fiscal_year,
-            'Is_Weekend': 1 if current_date.weekday() >= 5 else 0, # Saturday=5, Sunday=6
-            'Is_Holiday': 0 # Will be populated later if specific holidays are needed, keeping simple for now
-        })
-        current_date += timedelta(days=1)
-    df = pd.DataFrame(date_list)
-    return df
+    # Columns come from the shared calendar (see datagen.calendar), in this dashboard's naming
+    calendar = build_calendar(start_date, end_date, FISCAL_YEAR_START_MONTH, HOLIDAYS)
+    return pd.DataFrame({
+        'Date_ID': calendar.date_keys(),
+        'Day_Of_Week': calendar.day_name,
+        'Day_Name': [day_name[:3] for day_name in calendar.day_name],
+        'Month_Of_Year': calendar.month,
+        'Month_Name': calendar.month_name,
+        'Quarter': calendar.quarter,
+        'Year': calendar.year,
+        'Fiscal_Period': calendar.fiscal_month,
+        'Fiscal_Year': calendar.fiscal_year,
+        'Is_Weekend': calendar.is_weekend.astype(int),
+        'Is_Holiday': calendar.is_holiday.astype(int)
+    })
 
 # --- 2. Dim_Plant Generation ---
 def generate_dim_plant(num_plants):
@@ -67,7 +153,7 @@ def generate_dim_plant(num_plants):
     for i in range(num_plants):
         plant_id = f"PLNT{i+1}"
         # Ensure diverse locations for demo purposes
-        city = fake.city()
+        city = pools.choice('city')
         country = random.choice(countries)
         if country == "India": region = "South Asia"
         elif country == "USA": region = "North America"
@@ -99,7 +185,7 @@ def generate_dim_material(num_materials):
     for i in range(num_materials):
         material_id = f"MAT{str(i+1).zfill(5)}"
         material_type = random.choice(material_types)
-        material_name = fake.word().capitalize() + " " + fake.word().capitalize() + (" Assembly" if "Semi" in material_type else "") + (" Finished Product" if "Finished" in material_type else "")
+        material_name = pools.choice('word').capitalize() + " " + pools.choice('word').capitalize() + (" Assembly" if "Semi" in material_type else "") + (" Finished Product" if "Finished" in material_type else "")
         base_unit = random.choice(units)
         hierarchy = random.choice(product_hierarchies.get(material_type, ['General.Miscellaneous']))
 
@@ -128,7 +214,7 @@ def generate_dim_employee(num_employees):
 
     for i in range(num_employees):
         employee_id = f"EMP{str(i+1).zfill(4)}"
-        employee_name = fake.name()
+        employee_name = pools.choice('name')
         department = random.choice(departments)
         job_title = random.choice(job_titles.get(department, ['Specialist']))
         hire_date = get_random_date_in_range(START_DATE - timedelta(days=365*5), START_DATE) # Hired up to 5 years before start date
@@ -179,6 +265,7 @@ def generate_dim_equipment(df_work_centers, num_equipment_per_work_center):
         'Welding Station': ['MIG', 'TIG', 'Arc']
     }
     
+    serial_numbers = iter(pools.serials('SN-', 10, len(df_work_centers) * num_equipment_per_work_center)) # Unique across all equipment
     for _, wc_row in df_work_centers.iterrows():
         wc_id = wc_row['Work_Center_ID']
         plant_id = wc_row['Plant_ID']
@@ -187,7 +274,7 @@ def generate_dim_equipment(df_work_centers, num_equipment_per_work_center):
         for i in range(num_equipment_per_work_center):
             eq_id = f"{wc_id}_EQP{str(i+1).zfill(2)}"
             manufacturer = random.choice(manufacturers)
-            serial_number = fake.bothify(text='SN-##########')
+            serial_number = next(serial_numbers)
             construction_year = random.randint(START_DATE.year - 10, START_DATE.year - 1) # Built up to 10 years ago
 
             eq_type_desc_base = 'Generic Equipment'
@@ -219,33 +306,416 @@ def generate_dim_vendor(num_vendors):
         vendor_id = f"VNDR{str(i+1).zfill(3)}"
         vendors.append({
             'Vendor_ID': vendor_id,
-            'Vendor_Name': fake.company() + " " + random.choice(vendor_names),
-            'Vendor_City': fake.city(),
-            'Vendor_Country': fake.country()
+            'Vendor_Name': pools.choice('company') + " " + random.choice(vendor_names),
+            'Vendor_City': pools.choice('city'),
+            'Vendor_Country': pools.choice('country')
         })
     return pd.DataFrame(vendors)
 
-# --- Main Generation Logic for Master Data ---
-print("--- Generating Master Data ---")
-df_dim_date = generate_dim_date(START_DATE, END_DATE)
-save_dataframe_to_csv(df_dim_date, 'dim_date.csv')
-
-df_dim_plant = generate_dim_plant(NUM_PLANTS)
-save_dataframe_to_csv(df_dim_plant, 'dim_plant.csv')
-
-df_dim_material = generate_dim_material(NUM_MATERIALS)
-save_dataframe_to_csv(df_dim_material, 'dim_material.csv')
-
-df_dim_employee = generate_dim_employee(NUM_EMPLOYEES)
-save_dataframe_to_csv(df_dim_employee, 'dim_employee.csv')
-
-df_dim_work_center = generate_dim_work_center(df_dim_plant, NUM_WORK_CENTERS_PER_PLANT, df_dim_employee)
-save_dataframe_to_csv(df_dim_work_center, 'dim_work_center.csv')
-
-df_dim_equipment = generate_dim_equipment(df_dim_work_center, NUM_EQUIPMENT_PER_WORK_CENTER)
-save_dataframe_to_csv(df_dim_equipment, 'dim_equipment.csv')
-
-df_dim_vendor = generate_dim_vendor(NUM_VENDORS)
-save_dataframe_to_csv(df_dim_vendor, 'dim_vendor.csv')
+# --- 8. Shop Floor Facts: Production Orders (AFKO/AFPO), Confirmations (AFRU) and OEE ---
+def build_equipment_profiles(df_equipment, df_work_centers, df_materials, rng):
+    # Per-equipment arrays (in dim_equipment order) the shift simulation draws around,
+    # plus the materials production orders are raised for
+    work_center_ids = df_equipment['Equipment_ID'].str.rsplit('_', n=1).str[0] # e.g. PLNT1_WC001_EQP01 -> PLNT1_WC001
+    supervisors = df_work_centers.set_index('Work_Center_ID')['Production_Supervisor_ID']
+    age = START_DATE.year - df_equipment['Construction_Year'].to_numpy()
+    num_equipment = len(df_equipment)
+    produced = df_materials[df_materials['Material_Type'].isin(['Finished Goods', 'Semi-Finished Goods'])]
+    if produced.empty:
+        produced = df_materials # Fallback at very small scales
+    return {
+        'equipment_id': df_equipment['Equipment_ID'].to_numpy(object),
+        'plant_id': df_equipment['Plant_ID'].to_numpy(object),
+        'work_center_id': work_center_ids.to_numpy(object),
+        'supervisor_id': supervisors.reindex(work_center_ids).to_numpy(object),
+        'ideal_cycle_seconds': rng.uniform(20, 120, num_equipment).round(1),
+        'availability': np.clip(0.95 - 0.006 * age + rng.normal(0, 0.02, num_equipment), 0.75, 0.98), # Older equipment stops more
+        'performance': rng.uniform(0.85, 0.97, num_equipment),
+        'scrap_rate': rng.uniform(0.005, 0.04, num_equipment),
+        'material_id': produced['Material_ID'].to_numpy(object),
+        'unit_of_measure': produced['Base_Unit_Of_Measure'].to_numpy(object)
+    }
 
-print("\nMaster Data Generation Complete. Proceeding to Fact Data (in next part).")
\ No newline at end of file
+def order_labels(order_numbers):
+    # 0-based order numbers -> PO0000000001, ...; each distinct number is formatted once
+    if not len(order_numbers):
+        return np.array([], dtype=object)
+    first = int(order_numbers.min())
+    labels = np.array([f"PO{n + 1:010d}" for n in range(first, int(order_numbers.max()) + 1)], dtype=object)
+    return labels[order_numbers - first]
+
+def production_order_frame(profiles, orders):
+    # orders: arrays of order, equipment, start/due/finish dates, quantities and status, one entry per order
+    is_closed = orders['closed']
+    return pd.DataFrame({
+        'Production_Order_ID': order_labels(orders['order']),
+        'Material_ID': profiles['material_id'][orders['material']],
+        'Plant_ID': profiles['plant_id'][orders['equipment']],
+        'Work_Center_ID': profiles['work_center_id'][orders['equipment']],
+        'Equipment_ID': profiles['equipment_id'][orders['equipment']],
+        'Production_Supervisor_ID': profiles['supervisor_id'][orders['equipment']],
+        'Order_Quantity': orders['quantity'],
+        'Yield_Quantity': orders['yield'],
+        'Scrap_Quantity': orders['scrap'],
+        'Unit_Of_Measure': profiles['unit_of_measure'][orders['material']],
+        'Basic_Start_Date': orders['start_date'],
+        'Basic_Finish_Date': orders['due_date'],
+        'Actual_Start_Date': orders['start_date'],
+        'Actual_Finish_Date': np.where(is_closed, orders['finish_date'], np.datetime64('NaT')),
+        'Order_Status': np.where(is_closed, 'TECO', 'REL'), # Technically complete, or still released at END_DATE
+        'On_Time_Indicator': np.where(is_closed & orders['on_time'], 'X', '')
+    })
+
+def shift_timeline():
+    # Business days from START_DATE to END_DATE, and the day and start of every shift on them; the timeline
+    # runs on for the business days orders planned near END_DATE may be due in
+    calendar = build_calendar(START_DATE, END_DATE, FISCAL_YEAR_START_MONTH, HOLIDAYS)
+    business_days = calendar.date[calendar.is_business_day]
+    days_after = -(-MAX_PLANNED_SHIFTS // len(SHIFTS))
+    timeline_days = np.concatenate([business_days, business_day_offset(
+        np.repeat(business_days[-1:], days_after), np.arange(1, days_after + 1), holidays=HOLIDAYS)])
+    shift_offsets = np.array([hour * 60 for _, hour in SHIFTS]).astype('timedelta64[m]')
+    shift_day = np.repeat(timeline_days, len(SHIFTS))
+    return business_days, shift_day, shift_day.astype('datetime64[m]') + np.tile(shift_offsets, len(timeline_days))
+
+def simulate_shop_floor(profiles, rng, breakdowns):
+    """Simulates every equipment unit shift by shift and yields the fact tables one month at a time.
+
+    Production runs every shift of every business day. Each equipment unit works
+    through production orders one after another: an order is planned for 1 to
+    MAX_PLANNED_SHIFTS shifts with the quantity the unit should make in that
+    time, and is confirmed every shift until its quantity is reached, on time or
+    late depending on setups, minor stops and breakdowns. The shift an order finishes
+    in stops at the order quantity; the rest of that shift is idle and outside
+    planned production time. Each shift is one set of array operations over all
+    equipment units, and the random draws of a month are made up front.
+    breakdowns holds the repair minutes falling in each shift (see
+    breakdown_shift_minutes), ordered by shift.
+
+    Yields {table_name: DataFrame} per calendar month of business days.
+    Production orders appear in the month they finish; the last month also
+    carries the orders still open at END_DATE.
+    """
+    business_days, shift_day, shift_start = shift_timeline()
+    shift_end = shift_start + np.timedelta64(SHIFT_MINUTES, 'm')
+    num_equipment, shifts_per_day = len(profiles['equipment_id']), len(SHIFTS)
+    equipment = np.arange(num_equipment)
+    planned_minutes = SHIFT_MINUTES - PLANNED_BREAK_MINUTES
+    ideal_cycle = profiles['ideal_cycle_seconds']
+    # Good units per planned minute orders are planned with: ideal output less the unit's usual losses
+    expected_good = 60 / ideal_cycle * profiles['availability'] * profiles['performance'] * (1 - profiles['scrap_rate'])
+    shift_codes = np.array([code for code, _ in SHIFTS], dtype=object)
+
+    # The order each equipment unit is working on (-1: none) and its progress
+    order = np.full(num_equipment, -1)
+    order_start = np.zeros(num_equipment, dtype=np.int64) # Shift index
+    order_due = np.zeros(num_equipment, dtype=np.int64) # Shift index of the last planned shift
+    order_quantity = np.zeros(num_equipment, dtype=np.int64)
+    order_material = np.zeros(num_equipment, dtype=np.int64)
+    order_yield = np.zeros(num_equipment, dtype=np.int64)
+    order_scrap = np.zeros(num_equipment, dtype=np.int64)
+    confirmations = np.zeros(num_equipment, dtype=np.int64)
+    next_order = 0
+
+    def order_snapshot(units, shift, closed):
+        return {'order': order[units], 'equipment': units, 'material': order_material[units],
+                'quantity': order_quantity[units], 'yield': order_yield[units], 'scrap': order_scrap[units],
+                'start_date': shift_day[order_start[units]], 'due_date': shift_day[order_due[units]],
+                'finish_date': np.full(len(units), shift_day[shift]), 'on_time': shift <= order_due[units],
+                'closed': np.full(len(units), closed)}
+
+    shift = 0
+    month_bounds = month_shard_bounds(business_days)
+    for month, (first_day, stop_day) in enumerate(month_bounds):
+        num_shifts = (stop_day - first_day) * shifts_per_day
+        size = (num_shifts, num_equipment)
+        planned_shifts = rng.integers(1, MAX_PLANNED_SHIFTS + 1, size)
+        plan_attainment = rng.uniform(*PLAN_ATTAINMENT, size)
+        materials = rng.integers(0, len(profiles['material_id']), size)
+        setups = rng.integers(15, 61, size)
+        # Minor stops around each unit's availability, plus the repairs of simulated failures
+        downtimes = rng.exponential(planned_minutes * (1 - profiles['availability']), size)
+        in_month = slice(*np.searchsorted(breakdowns['shift'], [shift, shift + num_shifts]))
+        np.add.at(downtimes, (breakdowns['shift'][in_month] - shift, breakdowns['equipment'][in_month]),
+                  breakdowns['minutes'][in_month])
+        speeds = np.clip(rng.normal(profiles['performance'], 0.04, size), 0.5, 1.0)
+
+        columns = {name: [] for name in ['order', 'counter', 'scheduled_start', 'scheduled_finish', 'planned_time',
+                                         'setup', 'downtime', 'run_time', 'total', 'good', 'scrap', 'done',
+                                         'on_time', 'actual_finish']}
+        closed_orders = []
+        for i in range(num_shifts):
+            starting = np.flatnonzero(order < 0)
+            if len(starting):
+                order[starting] = next_order + np.arange(len(starting))
+                next_order += len(starting)
+                order_start[starting] = shift
+                order_due[starting] = shift + planned_shifts[i, starting] - 1
+                planned_run = planned_shifts[i, starting] * planned_minutes - setups[i, starting]
+                order_quantity[starting] = np.maximum(np.round(
+                    expected_good[starting] * planned_run * plan_attainment[i, starting]), 1)
+                order_material[starting] = materials[i, starting]
+                order_yield[starting] = order_scrap[starting] = confirmations[starting] = 0
+
+            setup = np.zeros(num_equipment, dtype=np.int64)
+            setup[starting] = setups[i, starting]
+            downtime = np.minimum(downtimes[i].round().astype(np.int64), planned_minutes - setup)
+            run_time = planned_minutes - setup - downtime
+            total = np.floor(run_time * 60 / ideal_cycle * speeds[i]).astype(np.int64)
+            scrap = rng.binomial(total, profiles['scrap_rate'])
+            good = total - scrap
+            remaining = order_quantity - order_yield
+            done = good >= remaining
+            # The finishing shift stops once the order quantity is made, after the run time that takes at this speed
+            share = np.divide(remaining, good, out=np.ones(num_equipment), where=done)
+            scrap = np.where(done, np.round(scrap * share).astype(np.int64), scrap)
+            good = np.where(done, remaining, good)
+            total = good + scrap
+            run_time = np.where(done, np.ceil(total * ideal_cycle / (60 * speeds[i])).astype(np.int64), run_time)
+            downtime = np.where(done, np.round(downtime * share).astype(np.int64), downtime)
+            planned_time = np.where(done, setup + downtime + run_time, planned_minutes)
+
+            confirmations += 1
+            order_yield += good
+            order_scrap += scrap
+            for name, values in (('order', order.copy()), ('counter', confirmations.copy()),
+                                 ('scheduled_start', shift_start[order_start]),
+                                 ('scheduled_finish', shift_end[order_due]), ('planned_time', planned_time),
+                                 ('setup', setup), ('downtime', downtime), ('run_time', run_time),
+                                 ('total', total), ('good', good), ('scrap', scrap), ('done', done),
+                                 ('on_time', shift <= order_due),
+                                 ('actual_finish', np.where(done, shift_start[shift] + planned_time.astype('timedelta64[m]'),
+                                                            shift_end[shift]))):
+                columns[name].append(values)
+            if done.any():
+                closed_orders.append(order_snapshot(np.flatnonzero(done), shift, True))
+                order[done] = -1
+            shift += 1
+
+        # Orders still open at END_DATE are written with the last month
+        open_units = np.flatnonzero(order >= 0) if month == len(month_bounds) - 1 else np.array([], dtype=np.int64)
+        closed_orders.append(order_snapshot(open_units, shift - 1, False))
+        yield month_frames(profiles, columns, closed_orders, shift_codes, shift_day,
+                           np.arange(shift - num_shifts, shift), equipment)
+
+def month_frames(profiles, columns, closed_orders, shift_codes, shift_day, shifts, equipment):
+    # One month of per-shift arrays -> the three fact tables (confirmation ids are set by the caller)
+    values = {name: np.concatenate(arrays) for name, arrays in columns.items()}
+    row_shift = np.repeat(shifts, len(equipment))
+    row_equipment = np.tile(equipment, len(shifts))
+    order_ids = order_labels(values['order'])
+    shift_dates = shift_day[row_shift]
+    shift_code = shift_codes[row_shift % len(shift_codes)]
+    ideal_cycle = profiles['ideal_cycle_seconds'][row_equipment]
+    availability = values['run_time'] / values['planned_time']
+    performance = np.divide(values['total'] * ideal_cycle, values['run_time'] * 60,
+                            out=np.zeros(len(row_shift)), where=values['run_time'] > 0)
+    quality = np.divide(values['good'], values['total'], out=np.zeros(len(row_shift)), where=values['total'] > 0)
+    fact_equipment_oee = pd.DataFrame({
+        'Equipment_ID': profiles['equipment_id'][row_equipment],
+        'Plant_ID': profiles['plant_id'][row_equipment],
+        'Work_Center_ID': profiles['work_center_id'][row_equipment],
+        'Shift_Date': shift_dates,
+        'Shift': shift_code,
+        'Production_Order_ID': order_ids,
+        'Planned_Time_Min': values['planned_time'],
+        'Setup_Time_Min': values['setup'],
+        'Downtime_Min': values['downtime'],
+        'Run_Time_Min': values['run_time'],
+        'Ideal_Cycle_Time_Sec': ideal_cycle,
+        'Total_Count': values['total'],
+        'Good_Count': values['good'],
+        'Scrap_Count': values['scrap'],
+        'Availability_Pct': (availability * 100).round(2),
+        'Performance_Pct': (performance * 100).round(2),
+        'Quality_Pct': (quality * 100).round(2),
+        'OEE_Pct': (availability * performance * quality * 100).round(2)
+    })
+    # Confirmations carry the operation's scheduled window and the actual window up to this shift
+    fact_operation_confirmation = pd.DataFrame({
+        'Confirmation_ID': 0, # Numbered by the caller
+        'Production_Order_ID': order_ids,
+        'Operation': '0010',
+        'Confirmation_Counter': values['counter'],
+        'Work_Center_ID': profiles['work_center_id'][row_equipment],
+        'Equipment_ID': profiles['equipment_id'][row_equipment],
+        'Shift_Date': shift_dates,
+        'Shift': shift_code,
+        'Scheduled_Start': values['scheduled_start'],
+        'Scheduled_Finish': values['scheduled_finish'],
+        'Actual_Start': values['scheduled_start'],
+        'Actual_Finish': values['actual_finish'],
+        'Yield_Quantity': values['good'],
+        'Scrap_Quantity': values['scrap'],
+        'Setup_Time_Min': values['setup'],
+        'Run_Time_Min': values['run_time'],
+        'Final_Confirmation': np.where(values['done'], 'X', ''),
+        'On_Time_Indicator': np.where(values['on_time'], 'X', '')
+    })
+    orders = {name: np.concatenate([snapshot[name] for snapshot in closed_orders]) for name in closed_orders[0]}
+    order_rank = np.argsort(orders['order'], kind='stable')
+    return {'fact_production_order': production_order_frame(profiles, {name: array[order_rank]
+                                                                       for name, array in orders.items()}),
+            'fact_operation_confirmation': fact_operation_confirmation,
+            'fact_equipment_oee': fact_equipment_oee}
+
+def equipment_failure_parameters(df_equipment):
+    # Weibull shape and scale and median repair hours per equipment unit, from its type and age
+    profiles = np.array([FAILURE_PROFILES.get(eq_type, DEFAULT_FAILURE_PROFILE)
+                         for eq_type in df_equipment['Equipment_Type_Desc']], dtype=float).reshape(-1, 3)
+    age = START_DATE.year - df_equipment['Construction_Year'].to_numpy()
+    shape = profiles[:, 0]
+    mtbf = profiles[:, 1] * (1 - MTBF_DECLINE_PER_YEAR) ** age
+    return shape, weibull_scale(mtbf, shape), profiles[:, 2] * (1 + REPAIR_GROWTH_PER_YEAR) ** age
+
+def simulate_equipment_failures(df_equipment, rng):
+    # Failures from START_DATE to END_DATE as arrays ordered by failure time: equipment position,
+    # malfunction start and repair end (minute resolution) and catalog code
+    shape, scale, repair_median = equipment_failure_parameters(df_equipment)
+    horizon_hours = ((END_DATE - START_DATE).days + 1) * 24
+    chunks = list(failure_events(shape, scale, repair_median, REPAIR_SIGMA, horizon_hours, rng))
+    unit, failure_at, repair_hours = (np.concatenate(arrays) for arrays in zip(*chunks))
+    order = np.argsort(failure_at, kind='stable')
+    start = np.datetime64(START_DATE.date(), 'm') + np.round(failure_at[order] * 60).astype('timedelta64[m]')
+    repair_minutes = np.maximum(np.round(repair_hours[order] * 60), 1).astype('timedelta64[m]')
+    codes = list(FAILURE_MODES)
+    shares = np.array([share for _, share in FAILURE_MODES.values()])
+    return {'equipment': unit[order], 'start': start, 'end': start + repair_minutes,
+            'mode': np.array(codes, dtype=object)[rng.choice(len(codes), len(order), p=shares / shares.sum())]}
+
+def breakdown_shift_minutes(failures, shift_start):
+    # Repair minutes within each shift a repair overlaps, as {'event', 'shift', 'equipment', 'minutes'} arrays
+    # ordered by shift; repairs outside the shifts (nights before Monday, weekends) cost no production time
+    shift_end = shift_start + np.timedelta64(SHIFT_MINUTES, 'm')
+    first = np.searchsorted(shift_end, failures['start'], side='right')
+    counts = np.maximum(np.searchsorted(shift_start, failures['end'], side='left') - first, 0)
+    event = np.repeat(np.arange(len(counts)), counts)
+    shift = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    overlap = (np.minimum(failures['end'][event], shift_end[shift])
+               - np.maximum(failures['start'][event], shift_start[shift]))
+    order = np.argsort(shift, kind='stable')
+    return {'event': event[order], 'shift': shift[order], 'equipment': failures['equipment'][event][order],
+            'minutes': (overlap / np.timedelta64(1, 'm'))[order]}
+
+def maintenance_frames(profiles, failures, breakdowns):
+    # QMEL-style malfunction notifications and AFWI-style downtime records, one of each per failure
+    notification_ids = np.array([f"QM{n:010d}" for n in range(1, len(failures['start']) + 1)], dtype=object)
+    equipment = failures['equipment']
+    mode_text = {code: text for code, (text, _) in FAILURE_MODES.items()}
+    production_minutes = np.bincount(breakdowns['event'], weights=breakdowns['minutes'],
+                                     minlength=len(equipment))
+    fact_maintenance_notification = pd.DataFrame({
+        'Notification_ID': notification_ids,
+        'Notification_Type': 'M2', # Malfunction report
+        'Equipment_ID': profiles['equipment_id'][equipment],
+        'Plant_ID': profiles['plant_id'][equipment],
+        'Work_Center_ID': profiles['work_center_id'][equipment],
+        'Notification_Date': failures['start'].astype('datetime64[D]'),
+        'Malfunction_Start': failures['start'],
+        'Catalog_Code': failures['mode'],
+        'Description': pd.Series(failures['mode']).map(mode_text).to_numpy(object),
+        'Breakdown_Indicator': 'X'
+    })
+    fact_maintenance_downtime = pd.DataFrame({
+        'Notification_ID': notification_ids,
+        'Equipment_ID': profiles['equipment_id'][equipment],
+        'Plant_ID': profiles['plant_id'][equipment],
+        'Work_Center_ID': profiles['work_center_id'][equipment],
+        'Downtime_Start': failures['start'],
+        'Downtime_End': failures['end'],
+        'Downtime_Hours': ((failures['end'] - failures['start']) / np.timedelta64(1, 'h')).round(2),
+        'Production_Downtime_Min': np.round(production_minutes).astype(np.int64) # Overlap with scheduled shifts
+    })
+    return fact_maintenance_notification, fact_maintenance_downtime
+
+def generate_fact_tables(tables):
+    # Simulates equipment failures and writes the maintenance tables, then streams the three shop floor
+    # fact tables to OUTPUT_DIR one month at a time; reports plant-wide MTBF/MTTR and OEE
+    profile_seed, simulation_seed, failure_seed = np.random.SeedSequence(SEED).spawn(3) # Fresh entropy when SEED is unset
+    profiles = build_equipment_profiles(tables['dim_equipment'], tables['dim_work_center'], tables['dim_material'],
+                                        np.random.default_rng(profile_seed))
+    with run_log.stage("Simulating equipment failures") as stage:
+        failures = simulate_equipment_failures(tables['dim_equipment'], np.random.default_rng(failure_seed))
+        breakdowns = breakdown_shift_minutes(failures, shift_timeline()[2])
+        df_notifications, df_downtime = maintenance_frames(profiles, failures, breakdowns)
+        stage.advance(save_dataframe_to_csv(df_notifications, 'fact_maintenance_notification.csv')
+                      + save_dataframe_to_csv(df_downtime, 'fact_maintenance_downtime.csv'))
+    # Calendar-time MTBF (running hours per failure) and MTTR across all equipment units
+    num_failures = len(df_downtime)
+    repair_hours = float(df_downtime['Downtime_Hours'].sum())
+    running_hours = ((END_DATE - START_DATE).days + 1) * 24 * len(profiles['equipment_id']) - repair_hours
+    mtbf = running_hours / num_failures if num_failures else None
+    mttr = repair_hours / num_failures if num_failures else None
+    run_log.info(f"{num_failures:,} equipment failures: MTBF {mtbf or 0:,.0f} h, MTTR {mttr or 0:,.1f} h",
+                 mtbf_hours=None if mtbf is None else round(mtbf, 1),
+                 mttr_hours=None if mttr is None else round(mttr, 2))
+
+    num_months = len(month_shard_bounds(build_calendar(START_DATE, END_DATE, FISCAL_YEAR_START_MONTH, HOLIDAYS)
+                                        .business_days))
+    writers = {table_name: output.open(table_name) for table_name in FACT_TABLES}
+    next_confirmation = 1
+    totals = dict.fromkeys(['planned', 'run', 'ideal_run', 'total', 'good', 'closed', 'on_time'], 0)
+    try:
+        with run_log.stage("Simulating shop floor shifts", total=num_months) as stage:
+            for facts in simulate_shop_floor(profiles, np.random.default_rng(simulation_seed), breakdowns):
+                confirmations = facts['fact_operation_confirmation']
+                confirmations['Confirmation_ID'] = np.arange(next_confirmation, next_confirmation + len(confirmations))
+                next_confirmation += len(confirmations)
+                for table_name, df in facts.items():
+                    writers[table_name].write(df)
+
+                oee, orders = facts['fact_equipment_oee'], facts['fact_production_order']
+                totals['planned'] += int(oee['Planned_Time_Min'].sum())
+                totals['run'] += int(oee['Run_Time_Min'].sum())
+                totals['ideal_run'] += float((oee['Total_Count'] * oee['Ideal_Cycle_Time_Sec']).sum()) / 60
+                totals['total'] += int(oee['Total_Count'].sum())
+                totals['good'] += int(oee['Good_Count'].sum())
+                totals['closed'] += int((orders['Order_Status'] == 'TECO').sum())
+                totals['on_time'] += int((orders['On_Time_Indicator'] == 'X').sum())
+                stage.advance(sum(map(len, facts.values())), units=1)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    for table_name, writer in writers.items():
+        run_log.saved(table_name, writer.rows, output.path(table_name))
+
+    # Time-weighted plant-wide figures, so that OEE = availability x performance x quality
+    availability = totals['run'] / totals['planned'] if totals['planned'] else 0
+    performance = totals['ideal_run'] / totals['run'] if totals['run'] else 0
+    quality = totals['good'] / totals['total'] if totals['total'] else 0
+    on_time = totals['on_time'] / totals['closed'] if totals['closed'] else 0
+    run_log.info(f"OEE {availability * performance * quality:.1%} (availability {availability:.1%}, "
+                 f"performance {performance:.1%}, quality {quality:.1%}), on-time orders {on_time:.1%}",
+                 oee=round(availability * performance * quality, 4), availability=round(availability, 4),
+                 performance=round(performance, 4), quality=round(quality, 4), on_time_orders=round(on_time, 4))
+
+# --- Main Generation Logic ---
+def generate_manufacturing_dataset():
+    """Generates the master data and shop floor fact tables into OUTPUT_DIR and returns the master data by table name."""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if SEED is not None:
+        random.seed(SEED)
+        fake.seed(SEED)
+    run_log.event("run_start", start_date=START_DATE.date(), end_date=END_DATE.date(), scale=SCALE, seed=SEED)
+    tables = {}
+    with run_log.stage("Generating master data") as stage:
+        tables['dim_date'] = generate_dim_date(START_DATE, END_DATE)
+        tables['dim_plant'] = generate_dim_plant(NUM_PLANTS)
+        tables['dim_material'] = generate_dim_material(NUM_MATERIALS)
+        tables['dim_employee'] = generate_dim_employee(NUM_EMPLOYEES)
+        tables['dim_work_center'] = generate_dim_work_center(tables['dim_plant'], NUM_WORK_CENTERS_PER_PLANT,
+                                                             tables['dim_employee'])
+        tables['dim_equipment'] = generate_dim_equipment(tables['dim_work_center'], NUM_EQUIPMENT_PER_WORK_CENTER)
+        tables['dim_vendor'] = generate_dim_vendor(NUM_VENDORS)
+        for table_name, df in tables.items():
+            stage.advance(save_dataframe_to_csv(df, f'{table_name}.csv'))
+
+    generate_fact_tables(tables)
+    output.close() # Writes the partition manifest when PARTITION_BY is set
+
+    run_log.info("\nManufacturing Data Generation Complete.")
+    run_log.finish()
+    return tables
+
+if __name__ == "__main__":
+    generate_manufacturing_dataset()
@@ -0,0 +1,55 @@
+"""Benchmark bkpf_doc_header construction in the CEO generator.
+
+Builds synthetic faglflexa GL frames shaped like create_gl_line_items output
+(two lines per document) and times create_document_headers at each size.
+Linear scaling shows up as a flat ns/line column.
+
+Usage: python bench_ceo_doc_headers.py [--max-lines 10000000]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import CEO_GENERATOR, load_generator, timed
+
+
+def synthetic_gl_items(num_lines):
+    """Two GL lines per document, in the column layout of faglflexa_gl_items."""
+    num_docs = num_lines // 2
+    doc_numbers = np.repeat(np.array([f"DOC{str(i).zfill(8)}" for i in range(1, num_docs + 1)], dtype=object), 2)
+    references = np.repeat(np.array([f"BD{str(i).zfill(8)}" for i in range(1, num_docs + 1)], dtype=object), 2)
+    posting_dates = np.repeat(
+        np.datetime64("2023-01-02") + np.random.randint(0, 730, num_docs).astype("timedelta64[D]"), 2
+    )
+    return pd.DataFrame({
+        "id": np.arange(1, 2 * num_docs + 1),
+        "company_code": "1000",
+        "gl_account": np.tile(["4000000", "5000000"], num_docs),
+        "posting_date": posting_dates,
+        "document_number": doc_numbers,
+        "amount_local": np.random.uniform(-1000, 1000, 2 * num_docs).round(2),
+        "currency_local": "USD",
+        "reference_doc": references,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-lines", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    ceo = load_generator(CEO_GENERATOR, "ceo_generator")
+
+    print(f"{'gl_lines':>12} {'documents':>12} {'seconds':>10} {'ns/line':>10}")
+    num_lines = 10_000
+    while num_lines <= args.max_lines:
+        gl_items_df = synthetic_gl_items(num_lines)
+        headers_df, elapsed = timed(ceo.create_document_headers, gl_items_df)
+        print(f"{len(gl_items_df):>12,} {len(headers_df):>12,} {elapsed:>10.3f} {elapsed / len(gl_items_df) * 1e9:>10.1f}")
+        del gl_items_df, headers_df
+        num_lines *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""Rows/second and peak memory benchmark of the generator functions, per table.
+
+Every case times one generator function (or, for the Inventory generator, one
+stage of a full script run) at each scale point. Each case runs in a
+fresh child process so its peak RSS is its own; inputs are built before the
+clock starts. Results (wall time, rows per table, rows/second and peak RSS) are
+appended to a JSON history file with the git commit they were measured at, and
+the report shows the change against the previous run of the same case.
+
+Usage: python bench_generators.py [--scales 0.25,0.5,1] [--only ceo,cfo.dfkkop] [--history FILE] [--list]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas  # noqa: F401 -- imported up front so no case times the pandas import the generators defer
+
+from common import FINAL_OUTPUT_DIR, count_csv_rows, load_generator, peak_rss_mb, run_stages, timed
+from datagen.calendar import Calendar
+from datagen.config import GENERATORS, generator_environment, scaled
+from datagen.reliability import failure_events
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_history.json")
+INVENTORY_TRANSACTION_TABLES = ("mseg_movements", "vbak_sales_orders", "vbap_sales_items", "lips_deliveries",
+                                "vbfa_document_flow")
+
+CASES = {}
+
+
+def case(name):
+    """Registers a case; it gets the imported generator and returns ({table: rows or DataFrame}, seconds)."""
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+# CEO Dashboard
+
+def ceo_business_days(ceo):
+    return ceo.ceo_calendar().business_days
+
+
+def ceo_order_inputs(ceo):
+    random.seed(ceo.SEED)
+    customers_df = ceo.create_customers(scaled(50, ceo.SCALE))
+    materials_df = ceo.create_materials(scaled(200, ceo.SCALE))
+    rng = np.random.default_rng(ceo.SEED)
+    daily_orders = ceo.draw_daily_order_counts(ceo_business_days(ceo), rng, ceo.ORDER_VOLUME_SCALE * ceo.SCALE)
+    return customers_df, materials_df, daily_orders, rng
+
+
+def ceo_billing_inputs(ceo):
+    customers_df, materials_df, daily_orders, rng = ceo_order_inputs(ceo)
+    sales_orders_df = ceo.create_sales_orders(customers_df, materials_df, ceo_business_days(ceo), daily_orders, rng)
+    billing_df, _ = ceo.create_billing_documents(sales_orders_df, rng)
+    return materials_df, billing_df, rng
+
+
+@case("ceo.master_data")
+def ceo_master_data(ceo):
+    def master_data():
+        random.seed(ceo.SEED)
+        return {
+            "kna1_customers": ceo.create_customers(scaled(50, ceo.SCALE)),
+            "mara_materials": ceo.create_materials(scaled(200, ceo.SCALE)),
+            "skat_gl_accounts": ceo.create_gl_accounts(),
+            "pa0001_hr_master": ceo.create_employees(scaled(500, ceo.SCALE)),
+        }
+    return timed(master_data)
+
+
+@case("ceo.create_sales_orders")
+def ceo_create_sales_orders(ceo):
+    customers_df, materials_df, daily_orders, rng = ceo_order_inputs(ceo)
+    sales_orders_df, seconds = timed(ceo.create_sales_orders, customers_df, materials_df, ceo_business_days(ceo),
+                                     daily_orders, rng)
+    return {"vbap_sales_orders": sales_orders_df}, seconds
+
+
+@case("ceo.create_billing_documents")
+def ceo_create_billing_documents(ceo):
+    customers_df, materials_df, daily_orders, rng = ceo_order_inputs(ceo)
+    sales_orders_df = ceo.create_sales_orders(customers_df, materials_df, ceo_business_days(ceo), daily_orders, rng)
+    (billing_df, _), seconds = timed(ceo.create_billing_documents, sales_orders_df, rng)
+    return {"vbrp_billing": billing_df}, seconds
+
+
+@case("ceo.create_copa_items")
+def ceo_create_copa_items(ceo):
+    materials_df, billing_df, rng = ceo_billing_inputs(ceo)
+    copa_df, seconds = timed(ceo.create_copa_items, billing_df, materials_df, rng)
+    return {"coep_copa_items": copa_df}, seconds
+
+
+@case("ceo.create_gl_line_items")
+def ceo_create_gl_line_items(ceo):
+    _, billing_df, rng = ceo_billing_inputs(ceo)
+    gl_items_df, seconds = timed(ceo.create_gl_line_items, billing_df, rng)
+    return {"faglflexa_gl_items": gl_items_df}, seconds
+
+
+@case("ceo.create_document_headers")
+def ceo_create_document_headers(ceo):
+    _, billing_df, rng = ceo_billing_inputs(ceo)
+    gl_items_df = ceo.create_gl_line_items(billing_df, rng)
+    doc_headers_df, seconds = timed(ceo.create_document_headers, gl_items_df)
+    return {"bkpf_doc_header": doc_headers_df}, seconds
+
+
+@case("ceo.create_employee_actions")
+def ceo_create_employee_actions(ceo):
+    random.seed(ceo.SEED)
+    employees_df = ceo.create_employees(scaled(500, ceo.SCALE))
+    employee_actions_df, seconds = timed(ceo.create_employee_actions, employees_df)
+    return {"pa0000_employee_actions": employee_actions_df}, seconds
+
+
+@case("ceo.generate_ceo_facts")
+def ceo_generate_ceo_facts(ceo):
+    customers_df, materials_df, _, _ = ceo_order_inputs(ceo)
+    employees_df = ceo.create_employees(scaled(500, ceo.SCALE))
+    return timed(ceo.generate_ceo_facts, ceo_business_days(ceo), customers_df, materials_df, employees_df, {},
+                 ceo.start_date, ceo.end_date)
+
+
+# CFO Dashboard
+
+def cfo_dimensions(cfo):
+    return {
+        "calendar": cfo.build_cfo_calendar(cfo.START_DATE, cfo.END_DATE),
+        "skat_gl_accounts_df": cfo.generate_skat_gl_accounts(),
+        "company_code_cache": cfo.build_company_code_cache(cfo.generate_t001_company_codes()),
+        "cepc_profit_centers_df": cfo.generate_cepc_profit_centers(scaled(20, cfo.SCALE)),
+        "csks_cost_centers_df": cfo.generate_csks_cost_centers(scaled(30, cfo.SCALE)),
+        "anla_asset_master_df": cfo.generate_anla_asset_master(scaled(2000, cfo.SCALE)),
+    }
+
+
+@case("cfo.generate_dim_date")
+def cfo_generate_dim_date(cfo):
+    def dim_date():
+        # A new Calendar rather than build_calendar(), so the build is timed instead of the memoized result
+        calendar = Calendar(cfo.START_DATE, cfo.END_DATE, cfo.FISCAL_YEAR_START_MONTH, cfo.HOLIDAYS)
+        return {"dim_date": cfo.generate_dim_date(calendar)}
+    return timed(dim_date)
+
+
+@case("cfo.master_data")
+def cfo_master_data(cfo):
+    def master_data():
+        return {
+            "skat_gl_accounts": cfo.generate_skat_gl_accounts(),
+            "t001_company_codes": cfo.generate_t001_company_codes(),
+            "cepc_profit_centers": cfo.generate_cepc_profit_centers(scaled(20, cfo.SCALE)),
+            "csks_cost_centers": cfo.generate_csks_cost_centers(scaled(30, cfo.SCALE)),
+            "anla_asset_master": cfo.generate_anla_asset_master(scaled(2000, cfo.SCALE)),
+            "mbew_material_valuation": cfo.generate_mbew_material_valuation(scaled(3000, cfo.SCALE)),
+        }
+    return timed(master_data)
+
+
+@case("cfo.generate_gl_line_batches")
+def cfo_generate_gl_line_batches(cfo):
+    dimensions = cfo_dimensions(cfo)
+
+    def gl_lines():
+        # Builds both table views of every batch, as the CSV export does, without writing them
+        rows = {"faglflexa_gl_items": 0, "bseg_doc_segment": 0}
+        for gl_lines_df in cfo.generate_gl_line_batches(**dimensions, run_state={}):
+            rows["faglflexa_gl_items"] += len(cfo.faglflexa_view(gl_lines_df))
+            rows["bseg_doc_segment"] += len(cfo.bseg_view(gl_lines_df))
+        return rows
+    return timed(gl_lines)
+
+
+@case("cfo.generate_anlc_asset_values")
+def cfo_generate_anlc_asset_values(cfo):
+    dimensions = cfo_dimensions(cfo)
+    anlc_df, seconds = timed(cfo.generate_anlc_asset_values, dimensions["anla_asset_master_df"],
+                             cfo.generate_dim_date(dimensions["calendar"]))
+    return {"anlc_asset_values": anlc_df}, seconds
+
+
+@case("cfo.generate_dfkkop_customer_line_items")
+def cfo_generate_dfkkop_customer_line_items(cfo):
+    dimensions = cfo_dimensions(cfo)
+    (dfkkop_df, _), seconds = timed(cfo.generate_dfkkop_customer_line_items, dimensions["calendar"],
+                                    dimensions["company_code_cache"], {})
+    return {"dfkkop_customer_line_items": dfkkop_df}, seconds
+
+
+@case("cfo.generate_dfkko_vendor_line_items")
+def cfo_generate_dfkko_vendor_line_items(cfo):
+    dimensions = cfo_dimensions(cfo)
+    (dfkko_df, _), seconds = timed(cfo.generate_dfkko_vendor_line_items, dimensions["calendar"],
+                                   dimensions["company_code_cache"], {})
+    return {"dfkko_vendor_line_items": dfkko_df}, seconds
+
+
+# COO Dashboard
+
+COO_MASTER_TABLES = ("dim_company_codes", "dim_gl_accounts", "dim_profit_centers", "dim_cost_centers", "dim_assets",
+                     "dim_materials", "dim_customers", "dim_vendors")
+COO_FACT_TABLES = ("fact_gl_postings", "fact_asset_movements", "fact_inventory_movements", "fact_ar_open_items",
+                   "fact_ap_open_items", "fact_ar_clearings", "fact_ap_clearings")
+
+
+def coo_master_data(coo):
+    random.seed(coo.SEED)
+    np.random.seed(coo.SEED)
+    return coo.generate_master_data(coo.NUM_COMPANIES, coo.NUM_GL_ACCOUNTS, coo.NUM_PROFIT_CENTERS,
+                                    coo.NUM_COST_CENTERS, coo.NUM_ASSETS, coo.NUM_MATERIALS, coo.NUM_CUSTOMERS,
+                                    coo.NUM_VENDORS)
+
+
+@case("coo.generate_master_data")
+def coo_generate_master_data(coo):
+    master_data, seconds = timed(coo_master_data, coo)
+    return dict(zip(COO_MASTER_TABLES, master_data)), seconds
+
+
+@case("coo.generate_fact_data")
+def coo_generate_fact_data(coo):
+    df_dates = coo.generate_dates(coo.START_DATE, coo.END_DATE)
+    df_companies, df_gl_accounts, df_profit_centers, df_cost_centers, \
+    df_assets, df_materials, df_customers, df_vendors = coo_master_data(coo)
+    facts, seconds = timed(coo.generate_fact_data, df_dates, df_companies, df_gl_accounts, df_profit_centers,
+                           df_cost_centers, coo.AssetRegister(df_assets), df_materials, df_customers, df_vendors, {})
+    return dict(zip(COO_FACT_TABLES, facts)), seconds
+
+
+# Inventory Metrics (timed from the stage banners of a full script run)
+
+def run_inventory(output_dir):
+    env = dict(os.environ, INVENTORY_OUTPUT_DIR=output_dir, INVENTORY_FORMAT="csv")
+    stages, total = run_stages(os.path.join(FINAL_OUTPUT_DIR, GENERATORS["inventory"]["script"]), output_dir, env)
+    rows = {os.path.splitext(filename)[0]: count_csv_rows(os.path.join(output_dir, filename))
+            for filename in os.listdir(output_dir) if filename.endswith(".csv")}
+    return dict(stages), total, rows
+
+
+@case("inventory.transaction_loop")
+def inventory_transaction_loop(_):
+    stages, _, rows = run_inventory(os.getcwd())
+    return {name: rows[name] for name in INVENTORY_TRANSACTION_TABLES}, stages["Generating transactional data"]
+
+
+@case("inventory.end_to_end")
+def inventory_end_to_end(_):
+    _, total, rows = run_inventory(os.getcwd())
+    return rows, total
+
+
+# Manufacturing KPIs
+
+def manufacturing_inputs(mfg):
+    df_plants = mfg.generate_dim_plant(mfg.NUM_PLANTS)
+    df_employees = mfg.generate_dim_employee(mfg.NUM_EMPLOYEES)
+    return df_plants, df_employees, mfg.generate_dim_work_center(df_plants, mfg.NUM_WORK_CENTERS_PER_PLANT, df_employees)
+
+
+@case("manufacturing.generate_dim_material")
+def manufacturing_generate_dim_material(mfg):
+    df, seconds = timed(mfg.generate_dim_material, mfg.NUM_MATERIALS)
+    return {"dim_material": df}, seconds
+
+
+@case("manufacturing.generate_dim_employee")
+def manufacturing_generate_dim_employee(mfg):
+    df, seconds = timed(mfg.generate_dim_employee, mfg.NUM_EMPLOYEES)
+    return {"dim_employee": df}, seconds
+
+
+@case("manufacturing.generate_dim_work_center")
+def manufacturing_generate_dim_work_center(mfg):
+    df_plants, df_employees, _ = manufacturing_inputs(mfg)
+    df, seconds = timed(mfg.generate_dim_work_center, df_plants, mfg.NUM_WORK_CENTERS_PER_PLANT, df_employees)
+    return {"dim_work_center": df}, seconds
+
+
+@case("manufacturing.generate_dim_equipment")
+def manufacturing_generate_dim_equipment(mfg):
+    _, _, df_work_centers = manufacturing_inputs(mfg)
+    df, seconds = timed(mfg.generate_dim_equipment, df_work_centers, mfg.NUM_EQUIPMENT_PER_WORK_CENTER)
+    return {"dim_equipment": df}, seconds
+
+
+@case("manufacturing.generate_dim_vendor")
+def manufacturing_generate_dim_vendor(mfg):
+    df, seconds = timed(mfg.generate_dim_vendor, mfg.NUM_VENDORS)
+    return {"dim_vendor": df}, seconds
+
+
+@case("manufacturing.simulate_shop_floor")
+def manufacturing_simulate_shop_floor(mfg):
+    _, _, df_work_centers = manufacturing_inputs(mfg)
+    df_equipment = mfg.generate_dim_equipment(df_work_centers, mfg.NUM_EQUIPMENT_PER_WORK_CENTER)
+    profiles = mfg.build_equipment_profiles(df_equipment, df_work_centers, mfg.generate_dim_material(mfg.NUM_MATERIALS),
+                                            np.random.default_rng(0))
+    failures = mfg.simulate_equipment_failures(df_equipment, np.random.default_rng(2))
+    breakdowns = mfg.breakdown_shift_minutes(failures, mfg.shift_timeline()[2])
+
+    def simulate():
+        # Month chunks are counted and dropped, as the generator streams them to its writers
+        rows = dict.fromkeys(mfg.FACT_TABLES, 0)
+        for facts in mfg.simulate_shop_floor(profiles, np.random.default_rng(1), breakdowns):
+            for table_name, df in facts.items():
+                rows[table_name] += len(df)
+        return rows
+
+    return timed(simulate)
+
+
+@case("manufacturing.simulate_equipment_failures")
+def manufacturing_simulate_equipment_failures(mfg):
+    _, _, df_work_centers = manufacturing_inputs(mfg)
+    df_equipment = mfg.generate_dim_equipment(df_work_centers, mfg.NUM_EQUIPMENT_PER_WORK_CENTER)
+    failures, seconds = timed(mfg.simulate_equipment_failures, df_equipment, np.random.default_rng(0))
+    return {"fact_maintenance_notification": len(failures["start"])}, seconds
+
+
+@case("manufacturing.failure_events_100k_10y")
+def manufacturing_failure_events_100k_10y(mfg):
+    # 100k equipment units (at scale 1) over ten years, with the parameters of the generated equipment types
+    _, _, df_work_centers = manufacturing_inputs(mfg)
+    df_equipment = mfg.generate_dim_equipment(df_work_centers, mfg.NUM_EQUIPMENT_PER_WORK_CENTER)
+    num_units = scaled(100_000, mfg.SCALE)
+    shape, scale, repair_median = (np.resize(values, num_units)
+                                   for values in mfg.equipment_failure_parameters(df_equipment))
+
+    def simulate():
+        rng = np.random.default_rng(0)
+        return sum(len(unit) for unit, _, _ in failure_events(shape, scale, repair_median, mfg.REPAIR_SIGMA,
+                                                               10 * 8760, rng))
+
+    events, seconds = timed(simulate)
+    return {"failure_events": events}, seconds
+
+
+def run_case(name):
+    """Runs one case in this process and returns its result record (without the scale)."""
+    generator = name.split(".")[0]
+    random.seed(0)
+    np.random.seed(0)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        module = None
+        if generator != "inventory":
+            module = load_generator(os.path.join(FINAL_OUTPUT_DIR, GENERATORS[generator]["script"]),
+                                    f"{generator}_generator")
+            if hasattr(module, "fake"):
+                module.fake.random  # Builds the generator's lazily created Faker before the clock starts
+        tables, seconds = CASES[name](module)
+    rows = {table: value if isinstance(value, int) else len(value) for table, value in tables.items()}
+    peaks = [peak for peak in (peak_rss_mb(), peak_rss_mb(children=True)) if peak is not None]
+    return {
+        "case": name,
+        "seconds": round(seconds, 4),
+        "rows": rows,
+        "rows_per_second": round(sum(rows.values()) / seconds) if seconds > 0 else None,
+        "peak_rss_mb": round(max(peaks), 1) if peaks else None,
+    }
+
+
+def run_case_process(name, scale):
+    """Runs a case in a child process inside a scratch directory and returns its result record."""
+    generator = name.split(".")[0]
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, **generator_environment(generator, {"scale": scale, "output_dir": scratch}))
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-case", name],
+            cwd=scratch, env=env, stdout=subprocess.PIPE, text=True,
+        )
+    if completed.returncode != 0:
+        raise SystemExit(f"Case {name} failed at scale {scale} with exit code {completed.returncode}")
+    return dict(json.loads(completed.stdout.splitlines()[-1]), scale=scale)
+
+
+def git_revision():
+    """(short commit, whether the working tree has changes), or (None, None) outside a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=FINAL_OUTPUT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=FINAL_OUTPUT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as history_file:
+        return json.load(history_file)
+
+
+def previous_results(history):
+    """The latest earlier result per (case, scale)."""
+    previous = {}
+    for run in history:
+        for result in run["results"]:
+            previous[(result["case"], result["scale"])] = result
+    return previous
+
+
+def select_cases(only):
+    """Cases matching any of the filters: a generator ("ceo") or a case name prefix ("cfo.generate_dfkk")."""
+    if not only:
+        return list(CASES)
+    selected = [name for name in CASES
+                if any(name.startswith(prefix) if "." in prefix else name.split(".")[0] == prefix for prefix in only)]
+    if not selected:
+        raise SystemExit(f"No case matches {','.join(only)}; see --list")
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="0.25,0.5,1", help="comma-separated scale factors (default 0.25,0.5,1)")
+    parser.add_argument("--only", default="",
+                        help="comma-separated generators (ceo) or cases/case prefixes (cfo.dfkkop) to run")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file the run is appended to")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case)))
+        return
+    if args.list:
+        print("\n".join(CASES))
+        return
+
+    scales = [float(scale) for scale in args.scales.split(",")]
+    cases = select_cases([prefix for prefix in args.only.split(",") if prefix])
+    history = load_history(args.history)
+    previous = previous_results(history)
+    commit, dirty = git_revision()
+
+    print(f"{'Case':<46} {'Scale':>6} {'Rows':>10} {'Seconds':>9} {'Rows/s':>10} {'Peak MB':>8} {'vs prev':>8}")
+    results = []
+    for name in cases:
+        for scale in scales:
+            result = run_case_process(name, scale)
+            results.append(result)
+            before = previous.get((name, scale))
+            change = f"{result['seconds'] / before['seconds']:>7.2f}x" if before and before["seconds"] else ""
+            rows_per_second = result["rows_per_second"] or 0
+            peak = f"{result['peak_rss_mb']:>8.1f}" if result["peak_rss_mb"] is not None else f"{'n/a':>8}"
+            print(f"{name:<46} {scale:>6g} {sum(result['rows'].values()):>10,} {result['seconds']:>9.3f} "
+                  f"{rows_per_second:>10,} {peak} {change:>8}")
+
+    history.append({
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    })
+    with open(args.history, "w", encoding="utf-8") as history_file:
+        json.dump(history, history_file, indent=2)
+    print(f"Appended {len(results)} results to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
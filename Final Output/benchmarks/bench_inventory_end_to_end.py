@@ -0,0 +1,47 @@
+"""End-to-end benchmark of the Inventory Metrics generator.
+
+Runs the generator script in a scratch directory for one COMPANY_SIZE preset
+(Fortune500 by default), times every stage the script announces on stdout
+and reports the row counts of the exported tables.
+
+Usage: python bench_inventory_end_to_end.py [--size Fortune500] [--keep-output DIR]
+"""
+import argparse
+import os
+import tempfile
+
+from common import INVENTORY_GENERATOR, count_csv_rows, run_stages
+
+
+def run_generator(size, output_dir):
+    """Runs the generator and returns [(stage, seconds)] and the total wall time."""
+    return run_stages(INVENTORY_GENERATOR, output_dir, dict(os.environ, INVENTORY_COMPANY_SIZE=size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="Fortune500", choices=["Startup", "SMB", "Enterprise", "Fortune500"])
+    parser.add_argument("--keep-output", metavar="DIR", help="write the CSVs here instead of a temporary directory")
+    args = parser.parse_args()
+
+    if args.keep_output:
+        os.makedirs(args.keep_output, exist_ok=True)
+        output_dir = args.keep_output
+    else:
+        scratch = tempfile.TemporaryDirectory()
+        output_dir = scratch.name
+
+    stages, total = run_generator(args.size, output_dir)
+
+    print(f"Inventory Metrics generator, {args.size} preset")
+    for stage, seconds in stages:
+        print(f"  {stage:<40} {seconds:>10.2f} s")
+    print(f"  {'Total':<40} {total:>10.2f} s")
+    print("Exported tables")
+    for filename in sorted(os.listdir(output_dir)):
+        if filename.endswith(".csv"):
+            print(f"  {filename:<40} {count_csv_rows(os.path.join(output_dir, filename)):>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
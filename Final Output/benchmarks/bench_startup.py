@@ -0,0 +1,100 @@
+"""Start-up time of the datagen command line and of importing each generator.
+
+Every case runs in a fresh interpreter inside an empty scratch directory and is
+timed from process start to exit (best and median of --repeat runs):
+
+    python          the bare interpreter, for reference
+    cli.list        python -m datagen --list
+    cli.check       python -m datagen --check
+    import.<name>   importing a generator module without running it
+    import.pandas   the import the generators defer, for reference
+
+Import cases also report which of NumPy, pandas and Faker were actually
+executed and whether the import wrote any file, so a generator that goes back
+to doing work at import time shows up here; the run fails if one does.
+
+Usage: python bench_startup.py [--repeat 5] [--only cli,import.ceo]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import FINAL_OUTPUT_DIR
+from datagen.config import GENERATORS
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("numpy", "pandas", "faker")
+
+IMPORT_GENERATOR = """
+import json, sys
+sys.path.insert(0, {benchmarks_dir!r})
+from common import load_generator
+from datagen.lazy import is_loaded
+load_generator({script!r}, "generator")
+print(json.dumps([name for name in {heavy!r} if is_loaded(name)]))
+"""
+
+
+def startup_cases():
+    """Case name -> command line."""
+    cases = {
+        "python": [sys.executable, "-c", "pass"],
+        "cli.list": [sys.executable, "-m", "datagen", "--list"],
+        "cli.check": [sys.executable, "-m", "datagen", "--check"],
+    }
+    for name, generator in GENERATORS.items():
+        code = IMPORT_GENERATOR.format(benchmarks_dir=BENCHMARKS_DIR, heavy=HEAVY_MODULES,
+                                       script=os.path.join(FINAL_OUTPUT_DIR, generator["script"]))
+        cases[f"import.{name}"] = [sys.executable, "-c", code]
+    cases["import.pandas"] = [sys.executable, "-c", "import pandas"]
+    return cases
+
+
+def run_once(command):
+    """Runs a command in a scratch directory; returns (seconds, last stdout line, files it wrote)."""
+    env = dict(os.environ, PYTHONPATH=FINAL_OUTPUT_DIR)
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=scratch, env=env, stdout=subprocess.PIPE, text=True)
+        seconds = time.perf_counter() - start
+        written = sorted(os.listdir(scratch))
+    if completed.returncode != 0:
+        raise SystemExit(f"{command[:3]} failed with exit code {completed.returncode}")
+    lines = completed.stdout.strip().splitlines()
+    return seconds, lines[-1] if lines else "", written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (default: 5)")
+    parser.add_argument("--only", help="comma-separated case names or prefixes (e.g. cli,import.coo)")
+    args = parser.parse_args()
+
+    cases = startup_cases()
+    if args.only:
+        prefixes = [prefix.strip() for prefix in args.only.split(",") if prefix.strip()]
+        cases = {name: command for name, command in cases.items()
+                 if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes)}
+
+    side_effects = []
+    print(f"{'Case':<24} {'Best s':>8} {'Median s':>9}  {'Loaded':<22} Files written")
+    for name, command in cases.items():
+        runs = [run_once(command) for _ in range(args.repeat)]
+        seconds = [run[0] for run in runs]
+        _, output, written = runs[-1]
+        loaded = ", ".join(json.loads(output)) if name.startswith("import.") and output.startswith("[") else ""
+        if name.startswith("import.") and name != "import.pandas" and (loaded or written):
+            side_effects.append(name)
+        print(f"{name:<24} {min(seconds):>8.3f} {statistics.median(seconds):>9.3f}  {loaded or '-':<22} "
+              f"{', '.join(written) or '-'}")
+    if side_effects:
+        raise SystemExit(f"Importing {', '.join(side_effects)} loaded heavy modules or wrote files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Shared helpers for the dataset generator benchmarks."""
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+FINAL_OUTPUT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, FINAL_OUTPUT_DIR)
+from datagen.progress import peak_rss_mb
+
+CEO_GENERATOR = os.path.join(FINAL_OUTPUT_DIR, "CEO Dashboard", "CEO Dashboard Dataset Generation.py")
+INVENTORY_GENERATOR = os.path.join(FINAL_OUTPUT_DIR, "Inventory Metrics", "Dataset Generator.py")
+
+
+def load_generator(path, module_name):
+    """Imports a generator script by file path (the file names contain spaces)."""
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def count_csv_rows(path):
+    """Number of data rows in a CSV file (header excluded)."""
+    with open(path, "rb") as f:
+        return sum(1 for _ in f) - 1
+
+
+def timed(func, *args, **kwargs):
+    """Runs func once and returns (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_stages(script, cwd, env):
+    """Runs a generator script and returns [(stage, seconds)] and the total wall time.
+
+    Stages are delimited by the banners the script prints, lines ending with
+    "..." (e.g. "Updating stock levels...").
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-u", script], cwd=cwd, env=env, stdout=subprocess.PIPE, text=True)
+    stages = []
+    stage, stage_start = "Startup", start
+    for line in process.stdout:
+        line = line.strip()
+        if line.endswith("..."):
+            now = time.perf_counter()
+            stages.append((stage, now - stage_start))
+            stage, stage_start = line.rstrip("."), now
+    if process.wait() != 0:
+        raise SystemExit(f"Generator failed with exit code {process.returncode}")
+    end = time.perf_counter()
+    stages.append((stage, end - stage_start))
+    return stages, end - start
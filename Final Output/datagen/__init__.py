@@ -0,0 +1 @@
+"""Shared building blocks for the dashboard dataset generators."""
@@ -0,0 +1,188 @@
+"""The date dimension shared by the generators, built with whole-array operations.
+
+build_calendar() returns a Calendar for a date range, fiscal-year start month
+and holiday calendar. It holds one read-only NumPy array per attribute (fiscal
+year and period, ISO week, business-day mask, month-end flags, ...) with one
+entry per day, and builds dim_date from them:
+
+    calendar = build_calendar("2023-04-01", "2025-03-31", fiscal_year_start_month=4)
+    calendar.business_days                          # weekdays that are not holidays
+    calendar.fiscal_month[calendar.is_business_day]
+    dim_date = calendar.date_dimension()
+
+Calendars are memoized per (start, end, fiscal-year start, holidays), so every
+table of a run, and every generator run in the same process, shares one build.
+
+holidays is None (weekends only), the name of a calendar in HOLIDAY_CALENDARS
+or an iterable of dates. The same business-day and fiscal rules apply to dates
+outside a calendar through is_business_day(), business_day_offset() and
+fiscal_year_and_period().
+"""
+import functools
+
+from datagen.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Holiday calendar name -> class in pandas.tseries.holiday
+HOLIDAY_CALENDARS = {"us_federal": "USFederalHolidayCalendar"}
+WEEKMASK = "Mon Tue Wed Thu Fri"
+
+
+def _as_days(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+
+
+def holiday_dates(holidays, start, end):
+    """Holidays from start to end as a datetime64[D] array; holidays as for build_calendar."""
+    if holidays is None:
+        return np.array([], dtype="datetime64[D]")
+    if isinstance(holidays, str):
+        if holidays not in HOLIDAY_CALENDARS:
+            raise ValueError(f"Unknown holiday calendar {holidays!r}; expected one of {sorted(HOLIDAY_CALENDARS)}")
+        from pandas.tseries import holiday
+        calendar_class = getattr(holiday, HOLIDAY_CALENDARS[holidays])
+        return calendar_class().holidays(pd.Timestamp(start), pd.Timestamp(end)).to_numpy().astype("datetime64[D]")
+    return np.unique(_as_days(list(holidays)))
+
+
+def is_business_day(dates, holidays=None):
+    """Boolean array: which dates are weekdays and not holidays."""
+    days = _as_days(dates)
+    if not len(days):
+        return np.zeros(0, dtype=bool)
+    return np.is_busday(days, weekmask=WEEKMASK, holidays=holiday_dates(holidays, days.min(), days.max()))
+
+
+def business_day_offset(dates, offsets=0, roll="forward", holidays=None):
+    """Dates moved by offsets business days (np.busday_offset), honouring the holiday calendar.
+
+    Returns a datetime64[D] array; roll decides where dates that are not
+    business days start from ("forward" moves them to the next business day).
+    """
+    days = _as_days(dates)
+    if not len(days):
+        return days
+    # Holidays are looked up over the dates plus enough slack for the offsets to land in
+    slack = np.timedelta64(2 * int(np.abs(np.asarray(offsets)).max()) + 31, "D")
+    calendar_holidays = holiday_dates(holidays, days.min() - slack, days.max() + slack)
+    return np.busday_offset(days, offsets, roll=roll, weekmask=WEEKMASK, holidays=calendar_holidays)
+
+
+def _fiscal_year_and_month(years, months, fiscal_year_start_month):
+    # Fiscal years are named by the calendar year they start in; periods count from 1
+    offset = months - fiscal_year_start_month
+    return years - (offset < 0), offset % 12 + 1
+
+
+def fiscal_year_and_period(dates, fiscal_year_start_month=1):
+    """Fiscal year (named by its starting calendar year) and period 1-12 for each date.
+
+    Returns two nullable Int64 Series aligned with dates; missing dates give <NA>.
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    fiscal_year, fiscal_period = _fiscal_year_and_month(dates.dt.year, dates.dt.month, fiscal_year_start_month)
+    return fiscal_year.astype("Int64"), fiscal_period.astype("Int64")
+
+
+class Calendar:
+    """The date dimension of one date range as arrays; see the module docstring.
+
+    Calendars are shared through build_calendar(), so their arrays are
+    read-only. day_of_week runs from 1 (Monday) to 7, week is the ISO week and
+    the fiscal columns follow fiscal_year_start_month.
+    """
+
+    def __init__(self, start, end, fiscal_year_start_month=1, holidays=None):
+        if not 1 <= fiscal_year_start_month <= 12:
+            raise ValueError(f"fiscal_year_start_month must be 1-12, got {fiscal_year_start_month}")
+        self.fiscal_year_start_month = fiscal_year_start_month
+        self.days = pd.date_range(start, end, freq="D")
+        self.holidays = holiday_dates(holidays, start, end)
+        days = self.days
+        values = days.to_numpy().astype("datetime64[D]")
+        months = values.astype("datetime64[M]")
+
+        self.date = values
+        self.year = days.year.to_numpy(np.int64)
+        self.quarter = days.quarter.to_numpy(np.int64)
+        self.month = days.month.to_numpy(np.int64)
+        self.day = days.day.to_numpy(np.int64)
+        self.week = days.isocalendar().week.to_numpy(np.int64)
+        self.day_of_week = days.dayofweek.to_numpy(np.int64) + 1
+        self.month_name = days.month_name().to_numpy(object)
+        self.day_name = days.day_name().to_numpy(object)
+        self.fiscal_year, self.fiscal_month = _fiscal_year_and_month(self.year, self.month, fiscal_year_start_month)
+        self.fiscal_quarter = (self.fiscal_month - 1) // 3 + 1
+        self.is_weekend = self.day_of_week >= 6
+        self.is_holiday = np.isin(values, self.holidays)
+        self.is_business_day = ~self.is_weekend & ~self.is_holiday
+        self.is_month_start = np.asarray(days.is_month_start)
+        self.is_month_end = np.asarray(days.is_month_end)
+        self.is_fiscal_quarter_end = self.is_month_end & (self.fiscal_month % 3 == 0)
+        self.is_fiscal_year_end = self.is_month_end & (self.fiscal_month == 12)
+        self.month_start_date = months.astype("datetime64[D]")
+        self.quarter_start_date = (months - ((self.month - 1) % 3).astype("timedelta64[M]")).astype("datetime64[D]")
+        self.year_start_date = values.astype("datetime64[Y]").astype("datetime64[D]")
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def business_days(self):
+        """The business days of the range as a DatetimeIndex."""
+        return self.days[self.is_business_day]
+
+    def date_keys(self, mask=None):
+        """ISO date strings ("2023-04-01") of every day, or of the days a boolean mask selects."""
+        values = self.date if mask is None else self.date[mask]
+        return np.datetime_as_string(values, unit="D").tolist()
+
+    def date_dimension(self, as_strings=False):
+        """dim_date as a DataFrame with one row per day.
+
+        Columns: date_key, year, quarter, month, month_name, week, day_of_week,
+        day_name, fiscal_year, fiscal_quarter, fiscal_month, is_weekend,
+        is_holiday, month_start_date, quarter_start_date and year_start_date.
+        Dates are datetime.date values, or ISO strings with as_strings=True.
+        """
+        def dates(values):
+            return np.datetime_as_string(values, unit="D").astype(object) if as_strings else values.astype(object)
+
+        return pd.DataFrame({
+            "date_key": dates(self.date),
+            "year": self.year,
+            "quarter": self.quarter,
+            "month": self.month,
+            "month_name": self.month_name,
+            "week": self.week,
+            "day_of_week": self.day_of_week,
+            "day_name": self.day_name,
+            "fiscal_year": self.fiscal_year,
+            "fiscal_quarter": self.fiscal_quarter,
+            "fiscal_month": self.fiscal_month,
+            "is_weekend": self.is_weekend,
+            "is_holiday": self.is_holiday,
+            "month_start_date": dates(self.month_start_date),
+            "quarter_start_date": dates(self.quarter_start_date),
+            "year_start_date": dates(self.year_start_date),
+        })
+
+
+def build_calendar(start, end, fiscal_year_start_month=1, holidays=None):
+    """The Calendar from start to end inclusive (dates, datetimes or ISO strings), memoized.
+
+    holidays is None, a HOLIDAY_CALENDARS name or an iterable of dates.
+    """
+    if holidays is not None and not isinstance(holidays, str):
+        holidays = tuple(np.datetime_as_string(holiday_dates(holidays, start, end), unit="D"))
+    return _cached_calendar(pd.Timestamp(start).date(), pd.Timestamp(end).date(), fiscal_year_start_month, holidays)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_calendar(start, end, fiscal_year_start_month, holidays):
+    return Calendar(start, end, fiscal_year_start_month, holidays)
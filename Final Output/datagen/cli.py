@@ -0,0 +1,90 @@
+"""Command line entry point that runs any subset of the dashboard generators.
+
+    python -m datagen ceo coo --scale 2 --start-date 2023-01-01 --end-date 2023-12-31 \\
+        --seed 7 --output-dir sizing --format parquet --config sizing.toml
+
+Each generator runs as its own process (see datagen.config for how settings
+reach it) and writes into a subdirectory of --output-dir named after it.
+Options given on the command line override the config files.
+
+    python -m datagen --list                          # generators and their settings
+    python -m datagen --check --config sizing.toml    # validate and show settings, run nothing
+
+Neither --list nor --check imports pandas or a generator, so both return at once.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from datagen.config import (COMMON_SETTINGS, FINAL_OUTPUT_DIR, FORMATS, GENERATORS, generator_environment,
+                            generator_settings, load_config, merge_configs)
+from datagen.progress import PROFILERS
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m datagen", description="Generate dashboard demo datasets.")
+    parser.add_argument("generators", nargs="*", metavar="generator",
+                        help=f"generators to run: {', '.join(GENERATORS)} (default: all)")
+    parser.add_argument("--config", action="append", default=[], metavar="FILE",
+                        help="TOML or YAML config file; repeatable, later files win")
+    parser.add_argument("--scale", type=float, help="multiplies master-data counts and daily volumes")
+    parser.add_argument("--start-date", help="first generated date (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="last generated date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, help="root random seed")
+    parser.add_argument("--output-dir", help="root directory; each generator writes to a subdirectory (default: .)")
+    parser.add_argument("--format", choices=FORMATS, help="output file format")
+    parser.add_argument("--profile", choices=PROFILERS, help="profile every stage into <output>/_profiles")
+    parser.add_argument("--list", action="store_true", help="list the generators and the settings they read, then exit")
+    parser.add_argument("--check", action="store_true",
+                        help="validate the settings and print them per generator without running anything")
+    return parser
+
+
+def list_generators():
+    for name, generator in GENERATORS.items():
+        print(f"{name}: {generator['script']}")
+        print(f"    settings: {', '.join(COMMON_SETTINGS + generator['settings'])} "
+              f"(environment: {generator['prefix']}_<SETTING>)")
+
+
+def run_generator(name, settings):
+    """Runs one generator script with settings and returns its wall time in seconds."""
+    settings = dict(settings, output_dir=os.path.abspath(os.path.join(settings.get("output_dir", "."), name)))
+    os.makedirs(settings["output_dir"], exist_ok=True)
+    script = os.path.join(FINAL_OUTPUT_DIR, GENERATORS[name]["script"])
+    env = dict(os.environ, **generator_environment(name, settings))
+    print(f"==> {name}: {settings['output_dir']}", flush=True)
+    start = time.perf_counter()
+    # Generators write relative paths (e.g. their state) under the output directory
+    result = subprocess.run([sys.executable, script], cwd=settings["output_dir"], env=env)
+    if result.returncode != 0:
+        raise SystemExit(f"{name} generator failed with exit code {result.returncode}")
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.list:
+        list_generators()
+        return
+    unknown = [name for name in args.generators if name not in GENERATORS]
+    if unknown:
+        parser.error(f"unknown generator(s) {', '.join(unknown)}; choose from {', '.join(GENERATORS)}")
+    try:
+        config = merge_configs(load_config(path) for path in args.config)
+        overrides = {key: getattr(args, key) for key in COMMON_SETTINGS if getattr(args, key) is not None}
+        names = args.generators or list(GENERATORS)
+        settings = {name: generator_settings(name, config, overrides) for name in names}
+    except (OSError, ValueError, ImportError) as exc:
+        raise SystemExit(f"error: {exc}")
+    if args.check:
+        for name in names:
+            values = ", ".join(f"{key}={value}" for key, value in sorted(settings[name].items()))
+            print(f"{name}: {values or 'defaults'}")
+        return
+    for name in names:
+        elapsed = run_generator(name, settings[name])
+        print(f"==> {name} finished in {elapsed:.1f}s", flush=True)
@@ -0,0 +1,163 @@
+"""Generator settings shared by the scripts and the datagen command line.
+
+Every generator reads its knobs from environment variables named
+<PREFIX>_<SETTING> (CEO_SCALE, COO_START_DATE, INVENTORY_COMPANY_SIZE, ...), so
+a script behaves the same whether it is run directly or through
+``python -m datagen``. The settings every generator understands are:
+
+    scale        multiplies master-data counts and daily volumes together
+    start_date   first generated date (ISO format)
+    end_date     last generated date (ISO format)
+    seed         root random seed
+    output_dir   directory the tables are written to
+    format       csv, parquet or feather
+    profile      cprofile or pyinstrument: profile every stage (see datagen.progress)
+
+Config files are TOML, or YAML when PyYAML is installed. Top-level keys apply
+to every generator and a table named after a generator overrides them:
+
+    scale = 2
+    format = "parquet"
+
+    [ceo]
+    workers = 4
+
+    [inventory]
+    company_size = "SMB"
+
+Setting values are checked up front (validate_settings), so a bad value fails
+before any generator starts rather than halfway through a run.
+"""
+import os
+from datetime import date
+
+from datagen.progress import PROFILERS
+
+FINAL_OUTPUT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMON_SETTINGS = ("scale", "start_date", "end_date", "seed", "output_dir", "format", "profile")
+FORMATS = ("csv", "parquet", "feather")
+COMPANY_SIZES = ("Startup", "SMB", "Enterprise", "Fortune500")  # Inventory size presets (size_params in its script)
+
+# Script, environment prefix, the settings each generator reads beyond COMMON_SETTINGS and the
+# start/end dates its script uses when none are set
+GENERATORS = {
+    "ceo": {"script": os.path.join("CEO Dashboard", "CEO Dashboard Dataset Generation.py"), "prefix": "CEO",
+            "settings": ("workers", "append_days"), "dates": ("2023-01-01", "2024-12-31")},
+    "cfo": {"script": os.path.join("CFO Dashboard", "CFO Dashboard Dataset Generation.py"), "prefix": "CFO",
+            "settings": ("append_days",), "dates": ("2023-04-01", "2024-03-31")},
+    "coo": {"script": os.path.join("COO Dashboard", "Dataset Generator.py"), "prefix": "COO",
+            "settings": ("workers", "append_days"), "dates": ("2023-04-01", "2025-03-31")},
+    "inventory": {"script": os.path.join("Inventory Metrics", "Dataset Generator.py"), "prefix": "INVENTORY",
+                  "settings": ("company_size", "workers", "append_days"), "dates": ("2023-01-01", "2024-12-31")},
+    "manufacturing": {"script": os.path.join("Manufacturing KPIs", "Dataset Generator.py"), "prefix": "MANUFACTURING",
+                      "settings": (), "dates": ("2023-04-01", "2025-03-31")},
+}
+
+
+# Setting -> (check that returns True or raises ValueError/TypeError for a usable value, what was expected)
+SETTING_CHECKS = {
+    "scale": (lambda value: float(value) > 0, "a positive number"),
+    "start_date": (lambda value: bool(date.fromisoformat(str(value))), "a YYYY-MM-DD date"),
+    "end_date": (lambda value: bool(date.fromisoformat(str(value))), "a YYYY-MM-DD date"),
+    "seed": (lambda value: int(str(value)) >= 0, "a non-negative integer"),
+    "format": (lambda value: value in FORMATS, f"one of {list(FORMATS)}"),
+    "profile": (lambda value: value in PROFILERS, f"one of {list(PROFILERS)}"),
+    "workers": (lambda value: int(str(value)) >= 1, "a positive integer"),
+    "append_days": (lambda value: int(str(value)) >= 0, "a non-negative integer"),
+    "company_size": (lambda value: value in COMPANY_SIZES, f"one of {list(COMPANY_SIZES)}"),
+}
+
+
+def scaled(count, scale):
+    """A master-data count multiplied by the scale factor (at least 1)."""
+    return max(1, int(round(count * scale)))
+
+
+def _import_yaml():
+    try:
+        import yaml
+    except ImportError as exc:
+        raise ImportError("YAML config files require PyYAML (pip install pyyaml); "
+                          "TOML files need no extra package") from exc
+    return yaml
+
+
+def load_config(path):
+    """Settings from a TOML (.toml) or YAML (.yaml/.yml) config file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        import tomllib
+        with open(path, "rb") as config_file:
+            return tomllib.load(config_file)
+    if extension in (".yaml", ".yml"):
+        yaml = _import_yaml()
+        with open(path, encoding="utf-8") as config_file:
+            return yaml.safe_load(config_file) or {}
+    raise ValueError(f"Unknown config file type {path!r}; expected .toml, .yaml or .yml")
+
+
+def merge_configs(configs):
+    """Merges config dicts in order; later files override earlier ones, per generator table too."""
+    merged = {}
+    for config in configs:
+        for key, value in config.items():
+            if isinstance(value, dict):
+                merged[key] = dict(merged.get(key, {}), **value)
+            else:
+                merged[key] = value
+    return merged
+
+
+def generator_settings(name, config, overrides=None):
+    """Settings for one generator: top-level config, then its own table, then overrides.
+
+    Raises ValueError for keys the generator does not read, so a typo in a
+    config file fails the run instead of being ignored.
+    """
+    allowed = COMMON_SETTINGS + GENERATORS[name]["settings"]
+    settings = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            if key not in GENERATORS:
+                raise ValueError(f"Unknown generator table [{key}]; expected one of {sorted(GENERATORS)}")
+        elif key not in COMMON_SETTINGS:
+            raise ValueError(f"Unknown top-level setting {key!r}; expected one of {list(COMMON_SETTINGS)}")
+        else:
+            settings[key] = value
+    for key, value in config.get(name, {}).items():
+        if key not in allowed:
+            raise ValueError(f"Unknown {name} setting {key!r}; expected one of {list(allowed)}")
+        settings[key] = value
+    settings.update(overrides or {})
+    validate_settings(name, settings)
+    return settings
+
+
+def validate_settings(name, settings):
+    """Raises ValueError for the first setting value the generator could not use.
+
+    The period is checked too: start_date must not fall after end_date, taking
+    the generator's default for whichever of the two is not set.
+    """
+    for key, value in settings.items():
+        check, expected = SETTING_CHECKS.get(key, (None, None))
+        if check is None:
+            continue
+        try:
+            valid = check(value)
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError(f"Invalid {name} setting {key}={value!r}; expected {expected}")
+    if "start_date" in settings or "end_date" in settings:
+        start_date, end_date = (settings.get(key, default) for key, default in
+                                zip(("start_date", "end_date"), GENERATORS[name]["dates"]))
+        if date.fromisoformat(str(start_date)) > date.fromisoformat(str(end_date)):
+            raise ValueError(f"Invalid {name} dates: start_date {start_date} is after end_date {end_date}")
+
+
+def generator_environment(name, settings):
+    """Environment variables that pass settings to a generator script."""
+    prefix = GENERATORS[name]["prefix"]
+    return {f"{prefix}_{key.upper()}": str(value) for key, value in settings.items()}
@@ -0,0 +1,62 @@
+"""Deferred imports, so generator modules can be imported without side effects.
+
+Importing pandas, NumPy and Faker (and building a Faker locale) takes most of a
+second, which dominates listing settings, validating a config or calling one
+table function from a benchmark. Generator modules therefore bind them lazily:
+
+    pd = lazy_import("pandas")   # imported on the first pd.<attribute>
+    fake = LazyFaker("en_US")    # Faker("en_US") built on the first fake.<method>()
+
+and keep all work that needs them inside functions.
+"""
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name):
+    """The module called name, executed on its first attribute access instead of now."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name):
+    """Whether the module called name has actually been executed (not just bound by lazy_import)."""
+    # A lazily loaded module is of a ModuleType subclass until its first attribute access
+    return type(sys.modules.get(name)) is types.ModuleType
+
+
+class LazyFaker:
+    """A Faker for one locale, imported and built on first use.
+
+    Attribute access is forwarded to the Faker (fake.date_between(), fake.random,
+    ...). seed() seeds the random stream shared by all Faker instances, like
+    Faker.seed(), without building one.
+    """
+
+    def __init__(self, locale=None):
+        self._locale = locale
+        self._faker = None
+
+    def __getattr__(self, name):
+        # Only reached for names the proxy itself does not have
+        if name.startswith("__") or name in ("_locale", "_faker"):
+            raise AttributeError(name)
+        if self._faker is None:
+            from faker import Faker
+            self._faker = Faker(self._locale)
+        return getattr(self._faker, name)
+
+    @staticmethod
+    def seed(seed):
+        from faker import Faker
+        Faker.seed(seed)
@@ -0,0 +1,557 @@
+"""Table writers shared by the generators.
+
+CSV is the default format. Parquet and Arrow IPC (Feather) need pyarrow, which
+is imported only when one of those formats is requested. Tables can pass a
+schema that maps column names to one of these type names:
+
+    "code"          dictionary-encoded string (company codes, currencies, ...);
+                    plain string in Feather files
+    "string"        plain string
+    "date"          date32
+    "decimal(p,s)"  decimal128 with precision p and scale s
+    any pyarrow type alias, e.g. "int32", "int64", "float64", "bool"
+
+Columns left out of a schema are inferred from their pandas dtype.
+
+Fact tables can also be written as Hive-style partition trees
+(<table>/fiscal_year=2023/fiscal_period=4/part-0.csv) through DatasetOutput,
+which then records every partition's row count and date range in
+_manifest.json so incremental refreshes and DuckDB/Arrow readers can prune by
+period or company code.
+
+Every writer can also be opened with append=True to extend an existing file:
+CSV rows are appended in place, and Parquet and Feather files are rewritten
+row group (record batch) by row group with the new rows after the existing
+ones. Partitioned tables only touch the partitions that receive
+rows, and the manifest is merged rather than replaced.
+"""
+import json
+import os
+from urllib.parse import quote
+
+from datagen.calendar import fiscal_year_and_period
+from datagen.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+FILE_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+ROW_GROUP_SIZE = 1_000_000  # Rows per Parquet row group / Feather record batch
+MANIFEST_FILENAME = "_manifest.json"
+HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"  # Directory value Hive readers map back to null
+FISCAL_COLUMNS = ("fiscal_year", "fiscal_period")
+
+
+class CsvChunkWriter:
+    """Streams DataFrame chunks into one CSV file with a single header.
+
+    Only the chunk being written is held in memory, so a table can be far larger
+    than RAM. The first chunk fixes the column order; later chunks are written
+    in that order. With append=True and an existing file, its header fixes the
+    column order and rows are added after the existing ones. Use as a context
+    manager, or call close().
+    """
+
+    pending_rows = 0  # Rows go straight to the file; nothing is buffered
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.rows = 0
+        self.columns = None
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            self.columns = list(pd.read_csv(path, nrows=0).columns)
+        self._file = open(path, "a" if self.columns else "w", newline="", encoding="utf-8")
+
+    def write(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            chunk.to_csv(self._file, index=False)
+        else:
+            chunk.to_csv(self._file, index=False, header=False, columns=self.columns)
+        self.rows += len(chunk)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_csv_chunks(chunks, path):
+    """Writes an iterable of DataFrame chunks to one CSV file and returns the row count."""
+    with CsvChunkWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows
+
+
+def table_filename(table_name, fmt="csv"):
+    """File name for a table in the given output format."""
+    return table_name + FILE_EXTENSIONS[fmt]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Parquet and Feather output require pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def _arrow_type(pa, type_name):
+    if type_name == "code":
+        return pa.dictionary(pa.int32(), pa.string())
+    if type_name == "date":
+        return pa.date32()
+    if type_name.startswith("decimal("):
+        precision, scale = (int(part) for part in type_name[len("decimal("):-1].split(","))
+        return pa.decimal128(precision, scale)
+    return pa.type_for_alias(type_name)
+
+
+def _arrow_column(pa, values, type_name):
+    if type_name is None:
+        array = pa.array(values, from_pandas=True)
+        # All-null columns default to string so later chunks with values still match
+        return array.cast(pa.string()) if pa.types.is_null(array.type) else array
+    if type_name in ("code", "string"):
+        # Numeric identifiers are stored in their text form
+        array = pa.array(pd.Series(values).astype("string"), type=pa.string(), from_pandas=True)
+        return array.dictionary_encode() if type_name == "code" else array
+    if type_name == "date":
+        return pa.array(pd.to_datetime(values).to_numpy(dtype="datetime64[D]"), type=pa.date32(), from_pandas=True)
+    if type_name.startswith("decimal("):
+        return pa.array(values, type=pa.float64(), from_pandas=True).cast(_arrow_type(pa, type_name))
+    return pa.array(values, type=_arrow_type(pa, type_name), from_pandas=True)
+
+
+def arrow_table(chunk, schema=None):
+    """Converts a DataFrame chunk to a pyarrow Table using the table schema."""
+    pa = _import_pyarrow()
+    schema = schema or {}
+    columns = [_arrow_column(pa, chunk[column], schema.get(column)) for column in chunk.columns]
+    return pa.Table.from_arrays(columns, names=[str(column) for column in chunk.columns])
+
+
+class _ArrowChunkWriter:
+    """Buffers DataFrame chunks as Arrow tables and writes them in blocks of row_group_size rows.
+
+    Many small chunks (e.g. one per day) still produce full row groups, and no
+    more than one block of rows is held in memory. The first chunk fixes the
+    Arrow schema; later chunks are cast to it. Subclasses open the file writer
+    (copying an existing file's rows first when appending) and write blocks.
+    """
+
+    def __init__(self, path, schema=None, row_group_size=ROW_GROUP_SIZE):
+        self.pa = _import_pyarrow()
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.arrow_schema = None
+        self._writer = None
+        self._pending = []
+        self.pending_rows = 0
+
+    def _file_schema(self, schema):
+        return schema
+
+    def write(self, chunk):
+        table = arrow_table(chunk, self.schema)
+        if self.arrow_schema is None:
+            self.arrow_schema = self._file_schema(table.schema)
+        if table.schema != self.arrow_schema:
+            table = table.select(self.arrow_schema.names).cast(self.arrow_schema)
+        if self._writer is None:
+            self._open_writer()
+        self._pending.append(table)
+        self.pending_rows += len(table)
+        self.rows += len(table)
+        if self.pending_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def flush(self):
+        """Writes the buffered rows now, as a row group (record batch) shorter than row_group_size."""
+        if self._pending:
+            self._flush(final=True)
+
+    def _flush(self, final):
+        table = self.pa.concat_tables(self._pending)
+        full_rows = len(table) if final else len(table) // self.row_group_size * self.row_group_size
+        if full_rows:
+            self._write_block(table.slice(0, full_rows))
+        remainder = table.slice(full_rows)
+        self._pending = [remainder] if len(remainder) else []
+        self.pending_rows = len(remainder)
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+            self._finish()
+
+    def _finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetChunkWriter(_ArrowChunkWriter):
+    """Streams DataFrame chunks into one Parquet file.
+
+    Chunks are buffered until a full row group is available, so many small
+    chunks (e.g. one per day) still produce row groups of row_group_size rows.
+    The first chunk fixes the Arrow schema; later chunks are cast to it. With
+    append=True and an existing file, the file's schema is used and its row
+    groups are copied into a replacement file ahead of the new rows.
+    """
+
+    def __init__(self, path, schema=None, row_group_size=ROW_GROUP_SIZE, append=False):
+        super().__init__(path, schema, row_group_size)
+        self._existing = None
+        if append and os.path.exists(path):
+            self._existing = self.pa.parquet.ParquetFile(path)
+            self.arrow_schema = self._existing.schema_arrow
+
+    def _open_writer(self):
+        if self._existing is None:
+            self._writer = self.pa.parquet.ParquetWriter(self.path, self.arrow_schema, compression="zstd")
+            return
+        self._writer = self.pa.parquet.ParquetWriter(self.path + ".tmp", self.arrow_schema, compression="zstd")
+        for index in range(self._existing.num_row_groups):
+            self._writer.write_table(self._existing.read_row_group(index))
+
+    def _write_block(self, table):
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def _finish(self):
+        if self._existing is not None:
+            self._existing.close()
+            os.replace(self.path + ".tmp", self.path)
+
+
+class FeatherChunkWriter(_ArrowChunkWriter):
+    """Streams DataFrame chunks into one Feather (Arrow IPC) file.
+
+    Rows are written as record batches of row_group_size rows while chunks
+    arrive, like the Parquet writer's row groups. The IPC file format allows
+    only one dictionary per column for the whole file, so dictionary-encoded
+    ("code") columns are stored as plain strings. With append=True and an
+    existing file, its record batches are copied into a replacement file ahead
+    of the new rows.
+    """
+
+    def __init__(self, path, schema=None, row_group_size=ROW_GROUP_SIZE, append=False):
+        super().__init__(path, schema, row_group_size)
+        self._source = None
+        self._existing = None
+        if append and os.path.exists(path):
+            self._source = self.pa.memory_map(path)
+            self._existing = self.pa.ipc.open_file(self._source)
+            self.arrow_schema = self._file_schema(self._existing.schema)
+
+    def _file_schema(self, schema):
+        return self.pa.schema([field.with_type(field.type.value_type) if self.pa.types.is_dictionary(field.type)
+                               else field for field in schema])
+
+    def _open_writer(self):
+        options = self.pa.ipc.IpcWriteOptions(compression="zstd")
+        if self._existing is None:
+            self._writer = self.pa.ipc.new_file(self.path, self.arrow_schema, options=options)
+            return
+        self._writer = self.pa.ipc.new_file(self.path + ".tmp", self.arrow_schema, options=options)
+        for index in range(self._existing.num_record_batches):
+            # Files from older versions may still hold dictionary columns
+            self._writer.write_batch(self._existing.get_batch(index).cast(self.arrow_schema))
+
+    def _write_block(self, table):
+        # One record batch per block rather than one per buffered chunk
+        self._writer.write_table(table.combine_chunks(), max_chunksize=self.row_group_size)
+
+    def _finish(self):
+        if self._existing is not None:
+            self._source.close()
+            os.replace(self.path + ".tmp", self.path)
+
+
+def open_table_writer(path, fmt="csv", schema=None, row_group_size=ROW_GROUP_SIZE, append=False):
+    """Chunk writer for the requested output format (csv, parquet or feather)."""
+    if fmt == "csv":
+        return CsvChunkWriter(path, append)
+    if fmt == "parquet":
+        return ParquetChunkWriter(path, schema, row_group_size, append)
+    if fmt == "feather":
+        return FeatherChunkWriter(path, schema, row_group_size, append)
+    raise ValueError(f"Unknown output format {fmt!r}; expected one of {sorted(FILE_EXTENSIONS)}")
+
+
+def write_table(data, path, fmt="csv", schema=None, row_group_size=ROW_GROUP_SIZE, append=False):
+    """Writes a DataFrame, or an iterable of DataFrame chunks, and returns the row count written."""
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    with open_table_writer(path, fmt, schema, row_group_size, append) as writer:
+        for chunk in data:
+            writer.write(chunk)
+    return writer.rows
+
+
+def _partition_sort_key(values):
+    return tuple((value is None, value) for value in values)
+
+
+def _merge_manifest_entry(previous, new):
+    """Adds an appended table's manifest entry onto the one from earlier runs."""
+    merged = dict(new, rows=previous["rows"] + new["rows"])
+    if "partitions" not in new:
+        return merged
+    partitions = {partition["path"]: dict(partition) for partition in previous.get("partitions", [])}
+    for partition in new["partitions"]:
+        earlier = partitions.get(partition["path"])
+        if earlier is None:
+            partitions[partition["path"]] = partition
+            continue
+        earlier["rows"] += partition["rows"]
+        for bound, pick in (("min_date", min), ("max_date", max)):
+            dates = [date for date in (earlier[bound], partition[bound]) if date is not None]
+            earlier[bound] = pick(dates) if dates else None
+    merged["partitions"] = sorted(partitions.values(), key=lambda partition: _partition_sort_key(
+        [partition["values"][column] for column in new["partition_by"]]))
+    return merged
+
+
+def _partition_value(value):
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+class PartitionedTableWriter:
+    """Streams DataFrame chunks into a Hive-style directory tree, one file per partition.
+
+    Rows land in <directory>/<column>=<value>/.../part-0<ext>. Partition values
+    come from the chunk (or from the keys frame passed to write), and
+    fiscal_year/fiscal_period are derived from date_column when the table does
+    not carry them. Partition columns are not repeated inside the files; Hive
+    readers restore them from the path. Every partition keeps its writer open
+    until close(), so later chunks may add rows to earlier partitions. The
+    Parquet/Feather rows buffered across all partitions are kept to about
+    row_group_size (see _limit_pending), however many partitions are open.
+    With append=True, partitions that already exist are extended instead of
+    replaced.
+    """
+
+    def __init__(self, directory, fmt="csv", partition_by=FISCAL_COLUMNS, date_column=None, schema=None,
+                 row_group_size=ROW_GROUP_SIZE, fiscal_year_start_month=1, append=False):
+        self.directory = directory
+        self.fmt = fmt
+        self.partition_by = list(partition_by)
+        self.date_column = date_column
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.fiscal_year_start_month = fiscal_year_start_month
+        self.append = append
+        self.rows = 0
+        self._partitions = {}
+
+    def _partition_keys(self, source):
+        keys = {}
+        fiscal = None
+        for column in self.partition_by:
+            if column in source.columns:
+                keys[column] = source[column].reset_index(drop=True)
+            elif column in FISCAL_COLUMNS and self.date_column in source.columns:
+                if fiscal is None:
+                    fiscal = fiscal_year_and_period(source[self.date_column], self.fiscal_year_start_month)
+                keys[column] = fiscal[FISCAL_COLUMNS.index(column)].reset_index(drop=True)
+            else:
+                raise KeyError(f"Cannot partition {self.directory!r} by {column!r}: "
+                               f"the column is missing and cannot be derived from {self.date_column!r}")
+        return pd.DataFrame(keys)
+
+    def _partition(self, key):
+        partition = self._partitions.get(key)
+        if partition is None:
+            parts = [f"{column}={HIVE_NULL if value is None else quote(str(value), safe='')}"
+                     for column, value in zip(self.partition_by, key)]
+            partition_dir = os.path.join(self.directory, *parts)
+            os.makedirs(partition_dir, exist_ok=True)
+            path = os.path.join(partition_dir, "part-0" + FILE_EXTENSIONS[self.fmt])
+            partition = {"writer": open_table_writer(path, self.fmt, self.schema, self.row_group_size, self.append),
+                         "path": path, "rows": 0, "min_date": None, "max_date": None}
+            self._partitions[key] = partition
+        return partition
+
+    def write(self, chunk, keys=None):
+        """Writes chunk; keys optionally supplies the partition and date columns, row-aligned with chunk."""
+        source = chunk if keys is None else keys
+        key_frame = self._partition_keys(source)
+        data = chunk.drop(columns=[column for column in self.partition_by if column in chunk.columns])
+        dates = None
+        if self.date_column in source.columns:
+            dates = pd.to_datetime(source[self.date_column]).reset_index(drop=True)
+        groups = key_frame.groupby(self.partition_by, sort=False, dropna=False).indices
+        written = set()
+        for key, positions in groups.items():
+            key = tuple(_partition_value(value) for value in (key if isinstance(key, tuple) else (key,)))
+            written.add(key)
+            partition = self._partition(key)
+            partition["writer"].write(data.iloc[positions])
+            partition["rows"] += len(positions)
+            if dates is not None:
+                part_dates = dates.iloc[positions]
+                low, high = part_dates.min(), part_dates.max()
+                if not pd.isna(low):
+                    partition["min_date"] = low if partition["min_date"] is None else min(low, partition["min_date"])
+                    partition["max_date"] = high if partition["max_date"] is None else max(high, partition["max_date"])
+        self.rows += len(chunk)
+        self._limit_pending(written)
+
+    def _limit_pending(self, written):
+        """Flushes partitions once their buffered rows together pass row_group_size.
+
+        Partitions the latest chunk did not write to go first: with date
+        partitions those are periods the data has moved past, so they flush
+        complete. If that is not enough (e.g. company code partitions that
+        every chunk writes to), every partition is flushed, trading smaller
+        row groups for bounded memory.
+        """
+        writers = [(key in written, partition["writer"]) for key, partition in self._partitions.items()]
+        pending = sum(writer.pending_rows for _, writer in writers)
+        if pending <= self.row_group_size:
+            return
+        for flush_written in (False, True):
+            for is_written, writer in writers:
+                if is_written == flush_written and writer.pending_rows:
+                    pending -= writer.pending_rows
+                    writer.flush()
+            if pending <= self.row_group_size:
+                return
+
+    def close(self):
+        for partition in self._partitions.values():
+            partition["writer"].close()
+
+    def manifest_entry(self, root):
+        """Partition listing for the manifest, with paths relative to root."""
+        partitions = []
+        for key in sorted(self._partitions, key=_partition_sort_key):
+            partition = self._partitions[key]
+            partitions.append({
+                "path": os.path.relpath(partition["path"], root).replace(os.sep, "/"),
+                "values": dict(zip(self.partition_by, key)),
+                "rows": partition["rows"],
+                "min_date": None if partition["min_date"] is None else partition["min_date"].date().isoformat(),
+                "max_date": None if partition["max_date"] is None else partition["max_date"].date().isoformat(),
+            })
+        return {"partition_by": self.partition_by, "date_column": self.date_column,
+                "rows": self.rows, "partitions": partitions}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DatasetOutput:
+    """Writes one generator's tables into a directory in a single format.
+
+    With partition_by set (e.g. ("fiscal_year", "fiscal_period") or
+    ("company_code",)), the tables named in partitioned_tables (table name ->
+    date column) are written as Hive partition trees and close() writes
+    _manifest.json listing every table, partition, row count and date range.
+    Without it, every table is a single file and no manifest is written.
+    Tables opened with append=True extend what earlier runs wrote, and their
+    manifest entries are merged with the existing manifest.
+    """
+
+    def __init__(self, directory=".", fmt="csv", schemas=None, partition_by=None, partitioned_tables=None,
+                 fiscal_year_start_month=1, row_group_size=ROW_GROUP_SIZE):
+        if fmt not in FILE_EXTENSIONS:
+            raise ValueError(f"Unknown output format {fmt!r}; expected one of {sorted(FILE_EXTENSIONS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.schemas = schemas or {}
+        self.partition_by = list(partition_by) if partition_by else None
+        self.partitioned_tables = partitioned_tables or {}
+        self.fiscal_year_start_month = fiscal_year_start_month
+        self.row_group_size = row_group_size
+        self._writers = {}
+        self._appended = set()
+
+    def is_partitioned(self, table_name):
+        return self.partition_by is not None and table_name in self.partitioned_tables
+
+    def path(self, table_name):
+        """File (or, for partitioned tables, directory) a table is written to."""
+        if self.is_partitioned(table_name):
+            return os.path.join(self.directory, table_name)
+        return os.path.join(self.directory, table_filename(table_name, self.fmt))
+
+    def open(self, table_name, append=False):
+        """Chunk writer for table_name; partitioned writers also accept write(chunk, keys=...)."""
+        os.makedirs(self.directory, exist_ok=True)
+        schema = self.schemas.get(table_name)
+        if self.is_partitioned(table_name):
+            writer = PartitionedTableWriter(self.path(table_name), self.fmt, self.partition_by,
+                                            self.partitioned_tables[table_name], schema, self.row_group_size,
+                                            self.fiscal_year_start_month, append)
+        else:
+            writer = open_table_writer(self.path(table_name), self.fmt, schema, self.row_group_size, append)
+        self._writers[table_name] = writer
+        if append:
+            self._appended.add(table_name)
+        else:
+            self._appended.discard(table_name)
+        return writer
+
+    def write(self, data, table_name, append=False):
+        """Writes a DataFrame, or an iterable of DataFrame chunks, and returns the row count written."""
+        if isinstance(data, pd.DataFrame):
+            data = [data]
+        with self.open(table_name, append) as writer:
+            for chunk in data:
+                writer.write(chunk)
+        return writer.rows
+
+    def manifest(self):
+        tables = {}
+        for table_name, writer in self._writers.items():
+            if isinstance(writer, PartitionedTableWriter):
+                tables[table_name] = writer.manifest_entry(self.directory)
+            else:
+                path = os.path.relpath(self.path(table_name), self.directory).replace(os.sep, "/")
+                tables[table_name] = {"path": path, "rows": writer.rows}
+        return {"format": self.fmt, "partition_by": self.partition_by, "tables": tables}
+
+    def close(self):
+        """Writes the partition manifest when partitioning is enabled."""
+        if self.partition_by is None:
+            return
+        path = os.path.join(self.directory, MANIFEST_FILENAME)
+        manifest = self.manifest()
+        if self._appended and os.path.exists(path):
+            with open(path, encoding="utf-8") as manifest_file:
+                previous = json.load(manifest_file)["tables"]
+            for table_name, entry in manifest["tables"].items():
+                if table_name in self._appended and table_name in previous:
+                    manifest["tables"][table_name] = _merge_manifest_entry(previous[table_name], entry)
+            manifest["tables"] = dict(previous, **manifest["tables"])
+        with open(path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+            manifest_file.write("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,173 @@
+"""Pre-generated Faker value pools, drawn from with vectorized index sampling.
+
+Calling Faker once per row is one of the slowest steps of the generators. A
+FakerPools object instead generates up to ``size`` distinct values per kind
+(company names, cities, job titles, ...) the first time the kind is used,
+caches them on disk per Faker version, locale and seed, and samples rows from
+them with numpy:
+
+    pools = FakerPools("en_US", seed=42)
+    names = pools.sample("company", 10_000, rng)     # with replacement
+    titles = pools.unique("job", 50, rng)            # distinct values
+
+A pool depends only on its kind, locale, seed and size, never on the order in
+which kinds are used, so cached and freshly generated pools are identical.
+Kinds with a small vocabulary (country codes, lorem words) stop growing once
+Faker keeps repeating itself. Values that must be unique at any volume, such
+as serial numbers, come from unique_serials() rather than from a pool.
+
+The cache lives in $DATAGEN_CACHE_DIR (default ~/.cache/datagen); pass
+cache_dir=None to keep pools in memory only.
+"""
+import json
+import os
+import random
+import tempfile
+
+from datagen.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+POOL_SIZE = 5000  # Distinct values generated per kind
+STALE_DRAWS = 2000  # Consecutive repeated values after which a kind counts as exhausted
+DEFAULT_CACHE_DIR = os.environ.get("DATAGEN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "datagen"))
+
+# Kind name -> how one value is made from a Faker instance
+KINDS = {
+    "bs": lambda fake: fake.bs(),
+    "city": lambda fake: fake.city(),
+    "company": lambda fake: fake.company(),
+    "country": lambda fake: fake.country(),
+    "country_code": lambda fake: fake.country_code(),
+    "job": lambda fake: fake.job(),
+    "name": lambda fake: fake.name(),
+    "sentence3": lambda fake: fake.sentence(nb_words=3),
+    "sentence4": lambda fake: fake.sentence(nb_words=4),
+    "word": lambda fake: fake.word(),
+}
+
+
+def _seeded_rng(rnd=random):
+    """A numpy Generator seeded from a stdlib random stream, so seeding that stream keeps draws reproducible."""
+    return np.random.default_rng(rnd.getrandbits(64))
+
+
+def hex_codes(n, rng=None, width=8):
+    """n random upper-case hexadecimal codes of the given width (e.g. "3FA94C0B")."""
+    rng = rng or _seeded_rng()
+    return [f"{value:0{width}X}" for value in rng.integers(0, 16 ** width, n, dtype=np.int64)]
+
+
+def unique_serials(prefix, digits, n, rng=None):
+    """n distinct serial numbers such as "SN-0123456789" (prefix plus zero-padded digits)."""
+    if n > 10 ** digits:
+        raise ValueError(f"Cannot draw {n} distinct {digits}-digit serial numbers")
+    rng = rng or _seeded_rng()
+    return [f"{prefix}{value:0{digits}d}" for value in rng.choice(10 ** digits, n, replace=False)]
+
+
+class FakerPools:
+    """Distinct Faker values per kind for one locale and seed; see the module docstring.
+
+    choice() and the default rng of sample() and unique() draw from the
+    random stream of faker when one is given (looked up on every draw, so a
+    LazyFaker is only built once values are drawn), which keeps pool draws off
+    the stream used for numbers; otherwise from the stdlib module stream.
+    """
+
+    def __init__(self, locale="en_US", seed=0, size=POOL_SIZE, cache_dir=DEFAULT_CACHE_DIR, faker=None):
+        self.locale = locale
+        self.seed = 0 if seed is None else seed
+        self.size = size
+        self.cache_dir = cache_dir
+        self.faker = faker
+        self._pools = {}
+
+    @property
+    def rnd(self):
+        """The random.Random stream draws come from."""
+        return random if self.faker is None else self.faker.random
+
+    def pool(self, kind):
+        """All values of a kind as an object array, generated or loaded on first use."""
+        if kind not in self._pools:
+            if kind not in KINDS:
+                raise ValueError(f"Unknown Faker pool kind {kind!r}; expected one of {sorted(KINDS)}")
+            values = self._load(kind)
+            if values is None:
+                values = self._generate(kind)
+                self._save(kind, values)
+            self._pools[kind] = np.array(values, dtype=object)
+        return self._pools[kind]
+
+    def sample(self, kind, n, rng=None):
+        """n values of a kind drawn with replacement.
+
+        rng is a numpy Generator; by default one is seeded from the pools' rnd
+        stream, so code that seeds that stream stays reproducible.
+        """
+        values = self.pool(kind)
+        rng = rng or _seeded_rng(self.rnd)
+        return values[rng.integers(0, len(values), n)]
+
+    def unique(self, kind, n, rng=None):
+        """n distinct values of a kind; raises ValueError if the pool is smaller than n."""
+        values = self.pool(kind)
+        if n > len(values):
+            raise ValueError(f"The {kind!r} pool has {len(values)} distinct values, fewer than the {n} requested; "
+                             "raise the pool size")
+        rng = rng or _seeded_rng(self.rnd)
+        return values[rng.choice(len(values), n, replace=False)]
+
+    def choice(self, kind):
+        """One value of a kind, drawn with the pools' rnd stream."""
+        return self.rnd.choice(self.pool(kind))
+
+    def serials(self, prefix, digits, n, rng=None):
+        """n distinct serial numbers (see unique_serials), drawn from the pools' rnd stream by default."""
+        return unique_serials(prefix, digits, n, rng or _seeded_rng(self.rnd))
+
+    def _generate(self, kind):
+        from faker import Faker
+        fake = Faker(self.locale)
+        # Seeded per kind so a pool does not depend on which kinds were generated first
+        fake.seed_instance(f"{self.seed}:{kind}")
+        make_value = KINDS[kind]
+        values, seen, stale = [], set(), 0
+        while len(values) < self.size and stale < STALE_DRAWS:
+            value = make_value(fake)
+            if value in seen:
+                stale += 1
+                continue
+            seen.add(value)
+            values.append(value)
+            stale = 0
+        return values
+
+    def _cache_path(self, kind):
+        from faker import VERSION
+        filename = f"{self.locale}_seed{self.seed}_{kind}_{self.size}.json"
+        return os.path.join(self.cache_dir, "faker_pools", f"faker-{VERSION}", filename)
+
+    def _load(self, kind):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._cache_path(kind), encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, kind, values):
+        if self.cache_dir is None:
+            return
+        path = self._cache_path(kind)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written to a temporary file and renamed, so concurrent workers never read a partial pool
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                json.dump(values, cache_file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # The cache is an optimization; an unwritable cache directory only costs regeneration
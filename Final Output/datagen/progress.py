@@ -0,0 +1,216 @@
+"""Stage timing, progress and memory reporting for generator runs.
+
+A generator creates one RunLog and wraps each stage of its work in
+``with run_log.stage(name)`` (module-level scripts call run_log.start_stage()
+and the stage's finish() instead). A stage prints a "<name>..." banner when it starts and
+a summary when it ends (rows produced, seconds, rows/second, peak RSS); long
+stages given a total also print progress lines with an ETA. Every event is
+appended as one JSON object per line to _run_log.jsonl in the output
+directory, next to the datasets:
+
+    {"run": "2024-05-01T10:00:00", "generator": "ceo", "event": "stage_end",
+     "stage": "GL line items", "rows": 61606, "seconds": 1.82, ...}
+
+Setting profile to "cprofile" (or "pyinstrument", when installed) profiles
+each stage into _profiles/ in the output directory. Only the calling process is
+profiled; shards run in worker processes are not.
+"""
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+RUN_LOG_FILENAME = "_run_log.jsonl"
+PROFILES_DIRNAME = "_profiles"
+PROFILERS = ("cprofile", "pyinstrument")
+PROGRESS_INTERVAL = 10.0  # Seconds between progress lines of a stage
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MB of this process, or of its waited-for children.
+
+    Returns None where the resource module is unavailable (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _format_mb(mb):
+    return "n/a" if mb is None else f"{mb:,.0f} MB"
+
+
+def _import_pyinstrument():
+    try:
+        from pyinstrument import Profiler
+    except ImportError as exc:
+        raise ImportError("profile = 'pyinstrument' requires pyinstrument (pip install pyinstrument); "
+                          "use 'cprofile' for the standard library profiler") from exc
+    return Profiler
+
+
+class Stage:
+    """Rows and progress of one running stage; see RunLog.start_stage."""
+
+    def __init__(self, run_log, name, total, profiler=None):
+        self.run_log = run_log
+        self.name = name
+        self.total = total
+        self.profiler = profiler
+        self.rows = 0
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.start
+
+    def rows_per_second(self):
+        seconds = self.seconds
+        return self.rows / seconds if seconds > 0 else None
+
+    def eta_seconds(self):
+        if not self.total or not self.done:
+            return None
+        return self.seconds / self.done * (self.total - self.done)
+
+    def advance(self, rows=0, units=0):
+        """Records rows produced and units of the stage total completed (days, shards, ...)."""
+        self.rows += rows
+        self.done += units
+        if time.perf_counter() - self.last_report >= PROGRESS_INTERVAL:
+            self.report()
+
+    def report(self):
+        """Prints and logs a progress line."""
+        self.last_report = time.perf_counter()
+        rate, eta = self.rows_per_second(), self.eta_seconds()
+        position = f"{self.done:,}/{self.total:,}" if self.total else f"{self.done:,}"
+        message = f"  {self.name}: {position}, {self.rows:,} rows"
+        if rate is not None:
+            message += f", {rate:,.0f} rows/s"
+        if eta is not None:
+            message += f", ETA {eta:,.0f} s"
+        print(message, flush=True)
+        self.run_log.event("progress", stage=self.name, done=self.done, total=self.total, rows=self.rows,
+                           seconds=round(self.seconds, 3), eta_seconds=None if eta is None else round(eta, 1),
+                           peak_rss_mb=peak_rss_mb())
+
+    def finish(self):
+        """Ends the stage: prints and logs its rows, time, rows/second and peak RSS."""
+        profile_path = self.run_log._stop_profiler(self.profiler, self.name)
+        seconds, rate, peak = self.seconds, self.rows_per_second(), peak_rss_mb()
+        summary = f"  {self.name}: {self.rows:,} rows in {seconds:,.2f} s"
+        if rate is not None and self.rows:
+            summary += f" ({rate:,.0f} rows/s)"
+        print(f"{summary}, peak RSS {_format_mb(peak)}", flush=True)
+        self.run_log.event("stage_end", stage=self.name, rows=self.rows, seconds=round(seconds, 3),
+                           rows_per_second=None if rate is None else round(rate, 1), peak_rss_mb=peak,
+                           profile=profile_path)
+
+    def fail(self, exc):
+        """Ends the stage after an exception and logs the error."""
+        self.run_log._stop_profiler(self.profiler, self.name)
+        self.run_log.event("stage_failed", stage=self.name, rows=self.rows, seconds=round(self.seconds, 3),
+                           error=repr(exc))
+
+
+class RunLog:
+    """Console and JSON-lines reporting for one generator run.
+
+    output_dir is where _run_log.jsonl (and _profiles/) are written; None keeps
+    the console output only. profile is None, "cprofile" or "pyinstrument".
+    """
+
+    def __init__(self, generator, output_dir=None, profile=None):
+        if profile and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profile!r}; expected one of {list(PROFILERS)}")
+        self.generator = generator
+        self.output_dir = output_dir
+        self.profile = profile or None
+        self.run = datetime.now().isoformat(timespec="seconds")
+        self.start = time.perf_counter()
+
+    def event(self, event, **fields):
+        """Appends one JSON event to the run log."""
+        if self.output_dir is None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        record = {"run": self.run, "generator": self.generator, "event": event,
+                  "elapsed": round(time.perf_counter() - self.start, 3), **fields}
+        with open(os.path.join(self.output_dir, RUN_LOG_FILENAME), "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(record, default=str) + "\n")
+
+    def info(self, message, **fields):
+        """Prints a message and logs it, with optional structured fields."""
+        print(message, flush=True)
+        self.event("message", message=message.strip(), **fields)
+
+    def saved(self, table_name, rows, path, append=False):
+        """Reports a table written to path."""
+        verb = "Appended" if append else "Saved"
+        print(f"{verb} {rows:,} records to {path}", flush=True)
+        self.event("table_written", table=table_name, rows=rows, path=path, append=append)
+
+    def start_stage(self, name, total=None):
+        """Starts a stage and returns it; call its finish() when the stage is done.
+
+        total is the number of units (days, shards, ...) the stage works through;
+        with it, progress lines carry an ETA.
+        """
+        print(f"{name}...", flush=True)
+        self.event("stage_start", stage=name, total=total)
+        return Stage(self, name, total, self._start_profiler())
+
+    @contextlib.contextmanager
+    def stage(self, name, total=None):
+        """Times the with block as a stage; yields the Stage (see start_stage)."""
+        stage = self.start_stage(name, total)
+        try:
+            yield stage
+        except BaseException as exc:
+            stage.fail(exc)
+            raise
+        stage.finish()
+
+    def finish(self):
+        """Logs the end of the run with its total time and peak memory."""
+        self.event("run_end", peak_rss_mb=peak_rss_mb())
+
+    def _start_profiler(self):
+        if self.profile == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.profile == "pyinstrument":
+            profiler = _import_pyinstrument()()
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler, stage_name):
+        """Stops the stage profiler and writes its report; returns the report path."""
+        if profiler is None:
+            return None
+        directory = os.path.join(self.output_dir or ".", PROFILES_DIRNAME)
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "_", stage_name.lower()).strip("_")
+        if self.profile == "cprofile":
+            profiler.disable()
+            path = os.path.join(directory, f"{self.generator}_{slug}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(directory, f"{self.generator}_{slug}.html")
+            with open(path, "w", encoding="utf-8") as report:
+                report.write(profiler.output_html())
+        return path
@@ -0,0 +1,81 @@
+"""Bulk simulation of equipment failures and repairs, for MTBF/MTTR facts.
+
+Every unit alternates between running and being repaired: its times to
+failure follow a Weibull distribution (shape above 1 for wear-out, below 1 for
+early-life failures) and its repair times a lognormal one, so MTBF is the mean
+Weibull uptime and MTTR the mean repair time. Instead of stepping from event
+to event, failure_events() draws blocks of up/repair cycles for thousands of
+units at once and keeps the failures that fall within the horizon:
+
+    shape = np.full(n, 1.5)
+    scale = weibull_scale(np.full(n, 600.0), shape)     # 600 h MTBF
+    for unit, failure_at, repair_hours in failure_events(shape, scale, np.full(n, 4.0), 0.8, 8760, rng):
+        ...
+
+Times are hours from the start of the horizon and units are positions in the
+parameter arrays. Events come in chunks of CHUNK_UNITS units, so memory stays
+bounded however many units are simulated.
+"""
+import math
+
+from datagen.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+CHUNK_UNITS = 10_000  # Units simulated together; bounds the size of the cycle blocks
+BLOCK_MARGIN = 1.25  # Cycles drawn per round, relative to what a typical unit needs to pass the horizon
+
+
+def _mean_factor(shape):
+    """Gamma(1 + 1/shape): the Weibull mean for scale 1, computed once per distinct shape."""
+    distinct, inverse = np.unique(np.asarray(shape, dtype=float), return_inverse=True)
+    return np.array([math.gamma(1 + 1 / value) for value in distinct])[inverse].reshape(np.shape(shape))
+
+
+def weibull_scale(mtbf, shape):
+    """The Weibull scale that gives a mean time between failures of mtbf for the given shape."""
+    return np.asarray(mtbf, dtype=float) / _mean_factor(shape)
+
+
+def failure_events(shape, scale, repair_median, repair_sigma, horizon, rng, chunk_units=CHUNK_UNITS):
+    """Yields (unit, failure_at, repair_hours) arrays for every failure of every unit within the horizon.
+
+    shape and scale give each unit's Weibull time to failure and repair_median
+    its median repair time, in hours; repair_sigma is the lognormal spread, a
+    scalar or one value per unit. rng is a numpy Generator. All units start the
+    horizon running, and the next uptime starts once a repair ends. Each chunk
+    is ordered by unit, then failure time; a repair still under way at the end
+    of the horizon keeps its full length.
+    """
+    shape, scale = np.asarray(shape, dtype=float), np.asarray(scale, dtype=float)
+    repair_mu = np.log(np.asarray(repair_median, dtype=float))
+    repair_sigma = np.broadcast_to(np.asarray(repair_sigma, dtype=float), shape.shape)
+    for first in range(0, len(shape), chunk_units):
+        units = slice(first, min(first + chunk_units, len(shape)))
+        unit, failure_at, repair_hours = _chunk_events(shape[units], scale[units], repair_mu[units],
+                                                       repair_sigma[units], horizon, rng)
+        yield unit + first, failure_at, repair_hours
+
+
+def _chunk_events(shape, scale, repair_mu, repair_sigma, horizon, rng):
+    mean_cycle = scale * _mean_factor(shape) + np.exp(repair_mu + repair_sigma ** 2 / 2)
+    block = int(np.ceil(horizon / np.median(mean_cycle) * BLOCK_MARGIN)) + 2
+    clock = np.zeros(len(shape))  # Where each unit's next cycle starts
+    active = np.arange(len(shape))
+    units, failures, repairs = [], [], []
+    while len(active):
+        size = (len(active), block)
+        uptime = scale[active, None] * rng.weibull(shape[active, None], size)
+        repair = rng.lognormal(repair_mu[active, None], repair_sigma[active, None], size)
+        cycle_end = clock[active, None] + np.cumsum(uptime + repair, axis=1)
+        failure_at = cycle_end - repair
+        within = failure_at < horizon
+        units.append(active[np.nonzero(within)[0]])
+        failures.append(failure_at[within])
+        repairs.append(repair[within])
+        clock[active] = cycle_end[:, -1]
+        # Units whose last drawn failure still fell within the horizon need another round
+        active = active[within[:, -1]]
+    unit, failure_at, repair_hours = np.concatenate(units), np.concatenate(failures), np.concatenate(repairs)
+    order = np.lexsort((failure_at, unit))
+    return unit[order], failure_at[order], repair_hours[order]
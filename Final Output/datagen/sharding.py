@@ -0,0 +1,75 @@
+"""Deterministic sharded execution of fact generation.
+
+Day-driven fact loops are split into fixed calendar-month shards. Each shard
+gets its own random streams spawned from one root SeedSequence, so its output
+depends only on the run seed and the shard's position, never on the worker
+that ran it. Results come back in shard order, which keeps the concatenated
+output byte-identical for any number of workers.
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from datagen.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+def month_shard_bounds(dates):
+    """(start, stop) positions of each calendar month in an ordered date sequence."""
+    months = pd.DatetimeIndex(pd.to_datetime(list(dates))).to_period('M')
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    stops = np.r_[starts[1:], len(months)]
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def shard_random(seed_sequence):
+    """stdlib Random seeded from a shard's SeedSequence (for random.choice-style code and Faker)."""
+    return random.Random(int(seed_sequence.generate_state(1)[0]))
+
+
+def _run_shard(task):
+    shard_func, shard, seed_sequence, kwargs = task
+    return shard_func(shard, seed_sequence, **kwargs)
+
+
+def _collect(results, on_result):
+    collected = []
+    for result in results:
+        if on_result is not None:
+            on_result(result)
+        collected.append(result)
+    return collected
+
+
+def _iter_results(tasks, workers):
+    if workers <= 1:
+        yield from map(_run_shard, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_run_shard, tasks)
+
+
+def iter_shards(shard_func, shards, seed, workers=1, **kwargs):
+    """Like run_shards, but yields the results one at a time in shard order instead of keeping them all.
+
+    For callers that write each shard's rows out as it arrives. The shard seeds
+    are spawned up front, so seed.n_children_spawned is final on return.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seed_sequences = seed.spawn(len(shards))
+    tasks = [(shard_func, shard, seed_sequence, kwargs) for shard, seed_sequence in zip(shards, seed_sequences)]
+    return _iter_results(tasks, workers)
+
+
+def run_shards(shard_func, shards, seed, workers=1, on_result=None, **kwargs):
+    """Runs shard_func(shard, seed_sequence, **kwargs) for every shard, returning results in shard order.
+
+    seed is an int or a SeedSequence (e.g. one child of a generator's root
+    sequence). shard_func must be a module-level function so it can be sent to
+    worker processes. With workers <= 1 the shards run in-process. on_result,
+    if given, is called with each result as it arrives, in shard order (for
+    progress reporting).
+    """
+    return _collect(iter_shards(shard_func, shards, seed, workers, **kwargs), on_result)
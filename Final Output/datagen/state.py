@@ -0,0 +1,53 @@
+"""Generator state saved next to a dataset so later runs can append to it.
+
+A run saves what the following run needs to continue the same history: the
+last generated date, master data, id counters, open items and balances, and
+the random generator states. An append run loads it, generates only the days
+after that date, appends the new rows to the existing tables and saves the
+state again.
+"""
+import os
+import pickle
+from datetime import timedelta
+
+from datagen.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+STATE_DIRNAME = "_state"
+
+
+def state_path(directory, generator):
+    """Where a generator's state lives inside its output directory."""
+    return os.path.join(directory, STATE_DIRNAME, f"{generator}.pkl")
+
+
+def save_state(directory, generator, state):
+    """Pickles state for generator, replacing any earlier state in one step."""
+    path = state_path(directory, generator)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as state_file:
+        pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def load_state(directory, generator):
+    """State saved by the previous run into directory."""
+    path = state_path(directory, generator)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No saved {generator} state at {path}; "
+                                f"run a full generation into {directory!r} before appending")
+    with open(path, "rb") as state_file:
+        return pickle.load(state_file)
+
+
+def append_window(last_date, days):
+    """First and last date of the days following last_date."""
+    if days < 1:
+        raise ValueError(f"days must be at least 1, got {days}")
+    return last_date + timedelta(days=1), last_date + timedelta(days=days)
+
+
+def continued_seed(seed, children_spawned=0):
+    """Root SeedSequence that spawns after the children earlier runs already used."""
+    return np.random.SeedSequence(seed, n_children_spawned=children_spawned)